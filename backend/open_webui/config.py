@@ -1774,6 +1774,12 @@ VISION_ROUTER_SHOW_STATUS_EVENTS = PersistentConfig(
     os.environ.get("VISION_ROUTER_SHOW_STATUS_EVENTS", "True").lower() == "true",
 )
 
+VISION_ROUTER_SPECULATIVE = PersistentConfig(
+    "VISION_ROUTER_SPECULATIVE",
+    "task.vision_router.speculative",
+    os.environ.get("VISION_ROUTER_SPECULATIVE", "False").lower() == "true",
+)
+
 
 ####################################
 # Code Interpreter
@@ -2037,6 +2043,27 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+# "ivfflat", "hnsw" or "none" (exact search). Switching an existing index
+# over takes `python -m open_webui.scripts.pgvector_indexes`
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "100"))
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "10"))
+
+# Collections with at least this many chunks get their own partial vector
+# index, 0 disables
+PGVECTOR_PARTIAL_INDEX_THRESHOLD = int(
+    os.environ.get("PGVECTOR_PARTIAL_INDEX_THRESHOLD", "10000")
+)
+
+PGVECTOR_INSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", "500"))
+# Number of connections used to load large inserts in parallel
+PGVECTOR_INSERT_PARALLELISM = int(os.environ.get("PGVECTOR_INSERT_PARALLELISM", "1"))
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -502,6 +502,238 @@ else:
         MODELS_CACHE_TTL = 1
 
 
+####################################
+# VISION ROUTER
+####################################
+
+VISION_ROUTER_CACHE_SIZE = os.environ.get("VISION_ROUTER_CACHE_SIZE", "512")
+try:
+    VISION_ROUTER_CACHE_SIZE = int(VISION_ROUTER_CACHE_SIZE)
+except Exception:
+    VISION_ROUTER_CACHE_SIZE = 512
+
+VISION_ROUTER_CACHE_TTL = os.environ.get("VISION_ROUTER_CACHE_TTL", "86400")
+try:
+    VISION_ROUTER_CACHE_TTL = int(VISION_ROUTER_CACHE_TTL)
+except Exception:
+    VISION_ROUTER_CACHE_TTL = 86400
+
+
+####################################
+# MODEL SERVER
+####################################
+
+# Serve local embedding, reranking, whisper and speech models from one
+# process shared by all workers (see open_webui/utils/model_server.py)
+ENABLE_MODEL_SERVER = os.environ.get("ENABLE_MODEL_SERVER", "False").lower() == "true"
+
+MODEL_SERVER_SOCKET = os.environ.get(
+    "MODEL_SERVER_SOCKET", str(DATA_DIR / "model_server.sock")
+)
+
+MODEL_SERVER_AUTOSTART = (
+    os.environ.get("MODEL_SERVER_AUTOSTART", "True").lower() == "true"
+)
+
+# Seconds to wait for a model server reply before running the model in-process
+MODEL_SERVER_TIMEOUT = os.environ.get("MODEL_SERVER_TIMEOUT", "300")
+try:
+    MODEL_SERVER_TIMEOUT = float(MODEL_SERVER_TIMEOUT)
+except Exception:
+    MODEL_SERVER_TIMEOUT = 300.0
+
+# Concurrent encode/predict calls of local SentenceTransformer and
+# CrossEncoder models are collected for up to MODEL_BATCH_WAIT_MS (or
+# MODEL_BATCH_SIZE items) and run as one forward pass. Off by default: every
+# call then waits up to MODEL_BATCH_WAIT_MS, which only pays off under
+# concurrent load (e.g. with ENABLE_MODEL_SERVER and several workers)
+ENABLE_MODEL_BATCHING = (
+    os.environ.get("ENABLE_MODEL_BATCHING", "False").lower() == "true"
+)
+
+MODEL_BATCH_SIZE = os.environ.get("MODEL_BATCH_SIZE", "32")
+try:
+    MODEL_BATCH_SIZE = max(int(MODEL_BATCH_SIZE), 1)
+except Exception:
+    MODEL_BATCH_SIZE = 32
+
+MODEL_BATCH_WAIT_MS = os.environ.get("MODEL_BATCH_WAIT_MS", "5")
+try:
+    MODEL_BATCH_WAIT_MS = float(MODEL_BATCH_WAIT_MS)
+except Exception:
+    MODEL_BATCH_WAIT_MS = 5.0
+
+
+####################################
+# AUDIO
+####################################
+
+# 0 disables the bound
+SPEECH_CACHE_MAX_SIZE_MB = os.environ.get("SPEECH_CACHE_MAX_SIZE_MB", "1024")
+try:
+    SPEECH_CACHE_MAX_SIZE_MB = int(SPEECH_CACHE_MAX_SIZE_MB)
+except Exception:
+    SPEECH_CACHE_MAX_SIZE_MB = 1024
+
+SPEECH_CACHE_MAX_AGE = os.environ.get("SPEECH_CACHE_MAX_AGE", str(30 * 24 * 60 * 60))
+try:
+    SPEECH_CACHE_MAX_AGE = int(SPEECH_CACHE_MAX_AGE)
+except Exception:
+    SPEECH_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# Audio chunks transcribed at the same time per file
+AUDIO_STT_MAX_CONCURRENCY = os.environ.get("AUDIO_STT_MAX_CONCURRENCY", "4")
+try:
+    AUDIO_STT_MAX_CONCURRENCY = max(int(AUDIO_STT_MAX_CONCURRENCY), 1)
+except Exception:
+    AUDIO_STT_MAX_CONCURRENCY = 4
+
+
+####################################
+# RETRIEVAL
+####################################
+
+RAG_RETRIEVAL_CACHE_SIZE = os.environ.get("RAG_RETRIEVAL_CACHE_SIZE", "256")
+try:
+    RAG_RETRIEVAL_CACHE_SIZE = int(RAG_RETRIEVAL_CACHE_SIZE)
+except Exception:
+    RAG_RETRIEVAL_CACHE_SIZE = 256
+
+RAG_RETRIEVAL_CACHE_TTL = os.environ.get("RAG_RETRIEVAL_CACHE_TTL", "600")
+try:
+    RAG_RETRIEVAL_CACHE_TTL = int(RAG_RETRIEVAL_CACHE_TTL)
+except Exception:
+    RAG_RETRIEVAL_CACHE_TTL = 600
+
+RAG_RETRIEVAL_MAX_CONCURRENCY = os.environ.get("RAG_RETRIEVAL_MAX_CONCURRENCY", "8")
+try:
+    RAG_RETRIEVAL_MAX_CONCURRENCY = max(int(RAG_RETRIEVAL_MAX_CONCURRENCY), 1)
+except Exception:
+    RAG_RETRIEVAL_MAX_CONCURRENCY = 8
+
+# How results of several queries/collections are merged: "score" keeps the
+# best scores, "rrf" uses reciprocal-rank fusion
+RAG_RESULT_FUSION = os.environ.get("RAG_RESULT_FUSION", "score").lower()
+if RAG_RESULT_FUSION not in ["score", "rrf"]:
+    RAG_RESULT_FUSION = "score"
+
+# Fetched web pages and their embedded chunks, shared by all web searches
+WEB_SEARCH_CACHE_TTL = os.environ.get("WEB_SEARCH_CACHE_TTL", "3600")
+try:
+    WEB_SEARCH_CACHE_TTL = int(WEB_SEARCH_CACHE_TTL)
+except Exception:
+    WEB_SEARCH_CACHE_TTL = 3600
+
+WEB_SEARCH_CACHE_SIZE_MB = os.environ.get("WEB_SEARCH_CACHE_SIZE_MB", "256")
+try:
+    WEB_SEARCH_CACHE_SIZE_MB = int(WEB_SEARCH_CACHE_SIZE_MB)
+except Exception:
+    WEB_SEARCH_CACHE_SIZE_MB = 256
+
+# Seconds a web search waits for pages to load; slower ones are dropped.
+# 0 (the default) waits for every page.
+WEB_SEARCH_LOADER_TIMEOUT = os.environ.get("WEB_SEARCH_LOADER_TIMEOUT", "0")
+try:
+    WEB_SEARCH_LOADER_TIMEOUT = float(WEB_SEARCH_LOADER_TIMEOUT)
+except Exception:
+    WEB_SEARCH_LOADER_TIMEOUT = 0.0
+
+# Web search collections are deleted once unused for this many seconds.
+# 0 keeps them forever.
+WEB_SEARCH_COLLECTION_TTL = os.environ.get("WEB_SEARCH_COLLECTION_TTL", "86400")
+try:
+    WEB_SEARCH_COLLECTION_TTL = int(WEB_SEARCH_COLLECTION_TTL)
+except Exception:
+    WEB_SEARCH_COLLECTION_TTL = 86400
+
+VECTOR_COLLECTION_CLEANUP_INTERVAL = os.environ.get(
+    "VECTOR_COLLECTION_CLEANUP_INTERVAL", "3600"
+)
+try:
+    VECTOR_COLLECTION_CLEANUP_INTERVAL = max(
+        int(VECTOR_COLLECTION_CLEANUP_INTERVAL), 60
+    )
+except Exception:
+    VECTOR_COLLECTION_CLEANUP_INTERVAL = 3600
+
+VECTOR_COLLECTION_CLEANUP_BATCH_SIZE = os.environ.get(
+    "VECTOR_COLLECTION_CLEANUP_BATCH_SIZE", "100"
+)
+try:
+    VECTOR_COLLECTION_CLEANUP_BATCH_SIZE = max(
+        int(VECTOR_COLLECTION_CLEANUP_BATCH_SIZE), 1
+    )
+except Exception:
+    VECTOR_COLLECTION_CLEANUP_BATCH_SIZE = 100
+
+
+####################################
+# IMAGE PREPROCESSING
+####################################
+
+ENABLE_IMAGE_PREPROCESSING = (
+    os.environ.get("ENABLE_IMAGE_PREPROCESSING", "True").lower() == "true"
+)
+
+IMAGE_PREPROCESSING_MAX_DIMENSION = os.environ.get(
+    "IMAGE_PREPROCESSING_MAX_DIMENSION", "1568"
+)
+try:
+    IMAGE_PREPROCESSING_MAX_DIMENSION = int(IMAGE_PREPROCESSING_MAX_DIMENSION)
+except Exception:
+    IMAGE_PREPROCESSING_MAX_DIMENSION = 1568
+
+IMAGE_PREPROCESSING_QUALITY = os.environ.get("IMAGE_PREPROCESSING_QUALITY", "85")
+try:
+    IMAGE_PREPROCESSING_QUALITY = int(IMAGE_PREPROCESSING_QUALITY)
+except Exception:
+    IMAGE_PREPROCESSING_QUALITY = 85
+
+IMAGE_PREPROCESSING_CACHE_SIZE_MB = os.environ.get(
+    "IMAGE_PREPROCESSING_CACHE_SIZE_MB", "128"
+)
+try:
+    IMAGE_PREPROCESSING_CACHE_SIZE_MB = int(IMAGE_PREPROCESSING_CACHE_SIZE_MB)
+except Exception:
+    IMAGE_PREPROCESSING_CACHE_SIZE_MB = 128
+
+
+####################################
+# IMAGE GENERATION
+####################################
+
+IMAGE_GENERATION_MODELS_CACHE_TTL = os.environ.get(
+    "IMAGE_GENERATION_MODELS_CACHE_TTL", "300"
+)
+try:
+    IMAGE_GENERATION_MODELS_CACHE_TTL = int(IMAGE_GENERATION_MODELS_CACHE_TTL)
+except Exception:
+    IMAGE_GENERATION_MODELS_CACHE_TTL = 300
+
+# Generated images up to this size are kept in memory, larger ones spill to disk
+IMAGE_GENERATION_SPOOL_MAX_SIZE_MB = os.environ.get(
+    "IMAGE_GENERATION_SPOOL_MAX_SIZE_MB", "8"
+)
+try:
+    IMAGE_GENERATION_SPOOL_MAX_SIZE_MB = int(IMAGE_GENERATION_SPOOL_MAX_SIZE_MB)
+except Exception:
+    IMAGE_GENERATION_SPOOL_MAX_SIZE_MB = 8
+
+# Reuse the images of identical generations. Only generations with an
+# explicit seed are cached, others are expected to differ every time.
+ENABLE_IMAGE_GENERATION_CACHE = (
+    os.environ.get("ENABLE_IMAGE_GENERATION_CACHE", "False").lower() == "true"
+)
+
+IMAGE_GENERATION_CACHE_MAX_ENTRIES = os.environ.get(
+    "IMAGE_GENERATION_CACHE_MAX_ENTRIES", "256"
+)
+try:
+    IMAGE_GENERATION_CACHE_MAX_ENTRIES = int(IMAGE_GENERATION_CACHE_MAX_ENTRIES)
+except Exception:
+    IMAGE_GENERATION_CACHE_MAX_ENTRIES = 256
+
+
 ####################################
 # CHAT
 ####################################
@@ -520,6 +752,12 @@ else:
     except Exception:
         CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE = 1
 
+# Save the per-stage timings of each chat turn in its message metadata, see
+# `open_webui.utils.telemetry.stages`
+ENABLE_CHAT_STAGE_TIMINGS = (
+    os.environ.get("ENABLE_CHAT_STAGE_TIMINGS", "False").lower() == "true"
+)
+
 
 ####################################
 # WEBSOCKET SUPPORT
@@ -751,6 +989,69 @@ OTEL_LOGS_OTLP_SPAN_EXPORTER = os.environ.get(
     "OTEL_LOGS_OTLP_SPAN_EXPORTER", OTEL_OTLP_SPAN_EXPORTER
 ).lower()  # grpc or http
 
+# Seconds between refreshes of gauges that need a database or Redis query
+# (e.g. webui.users.total); metric collection only reads the cached values
+OTEL_METRICS_GAUGE_REFRESH_INTERVAL = os.environ.get(
+    "OTEL_METRICS_GAUGE_REFRESH_INTERVAL", "60"
+)
+try:
+    OTEL_METRICS_GAUGE_REFRESH_INTERVAL = max(
+        int(OTEL_METRICS_GAUGE_REFRESH_INTERVAL), 1
+    )
+except Exception:
+    OTEL_METRICS_GAUGE_REFRESH_INTERVAL = 60
+
+####################################
+# TOOLS
+####################################
+
+# Native tool calls of one model response run concurrently, at most this many
+# at a time
+TOOL_CALL_MAX_CONCURRENCY = os.environ.get("TOOL_CALL_MAX_CONCURRENCY", "8")
+try:
+    TOOL_CALL_MAX_CONCURRENCY = max(int(TOOL_CALL_MAX_CONCURRENCY), 1)
+except Exception:
+    TOOL_CALL_MAX_CONCURRENCY = 8
+
+# Seconds before a single tool call is abandoned, 0 waits indefinitely
+TOOL_CALL_TIMEOUT = os.environ.get("TOOL_CALL_TIMEOUT", "300")
+try:
+    TOOL_CALL_TIMEOUT = int(TOOL_CALL_TIMEOUT)
+except Exception:
+    TOOL_CALL_TIMEOUT = 300
+
+####################################
+# CODE INTERPRETER
+####################################
+
+# Run Jupyter code on pre-started kernels, one kernel per chat so variables
+# persist between code interpreter steps. Pools are per process, so with
+# several workers a chat keeps its variables only within one worker.
+ENABLE_JUPYTER_KERNEL_POOL = (
+    os.environ.get("ENABLE_JUPYTER_KERNEL_POOL", "True").lower() == "true"
+)
+
+# Kernels started ahead of time, ready for new chats
+JUPYTER_KERNEL_POOL_WARM_SIZE = os.environ.get("JUPYTER_KERNEL_POOL_WARM_SIZE", "2")
+try:
+    JUPYTER_KERNEL_POOL_WARM_SIZE = max(int(JUPYTER_KERNEL_POOL_WARM_SIZE), 0)
+except Exception:
+    JUPYTER_KERNEL_POOL_WARM_SIZE = 2
+
+# Upper bound on kernels per Jupyter server, warm ones included
+JUPYTER_KERNEL_POOL_MAX_SIZE = os.environ.get("JUPYTER_KERNEL_POOL_MAX_SIZE", "16")
+try:
+    JUPYTER_KERNEL_POOL_MAX_SIZE = max(int(JUPYTER_KERNEL_POOL_MAX_SIZE), 1)
+except Exception:
+    JUPYTER_KERNEL_POOL_MAX_SIZE = 16
+
+# Seconds a chat's kernel is kept after its last execution
+JUPYTER_KERNEL_IDLE_TIMEOUT = os.environ.get("JUPYTER_KERNEL_IDLE_TIMEOUT", "900")
+try:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = max(int(JUPYTER_KERNEL_IDLE_TIMEOUT), 60)
+except Exception:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = 900
+
 ####################################
 # TOOLS/FUNCTIONS PIP OPTIONS
 ####################################
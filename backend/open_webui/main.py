@@ -99,6 +99,7 @@ from open_webui.routers.retrieval import (
     get_ef,
     get_rf,
 )
+from open_webui.retrieval.vector.lifecycle import periodic_vector_collection_cleanup
 
 from open_webui.internal.db import Session, engine
 
@@ -407,6 +408,7 @@ from open_webui.config import (
     VISION_ROUTER_ENABLE_ADMINS,
     VISION_ROUTER_ENABLE_USERS,
     VISION_ROUTER_SHOW_STATUS_EVENTS,
+    VISION_ROUTER_SPECULATIVE,
     AppConfig,
     reset_config,
 )
@@ -444,6 +446,7 @@ from open_webui.env import (
     RESET_CONFIG_ON_START,
     ENABLE_VERSION_UPDATE_CHECK,
     ENABLE_OTEL,
+    ENABLE_OTEL_METRICS,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
 )
@@ -460,7 +463,12 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.embeddings import generate_embeddings
-from open_webui.utils.middleware import process_chat_payload, process_chat_response
+from open_webui.utils.middleware import (
+    finish_stage_timings,
+    process_chat_payload,
+    process_chat_response,
+)
+from open_webui.utils.telemetry.stages import stage, start_stage_timer
 from open_webui.utils.access_control import has_access
 
 from open_webui.utils.auth import (
@@ -471,6 +479,8 @@ from open_webui.utils.auth import (
     get_verified_user,
 )
 from open_webui.utils.plugin import install_tool_and_function_dependencies
+from open_webui.utils.tools import close_tool_server_session
+from open_webui.utils.code_interpreter import close_kernel_pools
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
@@ -565,6 +575,15 @@ async def lifespan(app: FastAPI):
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_vector_collection_cleanup())
+    # The image generation cache's index lives in memory, drop what a previous
+    # run left in storage
+    await asyncio.to_thread(images.image_generation_cache.sweep)
+
+    if ENABLE_OTEL and ENABLE_OTEL_METRICS:
+        from open_webui.utils.telemetry.metrics import periodic_gauge_refresh
+
+        asyncio.create_task(periodic_gauge_refresh())
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -592,6 +611,10 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    await close_tool_server_session()
+    await images.close_image_session()
+    await close_kernel_pools()
+
 
 app = FastAPI(
     title="Prosper Chat",
@@ -1084,7 +1107,6 @@ app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT = AUDIO_TTS_AZURE_SPEECH_OUTPUT_
 
 app.state.faster_whisper_model = None
 app.state.speech_synthesiser = None
-app.state.speech_speaker_embeddings_dataset = None
 
 
 ########################################
@@ -1134,6 +1156,7 @@ app.state.config.VISION_ROUTER_SKIP_MODELS = VISION_ROUTER_SKIP_MODELS
 app.state.config.VISION_ROUTER_ENABLE_ADMINS = VISION_ROUTER_ENABLE_ADMINS
 app.state.config.VISION_ROUTER_ENABLE_USERS = VISION_ROUTER_ENABLE_USERS
 app.state.config.VISION_ROUTER_SHOW_STATUS_EVENTS = VISION_ROUTER_SHOW_STATUS_EVENTS
+app.state.config.VISION_ROUTER_SPECULATIVE = VISION_ROUTER_SPECULATIVE
 
 
 ########################################
@@ -1406,6 +1429,8 @@ async def chat_completion(
     form_data: dict,
     user=Depends(get_verified_user),
 ):
+    start_stage_timer()
+
     if not request.app.state.MODELS:
         await get_all_models(request, user=user)
 
@@ -1485,9 +1510,10 @@ async def chat_completion(
         request.state.metadata = metadata
         form_data["metadata"] = metadata
 
-        form_data, metadata, events = await process_chat_payload(
-            request, form_data, user, metadata, model
-        )
+        with stage("payload"):
+            form_data, metadata, events = await process_chat_payload(
+                request, form_data, user, metadata, model
+            )
     except Exception as e:
         log.debug(f"Error processing chat payload: {e}")
         if metadata.get("chat_id") and metadata.get("message_id"):
@@ -1506,7 +1532,8 @@ async def chat_completion(
         )
 
     try:
-        response = await chat_completion_handler(request, form_data, user)
+        with stage("upstream"):
+            response = await chat_completion_handler(request, form_data, user)
         if metadata.get("chat_id") and metadata.get("message_id"):
             Chats.upsert_message_to_chat_by_id_and_message_id(
                 metadata["chat_id"],
@@ -1516,9 +1543,15 @@ async def chat_completion(
                 },
             )
 
-        return await process_chat_response(
+        response = await process_chat_response(
             request, response, form_data, user, metadata, model, events, tasks
         )
+        # Streamed responses report their timings once the stream is done
+        if not isinstance(response, StreamingResponse) and not (
+            isinstance(response, dict) and response.get("task_id")
+        ):
+            finish_stage_timings(metadata)
+        return response
     except Exception as e:
         log.debug(f"Error in chat completion: {e}")
         if metadata.get("chat_id") and metadata.get("message_id"):
@@ -1677,6 +1710,8 @@ async def get_app_config(request: Request):
                     "enable_code_execution": app.state.config.ENABLE_CODE_EXECUTION,
                     "enable_code_interpreter": app.state.config.ENABLE_CODE_INTERPRETER,
                     "enable_image_generation": app.state.config.ENABLE_IMAGE_GENERATION,
+                    "enable_vision_prepass_speculative": app.state.config.VISION_ROUTER_ENABLED
+                    and app.state.config.VISION_ROUTER_SPECULATIVE,
                     "enable_autocomplete_generation": app.state.config.ENABLE_AUTOCOMPLETE_GENERATION,
                     "enable_community_sharing": app.state.config.ENABLE_COMMUNITY_SHARING,
                     "enable_message_rating": app.state.config.ENABLE_MESSAGE_RATING,
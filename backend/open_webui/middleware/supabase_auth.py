@@ -1,18 +1,21 @@
 import os
 import time
+import hashlib
 import logging
+import threading
 from typing import Optional
 
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request
 import jwt
-from jwt import PyJWKClient
+from jwt import PyJWKClient, PyJWKSet
 
 from open_webui.models.users import Users
 from open_webui.models.auths import Auths
 from open_webui.utils.auth import get_password_hash
 from open_webui.models.groups import Groups
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.cache import LRUCache
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OAUTH"])
@@ -22,18 +25,140 @@ SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "").strip()
 SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL", "").strip()
 SUPABASE_JWT_AUD = os.getenv("SUPABASE_JWT_AUD", "").strip()  # e.g., "authenticated" or empty to skip
 
-_jwk_client: Optional[PyJWKClient] = None
-_last_jwk_init = 0
+SUPABASE_JWKS_REFRESH_INTERVAL = int(os.getenv("SUPABASE_JWKS_REFRESH_INTERVAL", "300"))
+# Lower bound between blocking fetches, so tokens with made-up kids can't
+# make every request hit the JWKS endpoint
+SUPABASE_JWKS_MIN_FETCH_INTERVAL = int(
+    os.getenv("SUPABASE_JWKS_MIN_FETCH_INTERVAL", "10")
+)
+SUPABASE_JWKS_FETCH_TIMEOUT = int(os.getenv("SUPABASE_JWKS_FETCH_TIMEOUT", "5"))
+SUPABASE_JWT_CACHE_SIZE = int(os.getenv("SUPABASE_JWT_CACHE_SIZE", "4096"))
+SUPABASE_JWT_CACHE_TTL = int(os.getenv("SUPABASE_JWT_CACHE_TTL", "300"))
 
 
-def _get_jwk_client() -> Optional[PyJWKClient]:
-    global _jwk_client, _last_jwk_init
-    now = int(time.time())
-    if _jwk_client is None or (now - _last_jwk_init) > 300:
-        if SUPABASE_JWKS_URL:
-            _jwk_client = PyJWKClient(SUPABASE_JWKS_URL)
-            _last_jwk_init = now
-    return _jwk_client
+class _JWKSCache:
+    """
+    Holds the signing keys of SUPABASE_JWKS_URL. Known keys that went stale
+    are revalidated in a background thread (stale-while-revalidate); when a
+    token's kid isn't known yet (cold cache, rotated keys) the keys are
+    fetched right away, at most once per `min_fetch_interval`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: int,
+        min_fetch_interval: int = SUPABASE_JWKS_MIN_FETCH_INTERVAL,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_fetch_interval = min_fetch_interval
+        self._client = PyJWKClient(
+            url,
+            cache_jwk_set=False,
+            cache_keys=False,
+            timeout=SUPABASE_JWKS_FETCH_TIMEOUT,
+        )
+        self._keys: dict[str, object] = {}
+        self._fetched_at = 0.0
+        self._attempted_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        # Held for the duration of a fetch, so concurrent misses share one
+        self._fetch_lock = threading.Lock()
+
+    def _fetch(self) -> None:
+        self._attempted_at = time.monotonic()
+        try:
+            jwk_set = PyJWKSet.from_dict(self._client.fetch_data())
+            keys = {jwk.key_id: jwk.key for jwk in jwk_set.keys}
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+            log.debug(f"Refreshed Supabase JWKS ({len(keys)} keys)")
+        except Exception as e:
+            log.warning(f"Failed to refresh Supabase JWKS: {e}")
+
+    def refresh(self) -> None:
+        try:
+            with self._fetch_lock:
+                self._fetch()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def fetch_missing_key(self, kid: Optional[str]) -> None:
+        with self._fetch_lock:
+            # Someone else may have fetched it while we waited
+            if self._lookup(kid) is not None:
+                return
+            if (
+                self._attempted_at is not None
+                and time.monotonic() - self._attempted_at < self.min_fetch_interval
+            ):
+                return
+            self._fetch()
+
+    def refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self.refresh, name="supabase-jwks-refresh", daemon=True
+        ).start()
+
+    def _lookup(self, kid: Optional[str]):
+        with self._lock:
+            keys = self._keys
+        key = keys.get(kid)
+        if key is None and kid is None and len(keys) == 1:
+            key = next(iter(keys.values()))
+        return key
+
+    def get_signing_key(self, kid: Optional[str]):
+        key = self._lookup(kid)
+        if key is None:
+            # Nothing to verify against yet, or the keys were rotated
+            self.fetch_missing_key(kid)
+            return self._lookup(kid)
+
+        with self._lock:
+            stale = time.monotonic() - self._fetched_at > self.refresh_interval
+        if stale:
+            self.refresh_in_background()
+        return key
+
+
+_jwks_cache: Optional[_JWKSCache] = None
+_jwks_cache_lock = threading.Lock()
+
+
+def _get_jwks_cache() -> Optional[_JWKSCache]:
+    global _jwks_cache
+    if not SUPABASE_JWKS_URL:
+        return None
+    if _jwks_cache is None:
+        with _jwks_cache_lock:
+            if _jwks_cache is None:
+                _jwks_cache = _JWKSCache(
+                    SUPABASE_JWKS_URL, SUPABASE_JWKS_REFRESH_INTERVAL
+                )
+                _jwks_cache.refresh_in_background()
+    return _jwks_cache
+
+
+# Verified claims keyed by sha256(token), each entry expiring with its token
+_claims_cache = LRUCache(maxsize=SUPABASE_JWT_CACHE_SIZE)
+
+
+def _cache_claims(token_hash: str, claims: dict) -> None:
+    ttl = SUPABASE_JWT_CACHE_TTL
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _claims_cache.set(token_hash, claims, ttl=ttl)
 
 
 def _extract_bearer_token(req: Request) -> Optional[str]:
@@ -50,7 +175,7 @@ def _extract_bearer_token(req: Request) -> Optional[str]:
     return None
 
 
-def _verify_supabase_jwt(token: str) -> Optional[dict]:
+def _decode_supabase_jwt(token: str) -> Optional[dict]:
     """
     Verify a Supabase JWT using HS256 (secret) or RS256/ES256 (JWKS).
     We verify 'aud' only if SUPABASE_JWT_AUD is set.
@@ -72,11 +197,14 @@ def _verify_supabase_jwt(token: str) -> Optional[dict]:
             return None
 
     # JWKS (RS/ES) path
-    jwk_client = _get_jwk_client()
-    if not jwk_client:
+    jwks_cache = _get_jwks_cache()
+    if not jwks_cache:
         return None
     try:
-        signing_key = jwk_client.get_signing_key_from_jwt(token).key
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = jwks_cache.get_signing_key(kid)
+        if signing_key is None:
+            return None
         return jwt.decode(
             token,
             signing_key,
@@ -88,7 +216,29 @@ def _verify_supabase_jwt(token: str) -> Optional[dict]:
         return None
 
 
+def _verify_supabase_jwt(token: str) -> Optional[dict]:
+    """
+    Same as _decode_supabase_jwt, but remembers verified claims until the
+    token expires so repeat requests skip the signature check.
+    """
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    claims = _claims_cache.get(token_hash)
+    if claims is not None:
+        return claims
+
+    claims = _decode_supabase_jwt(token)
+    if claims is not None:
+        _cache_claims(token_hash, claims)
+    return claims
+
+
 class SupabaseAuthMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        # Pre-warm the JWKS so the first request doesn't wait for it
+        if MODE == "supabase" and not SUPABASE_JWT_SECRET:
+            _get_jwks_cache()
+
     async def dispatch(self, request: Request, call_next):
         # Only engage when explicitly enabled
         if MODE != "supabase":
@@ -0,0 +1,148 @@
+"""Add chat search table
+
+Revision ID: a7f3c2d9e1b4
+Revises: d31026856c01
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a7f3c2d9e1b4"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+MAX_CONTENT_LENGTH = 200_000
+
+
+def get_chat_search_content(chat: dict) -> str:
+    """Frozen copy of open_webui.models.chats.get_chat_search_content."""
+    messages = (chat.get("history") or {}).get("messages")
+    if isinstance(messages, dict) and messages:
+        messages = list(messages.values())
+    else:
+        messages = chat.get("messages") or []
+
+    contents = []
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        content = message.get("content")
+        if isinstance(content, str):
+            contents.append(content)
+        elif isinstance(content, list):
+            contents.extend(
+                part.get("text") or ""
+                for part in content
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+
+    return "\n".join(contents).replace("\x00", "")[:MAX_CONTENT_LENGTH]
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect_name = conn.dialect.name
+
+    chat_search = op.create_table(
+        "chat_search",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(), nullable=False, unique=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+    if dialect_name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE chat_search ADD COLUMN tsv tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX chat_search_tsv_idx ON chat_search USING GIN (tsv)")
+    elif dialect_name == "sqlite":
+        try:
+            op.execute(
+                """
+                CREATE VIRTUAL TABLE chat_search_fts USING fts5(
+                    title, content,
+                    content='chat_search', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+                """
+            )
+        except Exception as e:
+            # Search falls back to substring matching without FTS5
+            print(f"FTS5 is unavailable, skipping chat search index: {e}")
+        else:
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN
+                    INSERT INTO chat_search_fts(rowid, title, content)
+                    VALUES (new.id, new.title, new.content);
+                END
+                """
+            )
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN
+                    INSERT INTO chat_search_fts(chat_search_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                END
+                """
+            )
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN
+                    INSERT INTO chat_search_fts(chat_search_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO chat_search_fts(rowid, title, content)
+                    VALUES (new.id, new.title, new.content);
+                END
+                """
+            )
+
+    # Backfill the index from the existing chats
+    chat = sa.table(
+        "chat",
+        sa.column("id", sa.String()),
+        sa.column("user_id", sa.String()),
+        sa.column("title", sa.Text()),
+        sa.column("chat", sa.JSON()),
+        sa.column("updated_at", sa.BigInteger()),
+    )
+    result = conn.execution_options(yield_per=BATCH_SIZE).execute(
+        sa.select(chat).where(sa.not_(chat.c.user_id.like("shared-%")))
+    )
+
+    for rows in result.partitions():
+        op.bulk_insert(
+            chat_search,
+            [
+                {
+                    "chat_id": row.id,
+                    "user_id": row.user_id,
+                    "title": row.title or "",
+                    "content": get_chat_search_content(row.chat or {}),
+                    "updated_at": row.updated_at,
+                }
+                for row in rows
+            ],
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ai")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_au")
+        op.execute("DROP TABLE IF EXISTS chat_search_fts")
+    op.drop_table("chat_search")
@@ -0,0 +1,41 @@
+"""Add vector collection table
+
+Revision ID: b8e4f1a2c6d3
+Revises: e1d5a9c3b7f2
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b8e4f1a2c6d3"
+down_revision = "e1d5a9c3b7f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "vector_collection",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("type", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=True),
+        sa.Column("item_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("size", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.Column("last_accessed_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "vector_collection_type_last_accessed_at_idx",
+        "vector_collection",
+        ["type", "last_accessed_at"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "vector_collection_type_last_accessed_at_idx", table_name="vector_collection"
+    )
+    op.drop_table("vector_collection")
@@ -0,0 +1,26 @@
+"""Add chat list index
+
+Revision ID: e1d5a9c3b7f2
+Revises: a7f3c2d9e1b4
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "e1d5a9c3b7f2"
+down_revision = "a7f3c2d9e1b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "chat_user_id_archived_pinned_updated_at_idx",
+        "chat",
+        ["user_id", "archived", "pinned", "updated_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_user_id_archived_pinned_updated_at_idx", table_name="chat")
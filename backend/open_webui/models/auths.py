@@ -1,12 +1,14 @@
 import logging
+import time
 import uuid
 from typing import Optional
 
 from open_webui.internal.db import Base, get_db
-from open_webui.models.users import UserModel, Users
+from open_webui.models.groups import Groups
+from open_webui.models.users import User, UserModel, Users
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel
-from sqlalchemy import Boolean, Column, String, Text
+from sqlalchemy import Boolean, Column, String, Text, insert, update
 from open_webui.utils.auth import verify_password
 
 log = logging.getLogger(__name__)
@@ -127,6 +129,67 @@ class AuthsTable:
             else:
                 return None
 
+    def upsert_auths_bulk(
+        self,
+        new_users: list[dict],
+        updated_users: list[dict],
+        group_assignments: Optional[dict[str, str]] = None,
+    ) -> bool:
+        """
+        Insert new auth/user rows, update existing users and move users into
+        their groups in a single transaction.
+
+        new_users: dicts with id, email, password, name, role
+        updated_users: dicts with id plus the user columns to update
+        group_assignments: user id -> group id, see
+            `Groups.sync_groups_by_user_assignments`
+        """
+        now = int(time.time())
+        with get_db() as db:
+            log.info(
+                f"upsert_auths_bulk: {len(new_users)} new, {len(updated_users)} updated"
+            )
+            if new_users:
+                db.execute(
+                    insert(Auth),
+                    [
+                        {
+                            "id": user["id"],
+                            "email": user["email"],
+                            "password": user["password"],
+                            "active": True,
+                        }
+                        for user in new_users
+                    ],
+                )
+                db.execute(
+                    insert(User),
+                    [
+                        {
+                            "id": user["id"],
+                            "name": user["name"],
+                            "email": user["email"],
+                            "role": user.get("role", "pending"),
+                            "profile_image_url": user.get(
+                                "profile_image_url", "/user.png"
+                            ),
+                            "last_active_at": now,
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                        for user in new_users
+                    ],
+                )
+            if updated_users:
+                db.execute(
+                    update(User),
+                    [{**user, "updated_at": now} for user in updated_users],
+                )
+            if group_assignments:
+                Groups.apply_user_assignments(db, group_assignments)
+            db.commit()
+            return True
+
     def authenticate_user(self, email: str, password: str) -> Optional[UserModel]:
         log.info(f"authenticate_user: {email}")
 
@@ -1,5 +1,6 @@
 import logging
 import json
+import re
 import time
 import uuid
 from typing import Optional
@@ -10,8 +11,8 @@ from open_webui.models.folders import Folders
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import BigInteger, Boolean, Column, Float, Integer, String, Text, JSON
+from sqlalchemy import or_, func, select, and_, text, inspect, Index
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -41,6 +42,99 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    __table_args__ = (
+        # Sidebar/chat list queries, see `ChatTable.get_chat_title_id_list_by_user_id`
+        Index(
+            "chat_user_id_archived_pinned_updated_at_idx",
+            "user_id",
+            "archived",
+            "pinned",
+            "updated_at",
+        ),
+    )
+
+
+class ChatSearch(Base):
+    """
+    Plain-text projection of a chat used by the full-text search index.
+
+    SQLite keeps the `chat_search_fts` FTS5 table in sync with it through
+    triggers, PostgreSQL indexes the generated `tsv` column with GIN (see the
+    `add_chat_search_table` migration).
+    """
+
+    __tablename__ = "chat_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(String, unique=True, nullable=False)
+    user_id = Column(String)
+    title = Column(Text)
+    content = Column(Text)
+    updated_at = Column(BigInteger)
+
+
+# PostgreSQL refuses tsvectors over 1MB, and nobody searches that deep anyway
+CHAT_SEARCH_MAX_CONTENT_LENGTH = 200_000
+
+# Searchable tokens, matching how FTS5 (unicode61) and the `simple` text search
+# configuration split words
+CHAT_SEARCH_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def get_chat_search_content(chat: dict) -> str:
+    """Extract the searchable text of all messages of a chat."""
+    messages = (chat.get("history") or {}).get("messages")
+    if isinstance(messages, dict) and messages:
+        messages = list(messages.values())
+    else:
+        messages = chat.get("messages") or []
+
+    contents = []
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        content = message.get("content")
+        if isinstance(content, str):
+            contents.append(content)
+        elif isinstance(content, list):
+            contents.extend(
+                part.get("text") or ""
+                for part in content
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+
+    return "\n".join(contents).replace("\x00", "")[:CHAT_SEARCH_MAX_CONTENT_LENGTH]
+
+
+def get_chat_search_query(search_text: str, dialect_name: str) -> Optional[str]:
+    """Build a prefix-matching full-text query requiring every word."""
+    tokens = CHAT_SEARCH_TOKEN_RE.findall(search_text.lower())
+    if not tokens:
+        return None
+    if dialect_name == "sqlite":
+        return " ".join(f'"{token}"*' for token in tokens)
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+_chat_search_index_available: Optional[bool] = None
+
+
+def has_chat_search_index(db) -> bool:
+    global _chat_search_index_available
+    if _chat_search_index_available is None:
+        bind = db.get_bind()
+        if bind.dialect.name == "sqlite":
+            _chat_search_index_available = inspect(bind).has_table("chat_search_fts")
+        elif bind.dialect.name == "postgresql":
+            inspector = inspect(bind)
+            _chat_search_index_available = inspector.has_table("chat_search") and any(
+                column["name"] == "tsv"
+                for column in inspector.get_columns("chat_search")
+            )
+        else:
+            _chat_search_index_available = False
+    return _chat_search_index_available
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -109,6 +203,91 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    def _apply_chat_list_cursor(self, query, cursor: Optional[tuple[int, str]]):
+        """
+        Keyset pagination over (updated_at, id) descending: only keep the chats
+        listed after `cursor`, the (updated_at, id) of the previous page's last
+        chat. Unlike offsets this is stable while chats are being updated.
+        """
+        if cursor is None:
+            return query
+
+        updated_at, id = cursor
+        return query.filter(
+            or_(
+                Chat.updated_at < updated_at,
+                and_(Chat.updated_at == updated_at, Chat.id < id),
+            )
+        )
+
+    def _apply_chat_list_order(
+        self, query, filter: Optional[dict], cursor: Optional[tuple[int, str]]
+    ):
+        """
+        Order by the filter's `order_by` and `direction` when both are given,
+        otherwise by (updated_at, id) descending starting after `cursor`.
+        Cursors can't be combined with a custom ordering.
+        """
+        order_by = (filter or {}).get("order_by")
+        direction = (filter or {}).get("direction")
+
+        if order_by and direction and getattr(Chat, order_by):
+            if cursor is not None:
+                raise ValueError("Cursor pagination requires the default ordering")
+            if direction.lower() == "asc":
+                return query.order_by(getattr(Chat, order_by).asc())
+            elif direction.lower() == "desc":
+                return query.order_by(getattr(Chat, order_by).desc())
+            else:
+                raise ValueError("Invalid direction for ordering")
+
+        query = self._apply_chat_list_cursor(query, cursor)
+        return query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+    def _get_chat_title_id_list(self, query) -> list[ChatTitleIdResponse]:
+        # Only load the columns needed for listing, never the (large) chat JSON
+        all_chats = query.with_entities(
+            Chat.id, Chat.title, Chat.updated_at, Chat.created_at
+        ).all()
+
+        # result has to be destructured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
+        return [
+            ChatTitleIdResponse.model_validate(
+                {
+                    "id": chat[0],
+                    "title": chat[1],
+                    "updated_at": chat[2],
+                    "created_at": chat[3],
+                }
+            )
+            for chat in all_chats
+        ]
+
+    def _update_chat_search_index(self, db, chat: Chat):
+        """Stage the search index row of `chat`, committed with the chat itself."""
+        if chat.user_id.startswith("shared-") or not has_chat_search_index(db):
+            return
+
+        values = {
+            "user_id": chat.user_id,
+            "title": chat.title or "",
+            "content": get_chat_search_content(chat.chat or {}),
+            "updated_at": chat.updated_at,
+        }
+        updated = db.query(ChatSearch).filter_by(chat_id=chat.id).update(values)
+        if not updated:
+            db.add(ChatSearch(chat_id=chat.id, **values))
+
+    def update_chat_search_index_by_id(self, id: str) -> None:
+        try:
+            with get_db() as db:
+                chat = db.get(Chat, id)
+                if chat is not None:
+                    self._update_chat_search_index(db, chat)
+                    db.commit()
+        except Exception as e:
+            log.exception(f"Error updating chat search index for {id}: {e}")
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -130,6 +309,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_chat_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -167,17 +347,28 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_chat_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
 
-    def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+    def update_chat_by_id(
+        self, id: str, chat: dict, reindex: bool = True
+    ) -> Optional[ChatModel]:
+        """
+        Replace the chat. Its search index row is rewritten in the same
+        transaction when `reindex` is set or the title changed.
+        """
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
+                title = chat["title"] if "title" in chat else "New Chat"
+                reindex = reindex or title != chat_item.title
                 chat_item.chat = chat
-                chat_item.title = chat["title"] if "title" in chat else "New Chat"
+                chat_item.title = title
                 chat_item.updated_at = int(time.time())
+                if reindex:
+                    self._update_chat_search_index(db, chat_item)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -239,8 +430,13 @@ class ChatTable:
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
     def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
+        self, id: str, message_id: str, message: dict, reindex: Optional[bool] = None
     ) -> Optional[ChatModel]:
+        """
+        Merge `message` into the chat history. The search index is only
+        rewritten when the message content changed, unless `reindex` says
+        otherwise (e.g. for partial content saved while streaming).
+        """
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -252,6 +448,12 @@ class ChatTable:
         chat = chat.chat
         history = chat.get("history", {})
 
+        if reindex is None:
+            previous = history.get("messages", {}).get(message_id, {})
+            reindex = "content" in message and message["content"] != previous.get(
+                "content"
+            )
+
         if message_id in history.get("messages", {}):
             history["messages"][message_id] = {
                 **history["messages"][message_id],
@@ -263,7 +465,7 @@ class ChatTable:
         history["currentId"] = message_id
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.update_chat_by_id(id, chat, reindex=reindex)
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
@@ -281,7 +483,7 @@ class ChatTable:
             history["messages"][message_id]["statusHistory"] = status_history
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.update_chat_by_id(id, chat, reindex=False)
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -404,7 +606,8 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatTitleIdResponse]:
 
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id, archived=True)
@@ -414,26 +617,14 @@ class ChatTable:
                 if query_key:
                     query = query.filter(Chat.title.ilike(f"%{query_key}%"))
 
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
+            query = self._apply_chat_list_order(query, filter, cursor)
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._get_chat_title_id_list(query)
 
     def get_chat_list_by_user_id(
         self,
@@ -442,7 +633,8 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
@@ -453,26 +645,14 @@ class ChatTable:
                 if query_key:
                     query = query.filter(Chat.title.ilike(f"%{query_key}%"))
 
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
+            query = self._apply_chat_list_order(query, filter, cursor)
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._get_chat_title_id_list(query)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -480,6 +660,7 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
@@ -488,29 +669,15 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
+            query = self._apply_chat_list_cursor(query, cursor)
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-
-            # result has to be destructured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+            return self._get_chat_title_id_list(query)
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
@@ -591,6 +758,39 @@ class ChatTable:
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
+    def _get_chat_search_ranks(
+        self, dialect_name: str, user_id: str, search_query: str
+    ):
+        """
+        Subquery of (chat_id, rank) for the chats of `user_id` matching
+        `search_query`, lower ranks being better. Titles weigh more than
+        message content.
+        """
+        if dialect_name == "sqlite":
+            sql = (
+                "SELECT chat_search.chat_id AS chat_id, "
+                "       bm25(chat_search_fts, 10.0, 1.0) AS rank "
+                "FROM chat_search_fts "
+                "JOIN chat_search ON chat_search.id = chat_search_fts.rowid "
+                "WHERE chat_search_fts MATCH :search_query "
+                "  AND chat_search.user_id = :search_user_id"
+            )
+        else:
+            sql = (
+                "SELECT chat_search.chat_id AS chat_id, "
+                "       -ts_rank(chat_search.tsv, query) AS rank "
+                "FROM chat_search, to_tsquery('simple', :search_query) AS query "
+                "WHERE chat_search.tsv @@ query "
+                "  AND chat_search.user_id = :search_user_id"
+            )
+
+        return (
+            text(sql)
+            .bindparams(search_query=search_query, search_user_id=user_id)
+            .columns(chat_id=String, rank=Float)
+            .subquery("chat_search_ranks")
+        )
+
     def get_chats_by_user_id_and_search_text(
         self,
         user_id: str,
@@ -598,9 +798,12 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats based on a search query, allowing pagination using skip and limit.
+
+        Words are prefix-matched against the full-text search index and results
+        ranked by relevance; without the index it falls back to substring search.
         """
         search_text = search_text.replace("\u0000", "").lower().strip()
 
@@ -681,25 +884,38 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc())
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
+            search_query = get_chat_search_query(search_text, dialect_name)
+            search_ranks = None
+            if search_query and has_chat_search_index(db):
+                search_ranks = self._get_chat_search_ranks(
+                    dialect_name, user_id, search_query
                 )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
+                query = query.join(search_ranks, search_ranks.c.chat_id == Chat.id)
+                query = query.order_by(
+                    search_ranks.c.rank, Chat.updated_at.desc(), Chat.id.desc()
                 )
+            else:
+                query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+            if dialect_name == "sqlite":
+                if search_ranks is None:
+                    # SQLite case: using JSON1 extension for JSON searching
+                    sqlite_content_sql = (
+                        "EXISTS ("
+                        "    SELECT 1 "
+                        "    FROM json_each(Chat.chat, '$.messages') AS message "
+                        "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
+                        ")"
+                    )
+                    sqlite_content_clause = text(sqlite_content_sql)
+                    query = query.filter(
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            sqlite_content_clause,
+                        ).params(title_key=f"%{search_text}%", content_key=search_text)
+                    )
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -732,21 +948,22 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                postgres_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_array_elements(Chat.chat->'messages') AS message "
-                    "    WHERE LOWER(message->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                postgres_content_clause = text(postgres_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
+                if search_ranks is None:
+                    # PostgreSQL relies on proper JSON query for search
+                    postgres_content_sql = (
+                        "EXISTS ("
+                        "    SELECT 1 "
+                        "    FROM json_array_elements(Chat.chat->'messages') AS message "
+                        "    WHERE LOWER(message->>'content') LIKE '%' || :content_key || '%'"
+                        ")"
+                    )
+                    postgres_content_clause = text(postgres_content_sql)
+                    query = query.filter(
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            postgres_content_clause,
+                        ).params(title_key=f"%{search_text}%", content_key=search_text)
+                    )
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -783,25 +1000,23 @@ class ChatTable:
                 )
 
             # Perform pagination at the SQL level
-            all_chats = query.offset(skip).limit(limit).all()
+            all_chats = self._get_chat_title_id_list(query.offset(skip).limit(limit))
 
             log.info(f"The number of chats: {len(all_chats)}")
 
-            # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return all_chats
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
             query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._get_chat_title_id_list(query)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -840,8 +1055,13 @@ class ChatTable:
             return [Tags.get_tag_by_name_and_user_id(tag, user_id) for tag in tags]
 
     def get_chat_list_by_user_id_and_tag_name(
-        self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        user_id: str,
+        tag_name: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
@@ -866,9 +1086,15 @@ class ChatTable:
                     f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
-            all_chats = query.all()
-            log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            query = self._apply_chat_list_cursor(query, cursor)
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+            if skip:
+                query = query.offset(skip)
+            if limit:
+                query = query.limit(limit)
+
+            return self._get_chat_title_id_list(query)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -966,6 +1192,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatSearch).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -976,6 +1203,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                db.query(ChatSearch).filter_by(chat_id=id, user_id=user_id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -988,6 +1216,7 @@ class ChatTable:
                 self.delete_shared_chats_by_user_id(user_id)
 
                 db.query(Chat).filter_by(user_id=user_id).delete()
+                db.query(ChatSearch).filter_by(user_id=user_id).delete()
                 db.commit()
 
                 return True
@@ -999,6 +1228,12 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = select(Chat.id).filter_by(
+                    user_id=user_id, folder_id=folder_id
+                )
+                db.query(ChatSearch).filter(ChatSearch.chat_id.in_(chat_ids)).delete(
+                    synchronize_session=False
+                )
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
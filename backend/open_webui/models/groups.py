@@ -326,6 +326,46 @@ class GroupTable:
                 log.exception(e)
                 return False
 
+    def sync_groups_by_user_assignments(self, assignments: dict[str, str]) -> bool:
+        """
+        Replace-mode sync for many users at once: each user in `assignments`
+        (user_id -> group_id) ends up in exactly that group. Every group is
+        read once and written at most once.
+        """
+        with get_db() as db:
+            try:
+                self.apply_user_assignments(db, assignments)
+                db.commit()
+                return True
+            except Exception as e:
+                log.exception(e)
+                return False
+
+    def apply_user_assignments(self, db, assignments: dict[str, str]) -> None:
+        """
+        Stage the changes of `sync_groups_by_user_assignments` on `db`, for
+        callers that commit them together with their own writes.
+        """
+        now = int(time.time())
+        for group in db.query(Group).all():
+            current = group.user_ids or []
+            user_ids = [
+                user_id
+                for user_id in current
+                if assignments.get(user_id, group.id) == group.id
+            ]
+            members = set(user_ids)
+            user_ids.extend(
+                user_id
+                for user_id, group_id in assignments.items()
+                if group_id == group.id and user_id not in members
+            )
+
+            if user_ids != current:
+                db.query(Group).filter_by(id=group.id).update(
+                    {"user_ids": user_ids, "updated_at": now}
+                )
+
     def add_users_to_group(
         self, id: str, user_ids: Optional[list[str]] = None
     ) -> Optional[GroupModel]:
@@ -142,6 +142,13 @@ class ToolsTable:
         except Exception:
             return None
 
+    def get_tools_by_ids(self, ids: list[str]) -> list[ToolModel]:
+        with get_db() as db:
+            return [
+                ToolModel.model_validate(tool)
+                for tool in db.query(Tool).filter(Tool.id.in_(ids)).all()
+            ]
+
     def get_tools(self) -> list[ToolUserModel]:
         with get_db() as db:
             tools = []
@@ -178,6 +185,15 @@ class ToolsTable:
             log.exception(f"Error getting tool valves by id {id}: {e}")
             return None
 
+    def get_tool_valves_by_ids(self, ids: list[str]) -> dict[str, dict]:
+        with get_db() as db:
+            return {
+                id: valves or {}
+                for id, valves in db.query(Tool.id, Tool.valves)
+                .filter(Tool.id.in_(ids))
+                .all()
+            }
+
     def update_tool_valves_by_id(self, id: str, valves: dict) -> Optional[ToolValves]:
         try:
             with get_db() as db:
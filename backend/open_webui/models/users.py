@@ -171,6 +171,16 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_users_by_emails(self, emails: list[str]) -> list[UserModel]:
+        users = []
+        with get_db() as db:
+            # Chunk the IN clause to stay below the bind parameter limits
+            for i in range(0, len(emails), 1000):
+                users.extend(
+                    db.query(User).filter(User.email.in_(emails[i : i + 1000])).all()
+                )
+            return [UserModel.model_validate(user) for user in users]
+
     def get_user_by_oauth_sub(self, sub: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
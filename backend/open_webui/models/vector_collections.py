@@ -0,0 +1,215 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Text, func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Vector Collection DB Schema
+####################
+
+
+class VectorCollection(Base):
+    __tablename__ = "vector_collection"
+
+    name = Column(Text, primary_key=True)
+    type = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=True)
+
+    # Approximate: kept up to date from the writes made through this app
+    item_count = Column(BigInteger, nullable=False, default=0)
+    size = Column(BigInteger, nullable=False, default=0)  # text + vector bytes
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+    last_accessed_at = Column(BigInteger)
+
+    __table_args__ = (
+        # Expired collection lookups, see `VectorCollectionsTable.get_expired_collections`
+        Index(
+            "vector_collection_type_last_accessed_at_idx", "type", "last_accessed_at"
+        ),
+    )
+
+
+class VectorCollectionModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    name: str
+    type: str
+    user_id: Optional[str] = None
+
+    item_count: int = 0
+    size: int = 0
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+    last_accessed_at: int  # timestamp in epoch
+
+
+class VectorCollectionFootprint(BaseModel):
+    type: str
+    collections: int
+    item_count: int
+    size: int
+
+
+####################
+# Collection types
+####################
+
+
+def get_collection_type(collection_name: str) -> str:
+    if collection_name.startswith("web-search-"):
+        return "web_search"
+    if collection_name.startswith("file-"):
+        return "file"
+    if collection_name.startswith("user-memory-"):
+        return "memory"
+    # Knowledge bases are named by their uuid
+    if len(collection_name) == 36 and collection_name.count("-") == 4:
+        return "knowledge"
+    return "other"
+
+
+class VectorCollectionsTable:
+    def _create(self, db, name: str, now: int) -> VectorCollection:
+        collection = VectorCollection(
+            name=name,
+            type=get_collection_type(name),
+            item_count=0,
+            size=0,
+            created_at=now,
+            updated_at=now,
+            last_accessed_at=now,
+        )
+        db.add(collection)
+        return collection
+
+    def _get_or_create(self, db, name: str, now: int) -> VectorCollection:
+        collection = db.get(VectorCollection, name)
+        if collection is None:
+            collection = self._create(db, name, now)
+        return collection
+
+    def register_collections(self, names: list[str]) -> int:
+        """
+        Adds the collections that aren't registered yet, as just accessed.
+        Returns the number added.
+        """
+        now = int(time.time())
+        with get_db() as db:
+            registered = {
+                name
+                for (name,) in db.query(VectorCollection.name).filter(
+                    VectorCollection.name.in_(names)
+                )
+            }
+            names = [name for name in dict.fromkeys(names) if name not in registered]
+            for name in names:
+                self._create(db, name, now)
+            db.commit()
+            return len(names)
+
+    def has_collections(self, type: str) -> bool:
+        with get_db() as db:
+            return (
+                db.query(VectorCollection.name)
+                .filter(VectorCollection.type == type)
+                .first()
+                is not None
+            )
+
+    def set_collection_owner(self, name: str, user_id: str) -> None:
+        with get_db() as db:
+            collection = self._get_or_create(db, name, int(time.time()))
+            collection.user_id = user_id
+            db.commit()
+
+    def add_items(self, name: str, item_count: int, size: int) -> None:
+        now = int(time.time())
+        with get_db() as db:
+            collection = self._get_or_create(db, name, now)
+            collection.item_count = (collection.item_count or 0) + item_count
+            collection.size = (collection.size or 0) + size
+            collection.updated_at = now
+            db.commit()
+
+    def remove_items(self, name: str, item_count: int) -> None:
+        with get_db() as db:
+            collection = db.get(VectorCollection, name)
+            if collection is None or not collection.item_count:
+                return
+            item_count = min(item_count, collection.item_count)
+            # Sizes of single items aren't tracked, assume average ones
+            collection.size -= collection.size * item_count // collection.item_count
+            collection.item_count -= item_count
+            collection.updated_at = int(time.time())
+            db.commit()
+
+    def touch_collections(self, names: list[str]) -> None:
+        if not names:
+            return
+        with get_db() as db:
+            db.query(VectorCollection).filter(VectorCollection.name.in_(names)).update(
+                {"last_accessed_at": int(time.time())}, synchronize_session=False
+            )
+            db.commit()
+
+    def get_expired_collections(
+        self, type: str, last_accessed_before: int, limit: int
+    ) -> list[VectorCollectionModel]:
+        with get_db() as db:
+            return [
+                VectorCollectionModel.model_validate(collection)
+                for collection in db.query(VectorCollection)
+                .filter(
+                    VectorCollection.type == type,
+                    VectorCollection.last_accessed_at < last_accessed_before,
+                )
+                .order_by(VectorCollection.last_accessed_at)
+                .limit(limit)
+                .all()
+            ]
+
+    def get_footprint(self) -> list[VectorCollectionFootprint]:
+        with get_db() as db:
+            rows = (
+                db.query(
+                    VectorCollection.type,
+                    func.count(VectorCollection.name),
+                    func.coalesce(func.sum(VectorCollection.item_count), 0),
+                    func.coalesce(func.sum(VectorCollection.size), 0),
+                )
+                .group_by(VectorCollection.type)
+                .order_by(VectorCollection.type)
+                .all()
+            )
+            return [
+                VectorCollectionFootprint(
+                    type=type,
+                    collections=collections,
+                    item_count=item_count,
+                    size=size,
+                )
+                for type, collections, item_count, size in rows
+            ]
+
+    def delete_collection_by_name(self, name: str) -> None:
+        with get_db() as db:
+            db.query(VectorCollection).filter(VectorCollection.name == name).delete()
+            db.commit()
+
+    def delete_all_collections(self) -> None:
+        with get_db() as db:
+            db.query(VectorCollection).delete()
+            db.commit()
+
+
+VectorCollections = VectorCollectionsTable()
@@ -0,0 +1,148 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    RAG_RETRIEVAL_CACHE_SIZE,
+    RAG_RETRIEVAL_CACHE_TTL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
+from open_webui.utils.cache import LRUCache
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# collection name -> version, bumped on every write or delete. Cache keys
+# embed the versions of the collections they searched, so a mutation makes
+# older entries unreachable and they age out of the LRU. With Redis the
+# versions are kept in a hash shared by all workers instead.
+_collection_versions: dict[str, int] = {}
+# Bumped by reset(), which drops every collection at once
+_global_version = 0
+_versions_lock = threading.Lock()
+
+REDIS_VERSIONS_KEY = f"{REDIS_KEY_PREFIX}:retrieval:versions"
+# No collection is named "", so that field holds the global version
+REDIS_GLOBAL_VERSION_FIELD = ""
+_redis = None
+
+_retrieval_cache = LRUCache(
+    maxsize=RAG_RETRIEVAL_CACHE_SIZE, ttl=RAG_RETRIEVAL_CACHE_TTL
+)
+
+
+def _get_redis():
+    global _redis
+    if REDIS_URL and _redis is None:
+        _redis = get_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    return _redis
+
+
+def _get_versions(collection_names: list[str]) -> Optional[tuple[list[int], int]]:
+    """(versions of `collection_names`, global version), None if unavailable."""
+    redis = _get_redis()
+    if redis is None:
+        with _versions_lock:
+            return [
+                _collection_versions.get(name, 0) for name in collection_names
+            ], _global_version
+
+    try:
+        values = redis.hmget(
+            REDIS_VERSIONS_KEY, [REDIS_GLOBAL_VERSION_FIELD, *collection_names]
+        )
+    except Exception as e:
+        log.warning(f"Failed to read retrieval cache versions: {e}")
+        return None
+    versions = [int(value or 0) for value in values]
+    return versions[1:], versions[0]
+
+
+def bump_collection_version(collection_name: Optional[str] = None) -> None:
+    """Invalidate cached results of one collection, or of all of them when None."""
+    global _global_version
+    redis = _get_redis()
+    if redis is not None:
+        field = (
+            REDIS_GLOBAL_VERSION_FIELD if collection_name is None else collection_name
+        )
+        try:
+            redis.hincrby(REDIS_VERSIONS_KEY, field, 1)
+        except Exception as e:
+            # The other workers serve stale results until the TTL expires
+            log.error(f"Failed to bump retrieval cache version: {e}")
+            _retrieval_cache.clear()
+        return
+
+    with _versions_lock:
+        if collection_name is None:
+            _global_version += 1
+        else:
+            _collection_versions[collection_name] = (
+                _collection_versions.get(collection_name, 0) + 1
+            )
+
+
+def get_retrieval_cache_key(
+    collection_names: list[str], queries: list[str], **params: Any
+) -> Optional[str]:
+    """
+    Hash of the searched collections (with their current versions), the
+    queries and every parameter that changes the result: k, reranker and
+    hybrid settings and the embedding/reranking models. None when the
+    versions can't be read, which bypasses the cache.
+    """
+    collection_names = sorted(set(collection_names))
+    collection_versions = _get_versions(collection_names)
+    if collection_versions is None:
+        return None
+    versions, global_version = collection_versions
+
+    payload = json.dumps(
+        {
+            "collections": collection_names,
+            "versions": versions,
+            "global_version": global_version,
+            "queries": list(queries),
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_retrieval_result(key: Optional[str]) -> Optional[dict]:
+    if key is None:
+        return None
+    result = _retrieval_cache.get(key)
+    if result is None:
+        return None
+    log.debug(f"retrieval cache hit: {key}")
+    # Callers attach file info and trim results in place
+    return copy.deepcopy(result)
+
+
+def set_cached_retrieval_result(key: Optional[str], result: Optional[dict]) -> None:
+    if key is None or not result:
+        return
+    _retrieval_cache.set(key, copy.deepcopy(result))
+
+
+def clear_retrieval_cache() -> None:
+    _retrieval_cache.clear()
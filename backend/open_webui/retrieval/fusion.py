@@ -0,0 +1,86 @@
+from typing import Any, Optional
+
+import numpy as np
+
+# Constant of reciprocal-rank fusion: score = sum(1 / (RRF_K + rank))
+RRF_K = 60
+
+
+def _flatten_query_results(query_results: list[dict]):
+    """
+    Flatten search results into parallel arrays. Chunks are identified by
+    their id when the result carries ids, by their text otherwise.
+    """
+    key_codes: dict[Any, int] = {}
+    codes, ranks, distances, documents, metadatas = [], [], [], [], []
+
+    for data in query_results:
+        ids = (data.get("ids") or [None])[0]
+
+        for rank, (distance, document, metadata) in enumerate(
+            zip(data["distances"][0], data["documents"][0], data["metadatas"][0])
+        ):
+            if not isinstance(document, str):
+                continue
+
+            chunk_id = ids[rank] if ids and rank < len(ids) else None
+            key = ("id", chunk_id) if chunk_id is not None else ("text", document)
+
+            codes.append(key_codes.setdefault(key, len(key_codes)))
+            ranks.append(rank)
+            distances.append(distance if distance is not None else -np.inf)
+            documents.append(document)
+            metadatas.append(metadata)
+
+    return (
+        np.asarray(codes, dtype=np.int64),
+        np.asarray(ranks, dtype=np.float64),
+        np.asarray(distances, dtype=np.float64),
+        documents,
+        metadatas,
+    )
+
+
+def fuse_query_results(
+    query_results: list[dict],
+    k: int,
+    method: str = "score",
+    rrf_k: Optional[int] = None,
+) -> dict:
+    """
+    Merge search results of several queries and collections into the top k
+    unique chunks.
+
+    method="score" ranks chunks by their best score. method="rrf" ranks them
+    by reciprocal-rank fusion over every result list they appear in, which
+    does not depend on scores being comparable across collections and
+    queries. Either way each chunk keeps the entry with its best score.
+    """
+    codes, ranks, distances, documents, metadatas = _flatten_query_results(
+        query_results
+    )
+    if len(codes) == 0:
+        return {"distances": [[]], "documents": [[]], "metadatas": [[]]}
+
+    # Best entry per chunk: first occurrence of each code in score order.
+    # np.unique sorts by code, so best[code] is the entry of that chunk.
+    order = np.argsort(-distances, kind="stable")
+    _, first = np.unique(codes[order], return_index=True)
+    best = order[first]
+
+    if method == "rrf":
+        fused = np.zeros(len(best), dtype=np.float64)
+        np.add.at(fused, codes, 1.0 / ((rrf_k or RRF_K) + ranks + 1.0))
+        # lexsort uses the last key as the primary one
+        top = np.lexsort((-distances[best], -fused))[:k]
+    else:
+        top = np.argsort(-distances[best], kind="stable")[:k]
+
+    selected = best[top]
+    return {
+        "distances": [
+            [float(d) if np.isfinite(d) else None for d in distances[selected]]
+        ],
+        "documents": [[documents[i] for i in selected]],
+        "metadatas": [[metadatas[i] for i in selected]],
+    }
@@ -3,8 +3,9 @@ import os
 from typing import Optional, Union
 
 import requests
-import hashlib
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 
 from urllib.parse import quote
@@ -15,6 +16,7 @@ from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.lifecycle import touch_ephemeral_collections
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
@@ -22,6 +24,13 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.fusion import fuse_query_results
+from open_webui.retrieval.cache import (
+    get_retrieval_cache_key,
+    get_cached_retrieval_result,
+    set_cached_retrieval_result,
+)
 from open_webui.utils.access_control import has_access
 
 
@@ -29,8 +38,11 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    RAG_RETRIEVAL_MAX_CONCURRENCY,
+    RAG_RESULT_FUSION,
 )
 from open_webui.config import (
+    MILVUS_METRIC_TYPE,
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
@@ -45,6 +57,22 @@ from typing import Any
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.retrievers import BaseRetriever
 
+# Vector DBs whose search scores are (1 + cosine similarity) / 2. Milvus
+# only when its configured metric is cosine, see has_cosine_vector_scores()
+NORMALIZED_COSINE_VECTOR_DBS = {
+    VectorType.CHROMA,
+    VectorType.PGVECTOR,
+    VectorType.QDRANT,
+}
+
+VECTOR_SCORE_KEY = "_vector_score"
+
+
+def has_cosine_vector_scores() -> bool:
+    if VECTOR_DB == VectorType.MILVUS:
+        return MILVUS_METRIC_TYPE.upper() == "COSINE"
+    return VECTOR_DB in NORMALIZED_COSINE_VECTOR_DBS
+
 
 class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
@@ -66,12 +94,18 @@ class VectorSearchRetriever(BaseRetriever):
         ids = result.ids[0]
         metadatas = result.metadatas[0]
         documents = result.documents[0]
+        distances = result.distances[0] if result.distances else [None] * len(ids)
 
         results = []
         for idx in range(len(ids)):
             results.append(
                 Document(
-                    metadata=metadatas[idx],
+                    id=ids[idx],
+                    # Handed to RerankCompressor so it doesn't re-embed the chunk
+                    metadata={
+                        **(metadatas[idx] or {}),
+                        VECTOR_SCORE_KEY: distances[idx],
+                    },
                     page_content=documents[idx],
                 )
             )
@@ -128,6 +162,7 @@ def query_doc_with_hybrid_search(
         bm25_retriever = BM25Retriever.from_texts(
             texts=collection_result.documents[0],
             metadatas=collection_result.metadatas[0],
+            ids=collection_result.ids[0],
         )
         bm25_retriever.k = k
 
@@ -146,9 +181,11 @@ def query_doc_with_hybrid_search(
                 retrievers=[bm25_retriever], weights=[1.0]
             )
         else:
+            # The vector retriever goes first so chunks found by both keep
+            # their vector score
             ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
+                retrievers=[vector_search_retriever, bm25_retriever],
+                weights=[1.0 - hybrid_bm25_weight, hybrid_bm25_weight],
             )
 
         compressor = RerankCompressor(
@@ -164,6 +201,7 @@ def query_doc_with_hybrid_search(
 
         result = compression_retriever.invoke(query)
 
+        ids = [d.id for d in result]
         distances = [d.metadata.get("score") for d in result]
         documents = [d.page_content for d in result]
         metadatas = [d.metadata for d in result]
@@ -171,12 +209,15 @@ def query_doc_with_hybrid_search(
         # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
         if k < k_reranker:
             sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
+                zip(distances, ids, metadatas, documents),
+                key=lambda x: x[0],
+                reverse=True,
             )
             sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
+            distances, ids, metadatas, documents = map(list, zip(*sorted_items))
 
         result = {
+            "ids": [ids],
             "distances": [distances],
             "documents": [documents],
             "metadatas": [metadatas],
@@ -214,43 +255,7 @@ def merge_get_results(get_results: list[dict]) -> dict:
 
 
 def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
-    # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
-
-    for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
-            if isinstance(document, str):
-                doc_hash = hashlib.sha256(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
-
-    combined = list(combined.values())
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=True)
-
-    # Slice to keep only the top k elements
-    sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
-    )
-
-    # Create and return the output dictionary
-    return {
-        "distances": [list(sorted_distances)],
-        "documents": [list(sorted_documents)],
-        "metadatas": [list(sorted_metadatas)],
-    }
+    return fuse_query_results(query_results, k=k, method=RAG_RESULT_FUSION)
 
 
 def get_all_items_from_collections(collection_names: list[str]) -> dict:
@@ -456,6 +461,63 @@ def get_reranking_function(reranking_engine, reranking_model, reranking_function
         return lambda sentences, user=None: reranking_function.predict(sentences)
 
 
+def get_retrieval_model_params(request) -> dict:
+    config = request.app.state.config
+    return {
+        "embedding_engine": config.RAG_EMBEDDING_ENGINE,
+        "embedding_model": config.RAG_EMBEDDING_MODEL,
+        "reranking_engine": config.RAG_RERANKING_ENGINE,
+        "reranking_model": config.RAG_RERANKING_MODEL,
+    }
+
+
+def get_query_embedding_function(embedding_function, queries: list[str]):
+    """
+    Wrap `embedding_function` so the turn's queries are embedded once, in a
+    single batch, the first time any collection search needs them. Every
+    other call is passed through.
+    """
+    lock = threading.Lock()
+    query_embeddings = {}
+
+    def _embed(query, prefix=None):
+        texts = query if isinstance(query, list) else [query]
+        if prefix != RAG_EMBEDDING_QUERY_PREFIX or not set(texts) <= set(queries):
+            return embedding_function(query, prefix=prefix)
+
+        with lock:
+            if not query_embeddings:
+                query_embeddings.update(
+                    zip(queries, embedding_function(queries, prefix=prefix))
+                )
+
+        embeddings = [query_embeddings[text] for text in texts]
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return _embed
+
+
+def get_full_context_query_result(file_ids: list[str], files: dict) -> dict:
+    documents = []
+    metadatas = []
+    for file_id in file_ids:
+        file_object = files.get(file_id)
+        if file_object:
+            documents.append(file_object.data.get("content", ""))
+            metadatas.append(
+                {
+                    "file_id": file_id,
+                    "name": file_object.filename,
+                    "source": file_object.filename,
+                }
+            )
+
+    return {
+        "documents": [documents],
+        "metadatas": [metadatas],
+    }
+
+
 def get_sources_from_items(
     request,
     items,
@@ -475,9 +537,14 @@ def get_sources_from_items(
     )
 
     extracted_collections = []
-    query_results = []
+    query_results = [None] * len(items)
+
+    # Files to load in full, fetched in one query once all items are resolved
+    full_context_file_ids = {}  # item index -> file ids
+    # Collections to search, fanned out once all items are resolved
+    search_collection_names = {}  # item index -> collection names
 
-    for item in items:
+    for idx, item in enumerate(items):
         query_result = None
         collection_names = []
 
@@ -544,20 +611,7 @@ def get_sources_from_items(
                         ],
                     }
                 elif item.get("id"):
-                    file_object = Files.get_file_by_id(item.get("id"))
-                    if file_object:
-                        query_result = {
-                            "documents": [[file_object.data.get("content", "")]],
-                            "metadatas": [
-                                [
-                                    {
-                                        "file_id": item.get("id"),
-                                        "name": file_object.filename,
-                                        "source": file_object.filename,
-                                    }
-                                ]
-                            ],
-                        }
+                    full_context_file_ids[idx] = [item.get("id")]
             else:
                 # Fallback to collection names
                 if item.get("legacy"):
@@ -577,28 +631,7 @@ def get_sources_from_items(
                     user.role == "admin"
                     or has_access(user.id, "read", knowledge_base.access_control)
                 ):
-
-                    file_ids = knowledge_base.data.get("file_ids", [])
-
-                    documents = []
-                    metadatas = []
-                    for file_id in file_ids:
-                        file_object = Files.get_file_by_id(file_id)
-
-                        if file_object:
-                            documents.append(file_object.data.get("content", ""))
-                            metadatas.append(
-                                {
-                                    "file_id": file_id,
-                                    "name": file_object.filename,
-                                    "source": file_object.filename,
-                                }
-                            )
-
-                    query_result = {
-                        "documents": [documents],
-                        "metadatas": [metadatas],
-                    }
+                    full_context_file_ids[idx] = knowledge_base.data.get("file_ids", [])
             else:
                 # Fallback to collection names
                 if item.get("legacy"):
@@ -627,53 +660,104 @@ def get_sources_from_items(
                 log.debug(f"skipping {item} as it has already been extracted")
                 continue
 
+            search_collection_names[idx] = collection_names
+            extracted_collections.extend(collection_names)
+
+        query_results[idx] = query_result
+
+    if full_context_file_ids:
+        file_ids = list(
+            {file_id for ids in full_context_file_ids.values() for file_id in ids}
+        )
+        files = {file.id: file for file in Files.get_files_by_ids(file_ids)}
+
+        for idx, ids in full_context_file_ids.items():
+            query_result = get_full_context_query_result(ids, files)
+            if query_result["documents"][0]:
+                query_results[idx] = query_result
+
+    if search_collection_names:
+        touch_ephemeral_collections(
+            {name for names in search_collection_names.values() for name in names}
+        )
+        query_embedding_function = get_query_embedding_function(
+            embedding_function, queries
+        )
+        model_params = get_retrieval_model_params(request)
+
+        def search_collections(collection_names):
             try:
                 if full_context:
-                    query_result = get_all_items_from_collections(collection_names)
-                else:
-                    query_result = None  # Initialize to None
-                    if hybrid_search:
-                        try:
-                            query_result = query_collection_with_hybrid_search(
-                                collection_names=collection_names,
-                                queries=queries,
-                                embedding_function=embedding_function,
-                                k=k,
-                                reranking_function=reranking_function,
-                                k_reranker=k_reranker,
-                                r=r,
-                                hybrid_bm25_weight=hybrid_bm25_weight,
-                            )
-                        except Exception as e:
-                            log.debug(
-                                "Error when using hybrid search, using non hybrid search as fallback."
-                            )
-
-                    # fallback to non-hybrid search
-                    if not hybrid_search and query_result is None:
-                        query_result = query_collection(
+                    return get_all_items_from_collections(collection_names)
+
+                cache_key = get_retrieval_cache_key(
+                    list(collection_names),
+                    queries,
+                    k=k,
+                    hybrid_search=hybrid_search,
+                    k_reranker=k_reranker,
+                    r=r,
+                    hybrid_bm25_weight=hybrid_bm25_weight,
+                    reranking=reranking_function is not None,
+                    **model_params,
+                )
+                query_result = get_cached_retrieval_result(cache_key)
+
+                if query_result is None and hybrid_search:
+                    try:
+                        query_result = query_collection_with_hybrid_search(
                             collection_names=collection_names,
                             queries=queries,
-                            embedding_function=embedding_function,
+                            embedding_function=query_embedding_function,
                             k=k,
+                            reranking_function=reranking_function,
+                            k_reranker=k_reranker,
+                            r=r,
+                            hybrid_bm25_weight=hybrid_bm25_weight,
+                        )
+                    except Exception as e:
+                        log.debug(
+                            "Error when using hybrid search, using non hybrid search as fallback."
                         )
+
+                # fallback to non-hybrid search
+                if not hybrid_search and query_result is None:
+                    query_result = query_collection(
+                        collection_names=collection_names,
+                        queries=queries,
+                        embedding_function=query_embedding_function,
+                        k=k,
+                    )
+
+                set_cached_retrieval_result(cache_key, query_result)
+                return query_result
             except Exception as e:
                 log.exception(e)
+                return None
+
+        with ThreadPoolExecutor(
+            max_workers=min(RAG_RETRIEVAL_MAX_CONCURRENCY, len(search_collection_names))
+        ) as executor:
+            futures = {
+                idx: executor.submit(search_collections, collection_names)
+                for idx, collection_names in search_collection_names.items()
+            }
+            for idx, future in futures.items():
+                query_results[idx] = future.result()
 
-            extracted_collections.extend(collection_names)
+    sources = []
+    for item, query_result in zip(items, query_results):
+        if not query_result:
+            continue
 
-        if query_result:
-            if "data" in item:
-                del item["data"]
-            query_results.append({**query_result, "file": item})
+        if "data" in item:
+            del item["data"]
 
-    sources = []
-    for query_result in query_results:
         try:
             if "documents" in query_result:
                 if "metadatas" in query_result:
                     source = {
-                        "source": query_result["file"],
+                        "source": item,
                         "document": query_result["documents"][0],
                         "metadata": query_result["metadatas"][0],
                     }
@@ -951,13 +1035,7 @@ class RerankCompressor(BaseDocumentCompressor):
                 [(query, doc.page_content) for doc in documents]
             )
         else:
-            from sentence_transformers import util
-
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+            scores = self._get_similarity_scores(documents, query)
 
         docs_with_scores = list(
             zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
@@ -970,11 +1048,56 @@ class RerankCompressor(BaseDocumentCompressor):
         result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
         final_results = []
         for doc, doc_score in result[: self.top_n]:
-            metadata = doc.metadata
+            # Copy, the metadata of BM25 hits is shared across queries
+            metadata = {
+                key: value
+                for key, value in doc.metadata.items()
+                if key != VECTOR_SCORE_KEY
+            }
             metadata["score"] = doc_score
             doc = Document(
+                id=doc.id,
                 page_content=doc.page_content,
                 metadata=metadata,
             )
             final_results.append(doc)
         return final_results
+
+    def _get_similarity_scores(
+        self, documents: Sequence[Document], query: str
+    ) -> np.ndarray:
+        """
+        Cosine similarity of each document to the query. Chunks that came out
+        of the vector search already carry it as their search score; only the
+        remaining ones (keyword-only hits) are embedded.
+        """
+        scores = np.zeros(len(documents), dtype=np.float64)
+        missing = []
+        cosine_vector_scores = has_cosine_vector_scores()
+        for idx, doc in enumerate(documents):
+            vector_score = doc.metadata.get(VECTOR_SCORE_KEY)
+            if vector_score is not None and cosine_vector_scores:
+                scores[idx] = 2.0 * vector_score - 1.0
+            else:
+                missing.append(idx)
+
+        if missing:
+            query_embedding = np.asarray(
+                self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX),
+                dtype=np.float64,
+            )
+            document_embeddings = np.asarray(
+                self.embedding_function(
+                    [documents[idx].page_content for idx in missing],
+                    RAG_EMBEDDING_CONTENT_PREFIX,
+                ),
+                dtype=np.float64,
+            )
+            norms = np.linalg.norm(document_embeddings, axis=1) * np.linalg.norm(
+                query_embedding
+            )
+            scores[missing] = (document_embeddings @ query_embedding) / np.maximum(
+                norms, 1e-12
+            )
+
+        return scores
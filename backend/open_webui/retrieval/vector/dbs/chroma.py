@@ -66,6 +66,9 @@ class ChromaClient(VectorDBBase):
         collection_names = self.client.list_collections()
         return collection_name in collection_names
 
+    def list_collections(self) -> list[str]:
+        return list(self.client.list_collections())
+
     def delete_collection(self, collection_name: str):
         # Delete the collection based on the collection name.
         return self.client.delete_collection(name=collection_name)
@@ -261,6 +261,13 @@ class OpenSearchClient(VectorDBBase):
             )
         self.client.indices.refresh(self._get_index_name(collection_name))
 
+    def list_collections(self) -> list[str]:
+        prefix = f"{self.index_prefix}_"
+        return [
+            index.removeprefix(prefix)
+            for index in self.client.indices.get(index=f"{prefix}*")
+        ]
+
     def reset(self):
         indices = self.client.indices.get(index=f"{self.index_prefix}_*")
         for index in indices:
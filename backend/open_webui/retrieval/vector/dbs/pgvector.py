@@ -1,6 +1,14 @@
 from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
 import logging
 import json
+import queue
+import struct
+import threading
+
+import numpy as np
 from sqlalchemy import (
     func,
     literal,
@@ -43,6 +51,15 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_PARTIAL_INDEX_THRESHOLD,
+    PGVECTOR_INSERT_BATCH_SIZE,
+    PGVECTOR_INSERT_PARALLELISM,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -53,6 +70,10 @@ Base = declarative_base()
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Binary COPY signature, flags and header extension length / end of data marker
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
 
 def pgcrypto_encrypt(val, key):
     return func.pgp_sym_encrypt(val, literal(key))
@@ -62,6 +83,48 @@ def pgcrypto_decrypt(col, key, outtype="text"):
     return func.cast(func.pgp_sym_decrypt(col, literal(key)), outtype)
 
 
+def get_vector_index_using() -> Optional[str]:
+    """`USING` clause of the vector indexes for the configured index method."""
+    if PGVECTOR_INDEX_METHOD == "hnsw":
+        return (
+            "hnsw (vector vector_cosine_ops) "
+            f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION})"
+        )
+    elif PGVECTOR_INDEX_METHOD == "ivfflat":
+        return f"ivfflat (vector vector_cosine_ops) WITH (lists = {PGVECTOR_IVFFLAT_LISTS})"
+    return None
+
+
+def is_vector_index_current(indexdef: str) -> bool:
+    """Whether an index definition from pg_indexes matches the configuration."""
+    if PGVECTOR_INDEX_METHOD == "hnsw":
+        options = (
+            f"m='{PGVECTOR_HNSW_M}', "
+            f"ef_construction='{PGVECTOR_HNSW_EF_CONSTRUCTION}'"
+        )
+    elif PGVECTOR_INDEX_METHOD == "ivfflat":
+        options = f"lists='{PGVECTOR_IVFFLAT_LISTS}'"
+    else:
+        return False
+    return f"USING {PGVECTOR_INDEX_METHOD} " in indexdef and options in indexdef
+
+
+def get_collection_index_name(collection_name: str) -> str:
+    return f"idx_document_chunk_vector_{hashlib.md5(collection_name.encode()).hexdigest()[:16]}"
+
+
+def get_collection_index_sql(collection_name: str) -> Optional[str]:
+    """Partial vector index of one collection, None if indexes are disabled."""
+    using = get_vector_index_using()
+    if using is None:
+        return None
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {get_collection_index_name(collection_name)} "
+        f"ON document_chunk USING {using} "
+        f"WHERE collection_name = '{collection_name.replace(chr(39), chr(39) * 2)}'"
+    )
+
+
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
 
@@ -109,6 +172,12 @@ class PgvectorClient(VectorDBBase):
             )
             self.session = scoped_session(SessionLocal)
 
+        # Partial collection indexes are built by a background thread
+        self._index_queue: "queue.Queue[str]" = queue.Queue()
+        self._index_pending: set[str] = set()
+        self._index_lock = threading.Lock()
+        self._index_thread: Optional[threading.Thread] = None
+
         try:
             # Ensure the pgvector extension is available
             self.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
@@ -132,12 +201,7 @@ class PgvectorClient(VectorDBBase):
             Base.metadata.create_all(bind=connection)
 
             # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
-            )
+            self.ensure_vector_index()
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -151,6 +215,160 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during initialization: {e}")
             raise
 
+    def ensure_vector_index(self) -> None:
+        """
+        Create the vector index if there is none. An existing index is never
+        rebuilt here, every worker runs this on startup; a mismatch with the
+        configured method is only logged.
+        """
+        indexdef = self.session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE indexname = 'idx_document_chunk_vector'"
+            )
+        ).scalar()
+
+        if indexdef is None:
+            using = get_vector_index_using()
+            if using is not None:
+                self.session.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
+                        f"ON document_chunk USING {using};"
+                    )
+                )
+        elif not is_vector_index_current(indexdef):
+            log.warning(
+                f"Vector index doesn't match PGVECTOR_INDEX_METHOD={PGVECTOR_INDEX_METHOD}: "
+                f"{indexdef}. Run `python -m open_webui.scripts.pgvector_indexes` to rebuild it."
+            )
+
+    def rebuild_vector_index(self) -> None:
+        """
+        Replace the vector index with one of the configured method and
+        parameters. The new index is built concurrently and swapped in, so
+        searches and writes continue meanwhile.
+        """
+        using = get_vector_index_using()
+        engine = self.session.get_bind()
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            indexdef = connection.execute(
+                text(
+                    "SELECT indexdef FROM pg_indexes "
+                    "WHERE indexname = 'idx_document_chunk_vector'"
+                )
+            ).scalar()
+            if indexdef is not None and is_vector_index_current(indexdef):
+                log.info("Vector index is up to date.")
+                return
+
+            if using is None:
+                log.info("Dropping vector index.")
+                connection.execute(
+                    text("DROP INDEX CONCURRENTLY IF EXISTS idx_document_chunk_vector")
+                )
+                return
+
+            log.info(f"Building vector index using {using}")
+            # Left over by an interrupted rebuild, possibly invalid
+            connection.execute(
+                text("DROP INDEX CONCURRENTLY IF EXISTS document_chunk_vector_rebuild")
+            )
+            connection.execute(
+                text(
+                    "CREATE INDEX CONCURRENTLY document_chunk_vector_rebuild "
+                    f"ON document_chunk USING {using}"
+                )
+            )
+
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX IF EXISTS idx_document_chunk_vector"))
+            connection.execute(
+                text(
+                    "ALTER INDEX document_chunk_vector_rebuild "
+                    "RENAME TO idx_document_chunk_vector"
+                )
+            )
+
+    def schedule_collection_index(self, collection_name: str) -> None:
+        """Check whether a collection needs its own index, in the background."""
+        if get_vector_index_using() is None or PGVECTOR_PARTIAL_INDEX_THRESHOLD <= 0:
+            return
+
+        with self._index_lock:
+            if collection_name in self._index_pending:
+                return
+            self._index_pending.add(collection_name)
+            if self._index_thread is None:
+                self._index_thread = threading.Thread(
+                    target=self._run_index_worker, name="pgvector-index", daemon=True
+                )
+                self._index_thread.start()
+        self._index_queue.put(collection_name)
+
+    def _run_index_worker(self) -> None:
+        while True:
+            collection_name = self._index_queue.get()
+            with self._index_lock:
+                self._index_pending.discard(collection_name)
+            self.update_collection_index(collection_name)
+
+    def update_collection_index(self, collection_name: str) -> None:
+        """
+        Give collections with at least PGVECTOR_PARTIAL_INDEX_THRESHOLD chunks
+        their own partial vector index. A global ANN index filtered down to one
+        collection loses recall, while exact search gets slow on large ones.
+        """
+        sql = get_collection_index_sql(collection_name)
+        if sql is None or PGVECTOR_PARTIAL_INDEX_THRESHOLD <= 0:
+            return
+
+        index_name = get_collection_index_name(collection_name)
+        try:
+            # Build without locking out writes to the other collections
+            with (
+                self.session.get_bind()
+                .connect()
+                .execution_options(isolation_level="AUTOCOMMIT") as connection
+            ):
+                exists = connection.execute(
+                    text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+                    {"name": index_name},
+                ).scalar()
+                if exists:
+                    return
+
+                count = connection.execute(
+                    select(func.count())
+                    .select_from(DocumentChunk)
+                    .where(DocumentChunk.collection_name == collection_name)
+                ).scalar()
+                if count >= PGVECTOR_PARTIAL_INDEX_THRESHOLD:
+                    log.info(
+                        f"Creating vector index {index_name} for collection '{collection_name}'."
+                    )
+                    connection.execute(text(sql))
+        except Exception as e:
+            log.exception(f"Error creating index for '{collection_name}': {e}")
+
+    def drop_collection_indexes(self, collection_name: Optional[str] = None) -> None:
+        """Drop the partial vector index of a collection, or all of them."""
+        if collection_name is not None:
+            index_names = [get_collection_index_name(collection_name)]
+        else:
+            index_names = self.session.execute(
+                text(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE indexname LIKE 'idx\\_document\\_chunk\\_vector\\_%'"
+                )
+            ).scalars()
+
+        for index_name in index_names:
+            self.session.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        self.session.commit()
+
     def check_vector_length(self) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
@@ -197,128 +415,130 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
-    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+    def _get_copy_data(self, collection_name: str, items: List[VectorItem]) -> bytes:
+        """
+        Encode `items` in PostgreSQL's binary COPY format, which spares the
+        costly float to text conversion of the vectors.
+        """
+        # Keyed by id: a single INSERT .. ON CONFLICT DO UPDATE can't touch a row twice
+        rows = {}
+        for item in items:
+            vector = np.asarray(self.adjust_vector_length(item["vector"]), dtype=">f4")
+            fields = [
+                item["id"].encode(),
+                struct.pack("!hh", len(vector), 0) + vector.tobytes(),
+                collection_name.encode(),
+                item["text"].encode() if item["text"] is not None else None,
+                json.dumps(stringify_metadata(item["metadata"])).encode(),
+            ]
+            rows[item["id"]] = struct.pack("!h", len(fields)) + b"".join(
+                (
+                    struct.pack("!i", -1)
+                    if field is None
+                    else struct.pack("!i", len(field)) + field
+                )
+                for field in fields
+            )
+
+        return COPY_HEADER + b"".join(rows.values()) + COPY_TRAILER
+
+    def _copy_insert(self, connection, data: bytes, upsert: bool = False) -> None:
+        """COPY `data` into a staging table and move it into document_chunk."""
+        if PGVECTOR_PGCRYPTO:
+            text_value = "pgp_sym_encrypt(text, %(key)s)"
+            vmetadata_value = "pgp_sym_encrypt(vmetadata, %(key)s)"
+        else:
+            text_value = "text"
+            vmetadata_value = "vmetadata::jsonb"
+
+        if upsert:
+            on_conflict = (
+                "DO UPDATE SET vector = EXCLUDED.vector, "
+                "collection_name = EXCLUDED.collection_name, "
+                "text = EXCLUDED.text, vmetadata = EXCLUDED.vmetadata"
+            )
+        else:
+            on_conflict = "DO NOTHING"
+
+        cursor = connection.connection.dbapi_connection.cursor()
         try:
-            if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    # Use raw SQL for BYTEA/pgcrypto
-                    # Ensure metadata is converted to its JSON text representation
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO NOTHING
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
-                log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS document_chunk_staging "
+                "(id text, vector vector, collection_name text, text text, vmetadata text) "
+                "ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                "COPY document_chunk_staging FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(data),
+            )
+            cursor.execute(
+                "INSERT INTO document_chunk (id, vector, collection_name, text, vmetadata) "
+                f"SELECT id, vector, collection_name, {text_value}, {vmetadata_value} "
+                f"FROM document_chunk_staging ON CONFLICT (id) {on_conflict}",
+                {"key": PGVECTOR_PGCRYPTO_KEY},
+            )
+            cursor.execute("TRUNCATE document_chunk_staging")
+        finally:
+            cursor.close()
 
-            else:
-                new_items = []
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=stringify_metadata(item["metadata"]),
-                    )
-                    new_items.append(new_chunk)
-                self.session.bulk_save_objects(new_items)
-                self.session.commit()
-                log.info(
-                    f"Inserted {len(new_items)} items into collection '{collection_name}'."
-                )
+    def _bulk_insert(
+        self, collection_name: str, items: List[VectorItem], upsert: bool = False
+    ) -> None:
+        """
+        Load `items` in COPY batches of PGVECTOR_INSERT_BATCH_SIZE rows. Large
+        loads are spread over PGVECTOR_INSERT_PARALLELISM connections, each
+        committing its own batches.
+        """
+        batches = [
+            self._get_copy_data(
+                collection_name, items[i : i + PGVECTOR_INSERT_BATCH_SIZE]
+            )
+            for i in range(0, len(items), PGVECTOR_INSERT_BATCH_SIZE)
+        ]
+
+        if PGVECTOR_INSERT_PARALLELISM > 1 and len(batches) > 1:
+            engine = self.session.get_bind()
+
+            def insert_batch(data: bytes):
+                with engine.begin() as connection:
+                    self._copy_insert(connection, data, upsert)
+
+            with ThreadPoolExecutor(
+                max_workers=min(PGVECTOR_INSERT_PARALLELISM, len(batches))
+            ) as executor:
+                list(executor.map(insert_batch, batches))
+        else:
+            connection = self.session.connection()
+            for data in batches:
+                self._copy_insert(connection, data, upsert)
+            self.session.commit()
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            self._bulk_insert(collection_name, items)
+            log.info(
+                f"Inserted {len(items)} items into collection '{collection_name}'."
+            )
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during insert: {e}")
             raise
 
+        self.schedule_collection_index(collection_name)
+
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
-            if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
-                log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
-            else:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    existing = (
-                        self.session.query(DocumentChunk)
-                        .filter(DocumentChunk.id == item["id"])
-                        .first()
-                    )
-                    if existing:
-                        existing.vector = vector
-                        existing.text = item["text"]
-                        existing.vmetadata = stringify_metadata(item["metadata"])
-                        existing.collection_name = (
-                            collection_name  # Update collection_name if necessary
-                        )
-                    else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=stringify_metadata(item["metadata"]),
-                        )
-                        self.session.add(new_chunk)
-                self.session.commit()
-                log.info(
-                    f"Upserted {len(items)} items into collection '{collection_name}'."
-                )
+            self._bulk_insert(collection_name, items, upsert=True)
+            log.info(
+                f"Upserted {len(items)} items into collection '{collection_name}'."
+            )
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during upsert: {e}")
             raise
 
+        self.schedule_collection_index(collection_name)
+
     def search(
         self,
         collection_name: str,
@@ -396,6 +616,16 @@ class PgvectorClient(VectorDBBase):
                 .order_by(query_vectors.c.qid, subq.c.distance)
             )
 
+            # Scope the index search parameters to this (read-only) transaction
+            if PGVECTOR_INDEX_METHOD == "hnsw":
+                # The index only returns up to ef_search candidates
+                ef_search = min(max(PGVECTOR_HNSW_EF_SEARCH, limit or 0), 1000)
+                self.session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+            elif PGVECTOR_INDEX_METHOD == "ivfflat":
+                self.session.execute(
+                    text(f"SET LOCAL ivfflat.probes = {PGVECTOR_IVFFLAT_PROBES}")
+                )
+
             result_proxy = self.session.execute(stmt)
             results = result_proxy.all()
 
@@ -579,6 +809,7 @@ class PgvectorClient(VectorDBBase):
         try:
             deleted = self.session.query(DocumentChunk).delete()
             self.session.commit()
+            self.drop_collection_indexes()
             log.info(
                 f"Reset complete. Deleted {deleted} items from 'document_chunk' table."
             )
@@ -605,6 +836,22 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error checking collection existence: {e}")
             return False
 
+    def list_collections(self) -> Optional[List[str]]:
+        try:
+            names = [
+                name
+                for (name,) in self.session.query(
+                    DocumentChunk.collection_name
+                ).distinct()
+            ]
+            self.session.rollback()  # read-only transaction
+            return names
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error listing collections: {e}")
+            return None
+
     def delete_collection(self, collection_name: str) -> None:
         self.delete(collection_name)
+        self.drop_collection_indexes(collection_name)
         log.info(f"Collection '{collection_name}' deleted.")
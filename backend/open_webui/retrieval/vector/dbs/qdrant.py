@@ -246,6 +246,14 @@ class QdrantClient(VectorDBBase):
             ),
         )
 
+    def list_collections(self) -> list[str]:
+        prefix = f"{self.collection_prefix}_"
+        return [
+            collection.name.removeprefix(prefix)
+            for collection in self.client.get_collections().collections
+            if collection.name.startswith(prefix)
+        ]
+
     def reset(self):
         # Resets the database. This will delete all collections and item entries.
         collection_names = self.client.get_collections().collections
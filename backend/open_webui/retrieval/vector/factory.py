@@ -1,6 +1,15 @@
+import logging
+from typing import Callable
+
+from open_webui.models.vector_collections import VectorCollections
+from open_webui.retrieval.cache import bump_collection_version
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
 from open_webui.config import VECTOR_DB, ENABLE_QDRANT_MULTITENANCY_MODE
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class Vector:
@@ -60,4 +69,88 @@ class Vector:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+def get_items_size(items: list) -> int:
+    size = 0
+    for item in items:
+        if not isinstance(item, dict):
+            item = item.model_dump()
+        text = item.get("text") or ""
+        size += len(text.encode()) + 4 * len(item.get("vector") or [])
+    return size
+
+
+def _update_registry(fn: Callable[[], None]) -> None:
+    # Bookkeeping only, never fail the write itself
+    try:
+        fn()
+    except Exception as e:
+        log.warning(f"Failed to update vector collection registry: {e}")
+
+
+class VersionedVectorDB:
+    """
+    Forwards every call to the configured vector DB client, bumps the
+    retrieval cache version of each collection it writes to or deletes from
+    and keeps the collection registry (VectorCollections) up to date.
+    """
+
+    def __init__(self, client: VectorDBBase):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def delete_collection(self, collection_name: str, *args, **kwargs):
+        try:
+            return self.client.delete_collection(collection_name, *args, **kwargs)
+        finally:
+            bump_collection_version(collection_name)
+            _update_registry(
+                lambda: VectorCollections.delete_collection_by_name(collection_name)
+            )
+
+    def insert(self, collection_name: str, items: list, *args, **kwargs):
+        try:
+            result = self.client.insert(collection_name, items, *args, **kwargs)
+        finally:
+            bump_collection_version(collection_name)
+        _update_registry(
+            lambda: VectorCollections.add_items(
+                collection_name, len(items), get_items_size(items)
+            )
+        )
+        return result
+
+    def upsert(self, collection_name: str, items: list, *args, **kwargs):
+        try:
+            result = self.client.upsert(collection_name, items, *args, **kwargs)
+        finally:
+            bump_collection_version(collection_name)
+        # Counted as new items, updates of existing ones are rare
+        _update_registry(
+            lambda: VectorCollections.add_items(
+                collection_name, len(items), get_items_size(items)
+            )
+        )
+        return result
+
+    def delete(self, collection_name: str, *args, **kwargs):
+        try:
+            return self.client.delete(collection_name, *args, **kwargs)
+        finally:
+            bump_collection_version(collection_name)
+            ids = kwargs.get("ids") or (args[0] if args else None)
+            if ids:
+                _update_registry(
+                    lambda: VectorCollections.remove_items(collection_name, len(ids))
+                )
+
+    def reset(self, *args, **kwargs):
+        try:
+            return self.client.reset(*args, **kwargs)
+        finally:
+            bump_collection_version(None)
+            _update_registry(VectorCollections.delete_all_collections)
+
+
+VECTOR_DB_CLIENT = VersionedVectorDB(Vector.get_vector(VECTOR_DB))
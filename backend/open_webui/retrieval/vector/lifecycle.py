@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import random
+import time
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    VECTOR_COLLECTION_CLEANUP_BATCH_SIZE,
+    VECTOR_COLLECTION_CLEANUP_INTERVAL,
+    WEB_SEARCH_COLLECTION_TTL,
+)
+from open_webui.models.vector_collections import (
+    VectorCollections,
+    get_collection_type,
+)
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Collection types that are deleted after going unused for the given seconds
+EPHEMERAL_COLLECTION_TTLS = {
+    "web_search": WEB_SEARCH_COLLECTION_TTL,
+}
+
+
+def touch_ephemeral_collections(collection_names) -> None:
+    names = [
+        name
+        for name in collection_names
+        if EPHEMERAL_COLLECTION_TTLS.get(get_collection_type(name))
+    ]
+    if not names:
+        return
+    try:
+        VectorCollections.touch_collections(names)
+    except Exception as e:
+        log.warning(f"Failed to record access to {names}: {e}")
+
+
+def backfill_ephemeral_collections() -> int:
+    """
+    Registers the ephemeral collections already in the vector DB while the
+    registry has none of their type, e.g. the ones created before it existed,
+    so they expire like new ones. Returns the number registered.
+    """
+    types = [
+        collection_type
+        for collection_type, ttl in EPHEMERAL_COLLECTION_TTLS.items()
+        if ttl and not VectorCollections.has_collections(collection_type)
+    ]
+    if not types:
+        return 0
+
+    names = VECTOR_DB_CLIENT.list_collections()
+    if names is None:
+        log.info("The vector DB can't list its collections, skipping the backfill")
+        return 0
+    return VectorCollections.register_collections(
+        [name for name in names if get_collection_type(name) in types]
+    )
+
+
+def reap_expired_collections(
+    batch_size: int = VECTOR_COLLECTION_CLEANUP_BATCH_SIZE,
+) -> int:
+    deleted = 0
+    now = int(time.time())
+    for collection_type, ttl in EPHEMERAL_COLLECTION_TTLS.items():
+        if not ttl:
+            continue
+
+        while True:
+            collections = VectorCollections.get_expired_collections(
+                collection_type, now - ttl, batch_size
+            )
+            if not collections:
+                break
+
+            for collection in collections:
+                try:
+                    if VECTOR_DB_CLIENT.has_collection(collection_name=collection.name):
+                        VECTOR_DB_CLIENT.delete_collection(
+                            collection_name=collection.name
+                        )
+                except Exception as e:
+                    log.warning(f"Failed to delete collection {collection.name}: {e}")
+                # Also dropped when the delete failed, so the batch moves on
+                VectorCollections.delete_collection_by_name(collection.name)
+                deleted += 1
+
+    return deleted
+
+
+async def periodic_vector_collection_cleanup():
+    if not any(EPHEMERAL_COLLECTION_TTLS.values()):
+        return
+
+    # Spread workers out so they rarely reap at the same time
+    await asyncio.sleep(random.uniform(0, VECTOR_COLLECTION_CLEANUP_INTERVAL / 4))
+    try:
+        registered = await asyncio.to_thread(backfill_ephemeral_collections)
+        if registered:
+            log.info(f"Registered {registered} existing vector collection(s)")
+    except Exception as e:
+        log.exception(f"Vector collection backfill failed: {e}")
+
+    while True:
+        try:
+            deleted = await asyncio.to_thread(reap_expired_collections)
+            if deleted:
+                log.info(f"Deleted {deleted} expired vector collection(s)")
+        except Exception as e:
+            log.exception(f"Vector collection cleanup failed: {e}")
+        await asyncio.sleep(VECTOR_COLLECTION_CLEANUP_INTERVAL)
@@ -41,6 +41,10 @@ class VectorDBBase(ABC):
         """Delete a collection from the vector DB."""
         pass
 
+    def list_collections(self) -> Optional[List[str]]:
+        """List the names of all collections, or None if the backend can't."""
+        return None
+
     @abstractmethod
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
         """Insert a list of vector items into a collection."""
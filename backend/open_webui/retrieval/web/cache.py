@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    WEB_SEARCH_CACHE_SIZE_MB,
+    WEB_SEARCH_CACHE_TTL,
+)
+from open_webui.utils.cache import LRUCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+MAX_ENTRIES = 4096
+
+
+def _get_pages_size(docs: list[Document]) -> int:
+    return sum(len(doc.page_content) for doc in docs)
+
+
+def _get_chunks_size(chunks: list[dict]) -> int:
+    return sum(len(chunk["text"]) + chunk["vector"].nbytes for chunk in chunks)
+
+
+# url -> documents the web loader returned for it
+_page_cache = LRUCache(
+    maxsize=MAX_ENTRIES,
+    ttl=WEB_SEARCH_CACHE_TTL,
+    maxbytes=WEB_SEARCH_CACHE_SIZE_MB * 1024 * 1024 // 2,
+    getsizeof=_get_pages_size,
+)
+# url + content hash + splitter/embedding settings -> embedded chunks
+_chunk_cache = LRUCache(
+    maxsize=MAX_ENTRIES,
+    ttl=WEB_SEARCH_CACHE_TTL,
+    maxbytes=WEB_SEARCH_CACHE_SIZE_MB * 1024 * 1024 // 2,
+    getsizeof=_get_chunks_size,
+)
+
+
+def get_cached_web_page(url: str) -> Optional[list[Document]]:
+    docs = _page_cache.get(url)
+    if docs is None:
+        return None
+    log.debug(f"web page cache hit: {url}")
+    return [
+        Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+        for doc in docs
+    ]
+
+
+def set_cached_web_page(url: str, docs: list[Document]) -> None:
+    if not docs:
+        return
+    _page_cache.set(
+        url,
+        [
+            Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc in docs
+        ],
+    )
+
+
+def get_content_hash(docs: list[Document]) -> str:
+    content_hash = hashlib.sha256()
+    for doc in docs:
+        content_hash.update(doc.page_content.encode())
+    return content_hash.hexdigest()
+
+
+def get_chunk_cache_key(url: str, content_hash: str, **params: Any) -> str:
+    """
+    Chunks only depend on the page content and on how it was split and
+    embedded, so `params` carries the splitter and embedding settings.
+    """
+    payload = json.dumps(
+        {"url": url, "content_hash": content_hash, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_web_chunks(key: str) -> Optional[list[dict]]:
+    chunks = _chunk_cache.get(key)
+    if chunks is None:
+        return None
+    return [{**chunk, "metadata": dict(chunk["metadata"])} for chunk in chunks]
+
+
+def set_cached_web_chunks(key: str, chunks: list[dict]) -> None:
+    """Cache chunks as {"text", "vector", "metadata"}, vectors as float32."""
+    if not chunks:
+        return
+    _chunk_cache.set(
+        key,
+        [
+            {
+                "text": chunk["text"],
+                "vector": np.asarray(chunk["vector"], dtype=np.float32),
+                "metadata": dict(chunk["metadata"]),
+            }
+            for chunk in chunks
+        ],
+    )
+
+
+def clear_web_cache() -> None:
+    _page_cache.clear()
+    _chunk_cache.clear()
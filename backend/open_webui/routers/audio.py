@@ -1,3 +1,4 @@
+import asyncio
 import hashlib
 import json
 import logging
@@ -5,13 +6,10 @@ import os
 import uuid
 from functools import lru_cache
 from pathlib import Path
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional
 
 from fnmatch import fnmatch
-import aiohttp
 import aiofiles
 import requests
 import mimetypes
@@ -29,11 +27,17 @@ from fastapi import (
     APIRouter,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.audio.speech import get_speech_cache
+from open_webui.utils.model_server import get_model
+from open_webui.utils.audio.transcription import (
+    prepare_audio_chunks,
+    remove_audio_chunks,
+)
 from open_webui.config import (
     WHISPER_MODEL_AUTO_UPDATE,
     WHISPER_MODEL_DIR,
@@ -44,11 +48,11 @@ from open_webui.config import (
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
     AIOHTTP_CLIENT_SESSION_SSL,
-    AIOHTTP_CLIENT_TIMEOUT,
     ENV,
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    AUDIO_STT_MAX_CONCURRENCY,
 )
 
 
@@ -65,6 +69,7 @@ log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 
 SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
 SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+SPEECH_CACHE = get_speech_cache(SPEECH_CACHE_DIR)
 
 
 ##########################################
@@ -73,7 +78,6 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 #
 ##########################################
 
-from pydub import AudioSegment
 from pydub.utils import mediainfo
 
 
@@ -107,40 +111,17 @@ def is_audio_conversion_required(file_path):
         return False
 
 
-def convert_audio_to_mp3(file_path):
-    """Convert audio file to mp3 format."""
-    try:
-        output_path = os.path.splitext(file_path)[0] + ".mp3"
-        audio = AudioSegment.from_file(file_path)
-        audio.export(output_path, format="mp3")
-        log.info(f"Converted {file_path} to {output_path}")
-        return output_path
-    except Exception as e:
-        log.error(f"Error converting audio file: {e}")
-        return None
-
-
 def set_faster_whisper_model(model: str, auto_update: bool = False):
     whisper_model = None
     if model:
-        from faster_whisper import WhisperModel
-
-        faster_whisper_kwargs = {
-            "model_size_or_path": model,
-            "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
-            "compute_type": "int8",
-            "download_root": WHISPER_MODEL_DIR,
-            "local_files_only": not auto_update,
-        }
-
-        try:
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
-        except Exception:
-            log.warning(
-                "WhisperModel initialization failed, attempting download with local_files_only=False"
-            )
-            faster_whisper_kwargs["local_files_only"] = False
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
+        whisper_model = get_model(
+            "faster_whisper",
+            model_size_or_path=model,
+            device=DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
+            compute_type="int8",
+            download_root=WHISPER_MODEL_DIR,
+            local_files_only=not auto_update,
+        )
     return whisper_model
 
 
@@ -291,18 +272,8 @@ async def update_audio_config(
 
 
 def load_speech_pipeline(request):
-    from transformers import pipeline
-    from datasets import load_dataset
-
     if request.app.state.speech_synthesiser is None:
-        request.app.state.speech_synthesiser = pipeline(
-            "text-to-speech", "microsoft/speecht5_tts"
-        )
-
-    if request.app.state.speech_speaker_embeddings_dataset is None:
-        request.app.state.speech_speaker_embeddings_dataset = load_dataset(
-            "Matthijs/cmu-arctic-xvectors", split="validation"
-        )
+        request.app.state.speech_synthesiser = get_model("speech_t5")
 
 
 @router.post("/speech")
@@ -318,8 +289,9 @@ async def speech(request: Request, user=Depends(get_verified_user)):
     file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
 
     # Check if the file already exists in the cache
-    if file_path.is_file():
-        return FileResponse(file_path)
+    cached_file_path = SPEECH_CACHE.get(name)
+    if cached_file_path:
+        return FileResponse(cached_file_path)
 
     payload = None
     try:
@@ -328,65 +300,29 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         log.exception(e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    r = None
+    send_request = None
     if request.app.state.config.TTS_ENGINE == "openai":
         payload["model"] = request.app.state.config.TTS_MODEL
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                r = await session.post(
-                    url=f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
-                        **(
-                            {
-                                "X-Prosper Chat-User-Name": quote(user.name, safe=" "),
-                                "X-Prosper Chat-User-Id": user.id,
-                                "X-Prosper Chat-User-Email": user.email,
-                                "X-Prosper Chat-User-Role": user.role,
-                            }
-                            if ENABLE_FORWARD_USER_INFO_HEADERS
-                            else {}
-                        ),
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                )
-
-                r.raise_for_status()
-
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(await r.read())
-
-                async with aiofiles.open(file_body_path, "w") as f:
-                    await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            status_code = 500
-            detail = f"Prosper Chat: Server Connection Error"
-
-            if r is not None:
-                status_code = r.status
-
-                try:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error']}"
-                except Exception:
-                    detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=status_code,
-                detail=detail,
+        async def send_request(session):
+            return await session.post(
+                url=f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
+                    **(
+                        {
+                            "X-Prosper Chat-User-Name": quote(user.name, safe=" "),
+                            "X-Prosper Chat-User-Id": user.id,
+                            "X-Prosper Chat-User-Email": user.email,
+                            "X-Prosper Chat-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS
+                        else {}
+                    ),
+                },
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
             )
 
     elif request.app.state.config.TTS_ENGINE == "elevenlabs":
@@ -398,141 +334,73 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 detail="Invalid voice id",
             )
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-                    json={
-                        "text": payload["input"],
-                        "model_id": request.app.state.config.TTS_MODEL,
-                        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-                    },
-                    headers={
-                        "Accept": "audio/mpeg",
-                        "Content-Type": "application/json",
-                        "xi-api-key": request.app.state.config.TTS_API_KEY,
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "Prosper Chat: Server Connection Error",
+        async def send_request(session):
+            return await session.post(
+                f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream",
+                json={
+                    "text": payload["input"],
+                    "model_id": request.app.state.config.TTS_MODEL,
+                    "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
+                },
+                headers={
+                    "Accept": "audio/mpeg",
+                    "Content-Type": "application/json",
+                    "xi-api-key": request.app.state.config.TTS_API_KEY,
+                },
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
             )
 
     elif request.app.state.config.TTS_ENGINE == "azure":
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         region = request.app.state.config.TTS_AZURE_SPEECH_REGION or "eastus"
         base_url = request.app.state.config.TTS_AZURE_SPEECH_BASE_URL
         language = request.app.state.config.TTS_VOICE
         locale = "-".join(request.app.state.config.TTS_VOICE.split("-")[:1])
         output_format = request.app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT
 
-        try:
-            data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
+        data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
                 <voice name="{language}">{payload["input"]}</voice>
             </speak>"""
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    (base_url or f"https://{region}.tts.speech.microsoft.com")
-                    + "/cognitiveservices/v1",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
-                        "Content-Type": "application/ssml+xml",
-                        "X-Microsoft-OutputFormat": output_format,
-                    },
-                    data=data,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
 
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-                    return FileResponse(file_path)
+        async def send_request(session):
+            return await session.post(
+                (base_url or f"https://{region}.tts.speech.microsoft.com")
+                + "/cognitiveservices/v1",
+                headers={
+                    "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
+                    "Content-Type": "application/ssml+xml",
+                    "X-Microsoft-OutputFormat": output_format,
+                },
+                data=data,
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            )
 
+    if send_request is not None:
+        # Audio is sent on as it arrives from upstream and written to the
+        # cache at the same time; identical concurrent requests share it
+        try:
+            speech_stream = await SPEECH_CACHE.stream(name, payload, send_request)
+        except HTTPException:
+            raise
         except Exception as e:
             log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
             raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "Prosper Chat: Server Connection Error",
+                status_code=500,
+                detail="Prosper Chat: Server Connection Error",
             )
 
-    elif request.app.state.config.TTS_ENGINE == "transformers":
-        payload = None
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        return StreamingResponse(
+            speech_stream.iter_chunks(), media_type=speech_stream.media_type
+        )
 
-        import torch
+    if request.app.state.config.TTS_ENGINE == "transformers":
         import soundfile as sf
 
-        load_speech_pipeline(request)
-
-        embeddings_dataset = request.app.state.speech_speaker_embeddings_dataset
-
-        speaker_index = 6799
-        try:
-            speaker_index = embeddings_dataset["filename"].index(
-                request.app.state.config.TTS_MODEL
-            )
-        except Exception:
-            pass
-
-        speaker_embedding = torch.tensor(
-            embeddings_dataset[speaker_index]["xvector"]
-        ).unsqueeze(0)
-
-        speech = request.app.state.speech_synthesiser(
+        # Model loading and synthesis block; keep them off the event loop
+        await asyncio.to_thread(load_speech_pipeline, request)
+        speech = await asyncio.to_thread(
+            request.app.state.speech_synthesiser.synthesize,
             payload["input"],
-            forward_params={"speaker_embeddings": speaker_embedding},
+            request.app.state.config.TTS_MODEL,
         )
 
         sf.write(file_path, speech["audio"], samplerate=speech["sampling_rate"])
@@ -540,6 +408,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         async with aiofiles.open(file_body_path, "w") as f:
             await f.write(json.dumps(payload))
 
+        await SPEECH_CACHE.evict_in_background()
         return FileResponse(file_path)
 
 
@@ -806,21 +675,23 @@ def transcription_handler(request, file_path, metadata):
             )
 
 
-def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+def iter_transcription(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+) -> Iterator[dict]:
+    """
+    Transcribe `file_path`, yielding {"index", "total", "text"} for each chunk
+    as soon as it is done. Chunks are transcribed concurrently, so they may
+    complete out of order.
+    """
     log.info(f"transcribe: {file_path} {metadata}")
 
-    if is_audio_conversion_required(file_path):
-        file_path = convert_audio_to_mp3(file_path)
-
     try:
-        file_path = compress_audio(file_path)
-    except Exception as e:
-        log.exception(e)
-
-    # Always produce a list of chunk paths (could be one entry if small)
-    try:
-        chunk_paths = split_audio(file_path, MAX_FILE_SIZE)
-        print(f"Chunk paths: {chunk_paths}")
+        chunk_paths = prepare_audio_chunks(
+            file_path,
+            MAX_FILE_SIZE,
+            conversion_required=is_audio_conversion_required(file_path),
+        )
+        log.debug(f"Chunk paths: {chunk_paths}")
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -828,97 +699,69 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
             detail=ERROR_MESSAGES.DEFAULT(e),
         )
 
-    results = []
     try:
-        with ThreadPoolExecutor() as executor:
-            # Submit tasks for each chunk_path
-            futures = [
-                executor.submit(transcription_handler, request, chunk_path, metadata)
-                for chunk_path in chunk_paths
-            ]
-            # Gather results as they complete
-            for future in futures:
+        with ThreadPoolExecutor(
+            max_workers=min(AUDIO_STT_MAX_CONCURRENCY, len(chunk_paths))
+        ) as executor:
+            futures = {
+                executor.submit(
+                    transcription_handler, request, chunk_path, metadata
+                ): idx
+                for idx, chunk_path in enumerate(chunk_paths)
+            }
+            for future in as_completed(futures):
                 try:
-                    results.append(future.result())
+                    result = future.result()
                 except Exception as transcribe_exc:
+                    for pending in futures:
+                        pending.cancel()
                     raise HTTPException(
                         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                         detail=f"Error transcribing chunk: {transcribe_exc}",
                     )
-    finally:
-        # Clean up only the temporary chunks, never the original file
-        for chunk_path in chunk_paths:
-            if chunk_path != file_path and os.path.isfile(chunk_path):
-                try:
-                    os.remove(chunk_path)
-                except Exception:
-                    pass
-
-    return {
-        "text": " ".join([result["text"] for result in results]),
-    }
-
-
-def compress_audio(file_path):
-    if os.path.getsize(file_path) > MAX_FILE_SIZE:
-        id = os.path.splitext(os.path.basename(file_path))[
-            0
-        ]  # Handles names with multiple dots
-        file_dir = os.path.dirname(file_path)
-
-        audio = AudioSegment.from_file(file_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
-
-        compressed_path = os.path.join(file_dir, f"{id}_compressed.mp3")
-        audio.export(compressed_path, format="mp3", bitrate="32k")
-        # log.debug(f"Compressed audio to {compressed_path}")  # Uncomment if log is defined
-
-        return compressed_path
-    else:
-        return file_path
-
-
-def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
-    """
-    Splits audio into chunks not exceeding max_bytes.
-    Returns a list of chunk file paths. If audio fits, returns list with original path.
-    """
-    file_size = os.path.getsize(file_path)
-    if file_size <= max_bytes:
-        return [file_path]  # Nothing to split
 
-    audio = AudioSegment.from_file(file_path)
-    duration_ms = len(audio)
-    orig_size = file_size
-
-    approx_chunk_ms = max(int(duration_ms * (max_bytes / orig_size)) - 1000, 1000)
-    chunks = []
-    start = 0
-    i = 0
-
-    base, _ = os.path.splitext(file_path)
+                yield {
+                    "index": futures[future],
+                    "total": len(chunk_paths),
+                    "text": result.get("text", ""),
+                }
+    finally:
+        remove_audio_chunks(file_path, chunk_paths)
 
-    while start < duration_ms:
-        end = min(start + approx_chunk_ms, duration_ms)
-        chunk = audio[start:end]
-        chunk_path = f"{base}_chunk_{i}.{format}"
-        chunk.export(chunk_path, format=format, bitrate=bitrate)
 
-        # Reduce chunk duration if still too large
-        while os.path.getsize(chunk_path) > max_bytes and (end - start) > 5000:
-            end = start + ((end - start) // 2)
-            chunk = audio[start:end]
-            chunk.export(chunk_path, format=format, bitrate=bitrate)
+def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+    texts = {}
+    for part in iter_transcription(request, file_path, metadata):
+        texts[part["index"]] = part["text"]
 
-        if os.path.getsize(chunk_path) > max_bytes:
-            os.remove(chunk_path)
-            raise Exception("Audio chunk cannot be reduced below max file size.")
+    return {
+        "text": " ".join([texts[idx] for idx in sorted(texts)]),
+    }
 
-        chunks.append(chunk_path)
-        start = end
-        i += 1
 
-    return chunks
+def stream_transcription(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+) -> Iterator[str]:
+    texts = {}
+    try:
+        for part in iter_transcription(request, file_path, metadata):
+            texts[part["index"]] = part["text"]
+            yield json.dumps(part) + "\n"
+    except HTTPException as e:
+        yield json.dumps({"error": e.detail}) + "\n"
+        return
+    except Exception as e:
+        log.exception(e)
+        yield json.dumps({"error": ERROR_MESSAGES.DEFAULT(e)}) + "\n"
+        return
+
+    yield json.dumps(
+        {
+            "done": True,
+            "text": " ".join([texts[idx] for idx in sorted(texts)]),
+            "filename": os.path.basename(file_path),
+        }
+    ) + "\n"
 
 
 @router.post("/transcriptions")
@@ -926,6 +769,7 @@ def transcription(
     request: Request,
     file: UploadFile = File(...),
     language: Optional[str] = Form(None),
+    stream: bool = Form(False),
     user=Depends(get_verified_user),
 ):
     log.info(f"file.content_type: {file.content_type}")
@@ -968,6 +812,14 @@ def transcription(
             if language:
                 metadata = {"language": language}
 
+            if stream:
+                # Newline-delimited JSON: one line per finished chunk, then
+                # the whole transcript
+                return StreamingResponse(
+                    stream_transcription(request, file_path, metadata),
+                    media_type="application/x-ndjson",
+                )
+
             result = transcribe(request, file_path, metadata)
 
             return {
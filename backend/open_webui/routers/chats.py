@@ -29,6 +29,34 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def parse_chat_list_cursor(
+    cursor: Optional[str], order_by: Optional[str] = None
+) -> Optional[tuple[int, str]]:
+    """
+    Chat lists can be paginated with `cursor=<updated_at>:<id>` of the last
+    chat of the previous page instead of `page`. Cursors follow the default
+    (updated_at, id) ordering, so they can't be combined with `order_by`.
+    """
+    if not cursor:
+        return None
+
+    if order_by:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Cursor can't be combined with order_by"),
+        )
+
+    try:
+        updated_at, id = cursor.split(":", 1)
+        return int(updated_at), id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid cursor"),
+        )
+
+
 ############################
 # GetChatList
 ############################
@@ -37,10 +65,18 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
+    cursor = parse_chat_list_cursor(cursor)
+
     try:
-        if page is not None:
+        if cursor is not None:
+            return Chats.get_chat_title_id_list_by_user_id(
+                user.id, limit=60, cursor=cursor
+            )
+        elif page is not None:
             limit = 60
             skip = (page - 1) * limit
 
@@ -88,6 +124,7 @@ async def get_user_chat_list_by_user_id(
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
+    cursor: Optional[str] = None,
     user=Depends(get_admin_user),
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
@@ -96,7 +133,8 @@ async def get_user_chat_list_by_user_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    if page is None:
+    cursor = parse_chat_list_cursor(cursor, order_by)
+    if page is None or cursor is not None:
         page = 1
 
     limit = 60
@@ -111,7 +149,12 @@ async def get_user_chat_list_by_user_id(
         filter["direction"] = direction
 
     return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, filter=filter, skip=skip, limit=limit
+        user_id,
+        include_archived=True,
+        filter=filter,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
     )
 
 
@@ -296,9 +339,11 @@ async def get_archived_session_user_chat_list(
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
+    cursor: Optional[str] = None,
     user=Depends(get_verified_user),
 ):
-    if page is None:
+    cursor = parse_chat_list_cursor(cursor, order_by)
+    if page is None or cursor is not None:
         page = 1
 
     limit = 60
@@ -312,17 +357,13 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
-            user.id,
-            filter=filter,
-            skip=skip,
-            limit=limit,
-        )
-    ]
-
-    return chat_list
+    return Chats.get_archived_chat_list_by_user_id(
+        user.id,
+        filter=filter,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 ############################
@@ -373,16 +414,24 @@ class TagForm(BaseModel):
 class TagFilterForm(TagForm):
     skip: Optional[int] = 0
     limit: Optional[int] = 50
+    cursor: Optional[str] = None
 
 
 @router.post("/tags", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_tag_name(
     form_data: TagFilterForm, user=Depends(get_verified_user)
 ):
+    cursor = parse_chat_list_cursor(form_data.cursor)
     chats = Chats.get_chat_list_by_user_id_and_tag_name(
-        user.id, form_data.name, form_data.skip, form_data.limit
+        user.id,
+        form_data.name,
+        form_data.skip,
+        form_data.limit,
+        cursor=cursor,
     )
-    if len(chats) == 0:
+    # Only an empty first page means no chat uses the tag anymore, later
+    # pages are empty once they run past the end
+    if len(chats) == 0 and not form_data.skip and cursor is None:
         Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
 
     return chats
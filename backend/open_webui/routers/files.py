@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import uuid
@@ -170,7 +171,10 @@ async def upload_file(
                         )
                     ):
                         file_path = Storage.get_file(file_path)
-                        result = transcribe(request, file_path, file_metadata)
+                        # Keep the transcode and transcription off the event loop
+                        result = await asyncio.to_thread(
+                            transcribe, request, file_path, file_metadata
+                        )
 
                         await process_file(
                             request,
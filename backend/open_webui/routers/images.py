@@ -5,17 +5,30 @@ import json
 import logging
 import mimetypes
 import re
+import tempfile
 from pathlib import Path
 from typing import Optional
 
 from urllib.parse import quote
-import requests
+import aiohttp
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
+from open_webui.env import (
+    AIOHTTP_CLIENT_SESSION_SSL,
+    AIOHTTP_CLIENT_TIMEOUT,
+    AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    ENABLE_IMAGE_GENERATION_CACHE,
+    IMAGE_GENERATION_CACHE_MAX_ENTRIES,
+    IMAGE_GENERATION_MODELS_CACHE_TTL,
+    IMAGE_GENERATION_SPOOL_MAX_SIZE_MB,
+    SRC_LOG_LEVELS,
+)
 from open_webui.routers.files import upload_file
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.cache import LRUCache
+from open_webui.utils.images.cache import ImageGenerationCache, get_image_cache_key
 from open_webui.utils.images.comfyui import (
     ComfyUIGenerateImageForm,
     ComfyUIWorkflow,
@@ -29,6 +42,19 @@ log.setLevel(SRC_LOG_LEVELS["IMAGES"])
 IMAGE_CACHE_DIR = CACHE_DIR / "image" / "generations"
 IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Decoded in chunks that are a multiple of 4, so each one is valid base64
+B64_DECODE_CHUNK_SIZE = 1024 * 1024
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_B64_IGNORED_CHARS = re.compile(r"[^A-Za-z0-9+/=]")
+
+# engine -> model list, cleared whenever the config is updated
+_image_models_cache = LRUCache(maxsize=8, ttl=IMAGE_GENERATION_MODELS_CACHE_TTL)
+
+image_generation_cache = ImageGenerationCache(
+    maxsize=IMAGE_GENERATION_CACHE_MAX_ENTRIES
+)
+
 
 router = APIRouter()
 
@@ -152,6 +178,8 @@ async def update_config(
         form_data.comfyui.COMFYUI_WORKFLOW_NODES
     )
 
+    _image_models_cache.clear()
+
     return {
         "enabled": request.app.state.config.ENABLE_IMAGE_GENERATION,
         "engine": request.app.state.config.IMAGE_GENERATION_ENGINE,
@@ -192,15 +220,74 @@ def get_automatic1111_api_auth(request: Request):
         return f"Basic {auth1111_base64_encoded_string}"
 
 
+_image_session: Optional[aiohttp.ClientSession] = None
+_image_session_loop = None
+
+
+def get_image_session() -> aiohttp.ClientSession:
+    """Shared session, so requests reuse pooled connections to the engines."""
+    global _image_session, _image_session_loop
+    loop = asyncio.get_running_loop()
+    if (
+        _image_session is None
+        or _image_session.closed
+        or _image_session_loop is not loop
+    ):
+        # Shared by every user, so cookies set by one must not reach the others
+        _image_session = aiohttp.ClientSession(
+            trust_env=True, cookie_jar=aiohttp.DummyCookieJar()
+        )
+        _image_session_loop = loop
+    return _image_session
+
+
+async def close_image_session() -> None:
+    global _image_session
+    if _image_session is not None and not _image_session.closed:
+        await _image_session.close()
+    _image_session = None
+
+
+async def request_image_api(
+    method: str, url: str, timeout: Optional[int] = AIOHTTP_CLIENT_TIMEOUT, **kwargs
+):
+    """
+    Sends a request to the image engine and returns the decoded JSON body.
+    Errors raise with the message the engine sent back, when there is one.
+    """
+    session = get_image_session()
+    async with session.request(
+        method,
+        url,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        **kwargs,
+    ) as r:
+        if r.ok:
+            return await r.json(content_type=None)
+
+        error = f"{r.status}: {r.reason}"
+        try:
+            res = await r.json(content_type=None)
+            if isinstance(res.get("error"), dict):
+                error = res["error"].get("message", error)
+            elif res.get("error"):
+                error = res["error"]
+        except Exception:
+            pass
+        raise Exception(error)
+
+
 @router.get("/config/url/verify")
 async def verify_url(request: Request, user=Depends(get_admin_user)):
     if request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111":
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            await request_image_api(
+                "GET",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+                timeout=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
                 headers={"authorization": get_automatic1111_api_auth(request)},
             )
-            r.raise_for_status()
             return True
         except Exception:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -214,11 +301,12 @@ async def verify_url(request: Request, user=Depends(get_admin_user)):
             }
 
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
+            await request_image_api(
+                "GET",
+                f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
+                timeout=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
                 headers=headers,
             )
-            r.raise_for_status()
             return True
         except Exception:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -227,27 +315,28 @@ async def verify_url(request: Request, user=Depends(get_admin_user)):
         return True
 
 
-def set_image_model(request: Request, model: str):
+async def set_image_model(request: Request, model: str):
     log.info(f"Setting image model to {model}")
     request.app.state.config.IMAGE_GENERATION_MODEL = model
     if request.app.state.config.IMAGE_GENERATION_ENGINE in ["", "automatic1111"]:
         api_auth = get_automatic1111_api_auth(request)
-        r = requests.get(
-            url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+        options = await request_image_api(
+            "GET",
+            f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
             headers={"authorization": api_auth},
         )
-        options = r.json()
         if model != options["sd_model_checkpoint"]:
             options["sd_model_checkpoint"] = model
-            r = requests.post(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            await request_image_api(
+                "POST",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 json=options,
                 headers={"authorization": api_auth},
             )
     return request.app.state.config.IMAGE_GENERATION_MODEL
 
 
-def get_image_model(request):
+async def get_image_model(request):
     if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
         return (
             request.app.state.config.IMAGE_GENERATION_MODEL
@@ -271,11 +360,11 @@ def get_image_model(request):
         or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
     ):
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            options = await request_image_api(
+                "GET",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 headers={"authorization": get_automatic1111_api_auth(request)},
             )
-            options = r.json()
             return options["sd_model_checkpoint"]
         except Exception as e:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -301,7 +390,7 @@ async def get_image_config(request: Request, user=Depends(get_admin_user)):
 async def update_image_config(
     request: Request, form_data: ImageConfigForm, user=Depends(get_admin_user)
 ):
-    set_image_model(request, form_data.MODEL)
+    await set_image_model(request, form_data.MODEL)
 
     if form_data.IMAGE_SIZE == "auto" and form_data.MODEL != "gpt-image-1":
         raise HTTPException(
@@ -336,85 +425,92 @@ async def update_image_config(
 
 
 @router.get("/models")
-def get_models(request: Request, user=Depends(get_verified_user)):
-    try:
-        if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
-            return [
-                {"id": "dall-e-2", "name": "DALL·E 2"},
-                {"id": "dall-e-3", "name": "DALL·E 3"},
-                {"id": "gpt-image-1", "name": "GPT-IMAGE 1"},
-            ]
-        elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
-            return [
-                {"id": "imagen-3.0-generate-002", "name": "imagen-3.0 generate-002"},
-            ]
-        elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
-            # TODO - get models from comfyui
-            headers = {
-                "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-            }
-            r = requests.get(
-                url=f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
-                headers=headers,
-            )
-            info = r.json()
+async def get_models(request: Request, user=Depends(get_verified_user)):
+    engine = request.app.state.config.IMAGE_GENERATION_ENGINE
+    models = _image_models_cache.get(engine)
+    if models is None:
+        try:
+            models = await fetch_image_models(request)
+        except Exception as e:
+            request.app.state.config.ENABLE_IMAGE_GENERATION = False
+            raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
+        _image_models_cache.set(engine, models)
+    return models
 
-            workflow = json.loads(request.app.state.config.COMFYUI_WORKFLOW)
-            model_node_id = None
 
-            for node in request.app.state.config.COMFYUI_WORKFLOW_NODES:
-                if node["type"] == "model":
-                    if node["node_ids"]:
-                        model_node_id = node["node_ids"][0]
+async def fetch_image_models(request: Request):
+    if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
+        return [
+            {"id": "dall-e-2", "name": "DALL·E 2"},
+            {"id": "dall-e-3", "name": "DALL·E 3"},
+            {"id": "gpt-image-1", "name": "GPT-IMAGE 1"},
+        ]
+    elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
+        return [
+            {"id": "imagen-3.0-generate-002", "name": "imagen-3.0 generate-002"},
+        ]
+    elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
+        # TODO - get models from comfyui
+        headers = {
+            "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
+        }
+        info = await request_image_api(
+            "GET",
+            f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
+            timeout=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
+            headers=headers,
+        )
+
+        workflow = json.loads(request.app.state.config.COMFYUI_WORKFLOW)
+        model_node_id = None
+
+        for node in request.app.state.config.COMFYUI_WORKFLOW_NODES:
+            if node["type"] == "model":
+                if node["node_ids"]:
+                    model_node_id = node["node_ids"][0]
+                break
+
+        if model_node_id:
+            model_list_key = None
+
+            log.info(workflow[model_node_id]["class_type"])
+            for key in info[workflow[model_node_id]["class_type"]]["input"]["required"]:
+                if "_name" in key:
+                    model_list_key = key
                     break
 
-            if model_node_id:
-                model_list_key = None
-
-                log.info(workflow[model_node_id]["class_type"])
-                for key in info[workflow[model_node_id]["class_type"]]["input"][
-                    "required"
-                ]:
-                    if "_name" in key:
-                        model_list_key = key
-                        break
-
-                if model_list_key:
-                    return list(
-                        map(
-                            lambda model: {"id": model, "name": model},
-                            info[workflow[model_node_id]["class_type"]]["input"][
-                                "required"
-                            ][model_list_key][0],
-                        )
-                    )
-            else:
+            if model_list_key:
                 return list(
                     map(
                         lambda model: {"id": model, "name": model},
-                        info["CheckpointLoaderSimple"]["input"]["required"][
-                            "ckpt_name"
-                        ][0],
+                        info[workflow[model_node_id]["class_type"]]["input"][
+                            "required"
+                        ][model_list_key][0],
                     )
                 )
-        elif (
-            request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
-            or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
-        ):
-            r = requests.get(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/sd-models",
-                headers={"authorization": get_automatic1111_api_auth(request)},
-            )
-            models = r.json()
+        else:
             return list(
                 map(
-                    lambda model: {"id": model["title"], "name": model["model_name"]},
-                    models,
+                    lambda model: {"id": model, "name": model},
+                    info["CheckpointLoaderSimple"]["input"]["required"]["ckpt_name"][0],
                 )
             )
-    except Exception as e:
-        request.app.state.config.ENABLE_IMAGE_GENERATION = False
-        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
+    elif (
+        request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
+        or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
+    ):
+        models = await request_image_api(
+            "GET",
+            f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/sd-models",
+            timeout=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
+            headers={"authorization": get_automatic1111_api_auth(request)},
+        )
+        return list(
+            map(
+                lambda model: {"id": model["title"], "name": model["model_name"]},
+                models,
+            )
+        )
 
 
 class GenerateImageForm(BaseModel):
@@ -423,63 +519,177 @@ class GenerateImageForm(BaseModel):
     size: Optional[str] = None
     n: int = 1
     negative_prompt: Optional[str] = None
+    seed: Optional[int] = None
+
+
+def new_image_file():
+    return tempfile.SpooledTemporaryFile(
+        max_size=IMAGE_GENERATION_SPOOL_MAX_SIZE_MB * 1024 * 1024
+    )
 
 
 def load_b64_image_data(b64_str):
+    """
+    Decodes a base64 image (or data URI) into a spooled file, a chunk at a
+    time, rather than into one bytes object.
+    """
+    file = None
     try:
-        if "," in b64_str:
-            header, encoded = b64_str.split(",", 1)
-            mime_type = header.split(";")[0].lstrip("data:")
-            img_data = base64.b64decode(encoded)
+        start = b64_str.find(",") + 1
+        if start:
+            mime_type = b64_str[: start - 1].split(";")[0].lstrip("data:")
         else:
             mime_type = "image/png"
-            img_data = base64.b64decode(b64_str)
-        return img_data, mime_type
+
+        file = new_image_file()
+        remainder = ""
+        for offset in range(start, len(b64_str), B64_DECODE_CHUNK_SIZE):
+            chunk = remainder + _B64_IGNORED_CHARS.sub(
+                "", b64_str[offset : offset + B64_DECODE_CHUNK_SIZE]
+            )
+            end = len(chunk) - len(chunk) % 4
+            file.write(base64.b64decode(chunk[:end]))
+            remainder = chunk[end:]
+        if remainder:
+            file.write(base64.b64decode(remainder))
+
+        file.seek(0)
+        return file, mime_type
     except Exception as e:
+        if file is not None:
+            file.close()
         log.exception(f"Error loading image data: {e}")
         return None, None
 
 
-def load_url_image_data(url, headers=None):
+async def load_url_image_data(url, headers=None):
+    file = None
     try:
-        if headers:
-            r = requests.get(url, headers=headers)
-        else:
-            r = requests.get(url)
+        session = get_image_session()
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as r:
+            r.raise_for_status()
+            if r.headers["content-type"].split("/")[0] != "image":
+                log.error("Url does not point to an image.")
+                return None, None
 
-        r.raise_for_status()
-        if r.headers["content-type"].split("/")[0] == "image":
             mime_type = r.headers["content-type"]
-            return r.content, mime_type
-        else:
-            log.error("Url does not point to an image.")
-            return None
+            file = new_image_file()
+            async for chunk in r.content.iter_chunked(IMAGE_DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
 
+        file.seek(0)
+        return file, mime_type
     except Exception as e:
+        if file is not None:
+            file.close()
         log.exception(f"Error saving image: {e}")
-        return None
+        return None, None
 
 
-def upload_image(request, image_data, content_type, metadata, user):
+async def upload_image(request, image_data, content_type, metadata, user):
     image_format = mimetypes.guess_extension(content_type)
     file = UploadFile(
-        file=io.BytesIO(image_data),
+        file=io.BytesIO(image_data) if isinstance(image_data, bytes) else image_data,
         filename=f"generated-image{image_format}",  # will be converted to a unique ID on upload_file
         headers={
             "content-type": content_type,
         },
     )
-    file_item = upload_file(request, file, metadata=metadata, internal=True, user=user)
+    try:
+        file_item = await upload_file(
+            request, file, metadata=metadata, internal=True, user=user
+        )
+    finally:
+        file.file.close()
     url = request.app.url_path_for("get_file_content_by_id", id=file_item.id)
     return url
 
 
+async def load_images(loaders) -> list[tuple]:
+    """
+    Loads generated images concurrently. Each loader is an awaitable that
+    resolves to the (file, content type) of one image.
+    """
+    images = await asyncio.gather(*loaders)
+    if any(image_data is None for image_data, _ in images):
+        for image_data, _ in images:
+            if image_data is not None:
+                image_data.close()
+        raise Exception("Failed to load the generated image")
+    return images
+
+
+async def upload_images(request, images, metadata, user) -> list[dict]:
+    urls = await asyncio.gather(
+        *(
+            upload_image(request, image_data, content_type, metadata, user)
+            for image_data, content_type in images
+        )
+    )
+    return [{"url": url} for url in urls]
+
+
+def get_image_generation_cache_key(request: Request, form_data: GenerateImageForm):
+    config = request.app.state.config
+    engine = config.IMAGE_GENERATION_ENGINE
+    params = {
+        "engine": engine,
+        "model": config.IMAGE_GENERATION_MODEL,
+        "prompt": form_data.prompt,
+        "negative_prompt": form_data.negative_prompt,
+        "size": config.IMAGE_SIZE,
+        "steps": config.IMAGE_STEPS,
+        "n": form_data.n,
+        "seed": form_data.seed,
+    }
+
+    if engine == "openai":
+        params["url"] = config.IMAGES_OPENAI_API_BASE_URL
+        params["size"] = form_data.size if form_data.size else config.IMAGE_SIZE
+    elif engine == "gemini":
+        params["url"] = config.IMAGES_GEMINI_API_BASE_URL
+    elif engine == "comfyui":
+        params["url"] = config.COMFYUI_BASE_URL
+        params["workflow"] = config.COMFYUI_WORKFLOW
+        params["nodes"] = config.COMFYUI_WORKFLOW_NODES
+    else:
+        params["url"] = config.AUTOMATIC1111_BASE_URL
+        params["model"] = form_data.model if form_data.model else params["model"]
+        params["cfg_scale"] = config.AUTOMATIC1111_CFG_SCALE
+        params["sampler"] = config.AUTOMATIC1111_SAMPLER
+        params["scheduler"] = config.AUTOMATIC1111_SCHEDULER
+
+    return get_image_cache_key(params)
+
+
 @router.post("/generations")
 async def image_generations(
     request: Request,
     form_data: GenerateImageForm,
     user=Depends(get_verified_user),
 ):
+    try:
+        # Without a seed every generation is meant to come out different
+        if ENABLE_IMAGE_GENERATION_CACHE and form_data.seed is not None:
+            images, metadata = await image_generation_cache.get(
+                get_image_generation_cache_key(request, form_data),
+                lambda: generate_images(request, form_data, user),
+            )
+        else:
+            images, metadata = await generate_images(request, form_data, user)
+
+        return await upload_images(request, images, metadata, user)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
+
+
+async def generate_images(request: Request, form_data: GenerateImageForm, user):
+    """Returns the generated images, as (file, content type), and their metadata."""
     # if IMAGE_SIZE = 'auto', default WidthxHeight to the 512x512 default
     # This is only relevant when the user has set IMAGE_SIZE to 'auto' with an
     # image model other than gpt-image-1, which is warned about on settings save
@@ -489,209 +699,184 @@ async def image_generations(
         else (512, 512)
     )
 
-    r = None
-    try:
-        if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
-            headers = {}
-            headers["Authorization"] = (
-                f"Bearer {request.app.state.config.IMAGES_OPENAI_API_KEY}"
-            )
-            headers["Content-Type"] = "application/json"
-
-            if ENABLE_FORWARD_USER_INFO_HEADERS:
-                headers["X-Prosper Chat-User-Name"] = quote(user.name, safe=" ")
-                headers["X-Prosper Chat-User-Id"] = user.id
-                headers["X-Prosper Chat-User-Email"] = user.email
-                headers["X-Prosper Chat-User-Role"] = user.role
-
-            data = {
-                "model": (
-                    request.app.state.config.IMAGE_GENERATION_MODEL
-                    if request.app.state.config.IMAGE_GENERATION_MODEL != ""
-                    else "dall-e-2"
-                ),
-                "prompt": form_data.prompt,
-                "n": form_data.n,
-                "size": (
-                    form_data.size
-                    if form_data.size
-                    else request.app.state.config.IMAGE_SIZE
-                ),
-                **(
-                    {}
-                    if "gpt-image-1" in request.app.state.config.IMAGE_GENERATION_MODEL
-                    else {"response_format": "b64_json"}
-                ),
-            }
+    if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
+        headers = {}
+        headers["Authorization"] = (
+            f"Bearer {request.app.state.config.IMAGES_OPENAI_API_KEY}"
+        )
+        headers["Content-Type"] = "application/json"
+
+        if ENABLE_FORWARD_USER_INFO_HEADERS:
+            headers["X-Prosper Chat-User-Name"] = quote(user.name, safe=" ")
+            headers["X-Prosper Chat-User-Id"] = user.id
+            headers["X-Prosper Chat-User-Email"] = user.email
+            headers["X-Prosper Chat-User-Role"] = user.role
+
+        data = {
+            "model": (
+                request.app.state.config.IMAGE_GENERATION_MODEL
+                if request.app.state.config.IMAGE_GENERATION_MODEL != ""
+                else "dall-e-2"
+            ),
+            "prompt": form_data.prompt,
+            "n": form_data.n,
+            "size": (
+                form_data.size
+                if form_data.size
+                else request.app.state.config.IMAGE_SIZE
+            ),
+            **(
+                {}
+                if "gpt-image-1" in request.app.state.config.IMAGE_GENERATION_MODEL
+                else {"response_format": "b64_json"}
+            ),
+        }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations",
-                json=data,
-                headers=headers,
+        # dall-e-3 makes one image per request, the others are requested
+        # alongside it
+        if data["model"] == "dall-e-3" and form_data.n > 1:
+            batches = [{**data, "n": 1}] * form_data.n
+        else:
+            batches = [data]
+
+        responses = await asyncio.gather(
+            *(
+                request_image_api(
+                    "POST",
+                    f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations",
+                    json=batch,
+                    headers=headers,
+                )
+                for batch in batches
             )
+        )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-
+        loaders = []
+        for res in responses:
             for image in res["data"]:
                 if image_url := image.get("url", None):
-                    image_data, content_type = load_url_image_data(image_url, headers)
+                    loaders.append(load_url_image_data(image_url, headers))
                 else:
-                    image_data, content_type = load_b64_image_data(image["b64_json"])
-
-                url = upload_image(request, image_data, content_type, data, user)
-                images.append({"url": url})
-            return images
-
-        elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
-            headers = {}
-            headers["Content-Type"] = "application/json"
-            headers["x-goog-api-key"] = request.app.state.config.IMAGES_GEMINI_API_KEY
-
-            model = get_image_model(request)
-            data = {
-                "instances": {"prompt": form_data.prompt},
-                "parameters": {
-                    "sampleCount": form_data.n,
-                    "outputOptions": {"mimeType": "image/png"},
-                },
-            }
-
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
-                json=data,
-                headers=headers,
-            )
-
-            r.raise_for_status()
-            res = r.json()
+                    loaders.append(
+                        asyncio.to_thread(load_b64_image_data, image["b64_json"])
+                    )
+        return await load_images(loaders), data
 
-            images = []
-            for image in res["predictions"]:
-                image_data, content_type = load_b64_image_data(
-                    image["bytesBase64Encoded"]
-                )
-                url = upload_image(request, image_data, content_type, data, user)
-                images.append({"url": url})
+    elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
+        headers = {}
+        headers["Content-Type"] = "application/json"
+        headers["x-goog-api-key"] = request.app.state.config.IMAGES_GEMINI_API_KEY
+
+        model = await get_image_model(request)
+        data = {
+            "instances": {"prompt": form_data.prompt},
+            "parameters": {
+                "sampleCount": form_data.n,
+                "outputOptions": {"mimeType": "image/png"},
+            },
+        }
+
+        res = await request_image_api(
+            "POST",
+            f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
+            json=data,
+            headers=headers,
+        )
 
-            return images
+        loaders = [
+            asyncio.to_thread(load_b64_image_data, image["bytesBase64Encoded"])
+            for image in res["predictions"]
+        ]
+        return await load_images(loaders), data
 
-        elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
-            data = {
-                "prompt": form_data.prompt,
-                "width": width,
-                "height": height,
-                "n": form_data.n,
+    elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
+        data = {
+            "prompt": form_data.prompt,
+            "width": width,
+            "height": height,
+            "n": form_data.n,
+        }
+
+        if request.app.state.config.IMAGE_STEPS is not None:
+            data["steps"] = request.app.state.config.IMAGE_STEPS
+
+        if form_data.negative_prompt is not None:
+            data["negative_prompt"] = form_data.negative_prompt
+
+        if form_data.seed is not None:
+            data["seed"] = form_data.seed
+
+        form_data = ComfyUIGenerateImageForm(
+            **{
+                "workflow": ComfyUIWorkflow(
+                    **{
+                        "workflow": request.app.state.config.COMFYUI_WORKFLOW,
+                        "nodes": request.app.state.config.COMFYUI_WORKFLOW_NODES,
+                    }
+                ),
+                **data,
             }
+        )
+        res = await comfyui_generate_image(
+            request.app.state.config.IMAGE_GENERATION_MODEL,
+            form_data,
+            user.id,
+            request.app.state.config.COMFYUI_BASE_URL,
+            request.app.state.config.COMFYUI_API_KEY,
+        )
+        log.debug(f"res: {res}")
 
-            if request.app.state.config.IMAGE_STEPS is not None:
-                data["steps"] = request.app.state.config.IMAGE_STEPS
-
-            if form_data.negative_prompt is not None:
-                data["negative_prompt"] = form_data.negative_prompt
-
-            form_data = ComfyUIGenerateImageForm(
-                **{
-                    "workflow": ComfyUIWorkflow(
-                        **{
-                            "workflow": request.app.state.config.COMFYUI_WORKFLOW,
-                            "nodes": request.app.state.config.COMFYUI_WORKFLOW_NODES,
-                        }
-                    ),
-                    **data,
-                }
-            )
-            res = await comfyui_generate_image(
-                request.app.state.config.IMAGE_GENERATION_MODEL,
-                form_data,
-                user.id,
-                request.app.state.config.COMFYUI_BASE_URL,
-                request.app.state.config.COMFYUI_API_KEY,
-            )
-            log.debug(f"res: {res}")
-
-            images = []
+        headers = None
+        if request.app.state.config.COMFYUI_API_KEY:
+            headers = {
+                "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
+            }
 
-            for image in res["data"]:
-                headers = None
-                if request.app.state.config.COMFYUI_API_KEY:
-                    headers = {
-                        "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-                    }
+        loaders = [load_url_image_data(image["url"], headers) for image in res["data"]]
+        return await load_images(loaders), form_data.model_dump(exclude_none=True)
+    elif (
+        request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
+        or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
+    ):
+        if form_data.model:
+            await set_image_model(request, form_data.model)
 
-                image_data, content_type = load_url_image_data(image["url"], headers)
-                url = upload_image(
-                    request,
-                    image_data,
-                    content_type,
-                    form_data.model_dump(exclude_none=True),
-                    user,
-                )
-                images.append({"url": url})
-            return images
-        elif (
-            request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
-            or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
-        ):
-            if form_data.model:
-                set_image_model(request, form_data.model)
-
-            data = {
-                "prompt": form_data.prompt,
-                "batch_size": form_data.n,
-                "width": width,
-                "height": height,
-            }
+        data = {
+            "prompt": form_data.prompt,
+            "batch_size": form_data.n,
+            "width": width,
+            "height": height,
+        }
 
-            if request.app.state.config.IMAGE_STEPS is not None:
-                data["steps"] = request.app.state.config.IMAGE_STEPS
+        if request.app.state.config.IMAGE_STEPS is not None:
+            data["steps"] = request.app.state.config.IMAGE_STEPS
 
-            if form_data.negative_prompt is not None:
-                data["negative_prompt"] = form_data.negative_prompt
+        if form_data.negative_prompt is not None:
+            data["negative_prompt"] = form_data.negative_prompt
 
-            if request.app.state.config.AUTOMATIC1111_CFG_SCALE:
-                data["cfg_scale"] = request.app.state.config.AUTOMATIC1111_CFG_SCALE
+        if form_data.seed is not None:
+            data["seed"] = form_data.seed
 
-            if request.app.state.config.AUTOMATIC1111_SAMPLER:
-                data["sampler_name"] = request.app.state.config.AUTOMATIC1111_SAMPLER
+        if request.app.state.config.AUTOMATIC1111_CFG_SCALE:
+            data["cfg_scale"] = request.app.state.config.AUTOMATIC1111_CFG_SCALE
 
-            if request.app.state.config.AUTOMATIC1111_SCHEDULER:
-                data["scheduler"] = request.app.state.config.AUTOMATIC1111_SCHEDULER
+        if request.app.state.config.AUTOMATIC1111_SAMPLER:
+            data["sampler_name"] = request.app.state.config.AUTOMATIC1111_SAMPLER
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
-                json=data,
-                headers={"authorization": get_automatic1111_api_auth(request)},
-            )
+        if request.app.state.config.AUTOMATIC1111_SCHEDULER:
+            data["scheduler"] = request.app.state.config.AUTOMATIC1111_SCHEDULER
 
-            res = r.json()
-            log.debug(f"res: {res}")
+        res = await request_image_api(
+            "POST",
+            f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
+            json=data,
+            headers={"authorization": get_automatic1111_api_auth(request)},
+        )
+        log.debug(f"res: {res}")
 
-            images = []
+        loaders = [
+            asyncio.to_thread(load_b64_image_data, image) for image in res["images"]
+        ]
+        return await load_images(loaders), {**data, "info": res["info"]}
 
-            for image in res["images"]:
-                image_data, content_type = load_b64_image_data(image)
-                url = upload_image(
-                    request,
-                    image_data,
-                    content_type,
-                    {**data, "info": res["info"]},
-                    user,
-                )
-                images.append({"url": url})
-            return images
-    except Exception as e:
-        error = e
-        if r != None:
-            data = r.json()
-            if "error" in data:
-                error = data["error"]["message"]
-        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(error))
+    return [], {}
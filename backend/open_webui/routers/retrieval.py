@@ -34,6 +34,7 @@ from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
 from open_webui.models.knowledge import Knowledges
+from open_webui.models.vector_collections import VectorCollections
 from open_webui.storage.provider import Storage
 
 from open_webui.tasks import create_task, update_task_progress, update_task_status
@@ -48,6 +49,14 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
 from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.cache import (
+    get_cached_web_chunks,
+    get_cached_web_page,
+    get_chunk_cache_key,
+    get_content_hash,
+    set_cached_web_chunks,
+    set_cached_web_page,
+)
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
 from open_webui.retrieval.web.mojeek import search_mojeek
@@ -83,6 +92,7 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.model_server import get_model
 
 from open_webui.config import (
     ENV,
@@ -103,6 +113,7 @@ from open_webui.env import (
     SENTENCE_TRANSFORMERS_MODEL_KWARGS,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS,
+    WEB_SEARCH_LOADER_TIMEOUT,
 )
 
 from open_webui.constants import ERROR_MESSAGES
@@ -124,11 +135,10 @@ def get_ef(
 ):
     ef = None
     if embedding_model and engine == "":
-        from sentence_transformers import SentenceTransformer
-
         try:
-            ef = SentenceTransformer(
-                get_model_path(embedding_model, auto_update),
+            ef = get_model(
+                "sentence_transformer",
+                model_name_or_path=get_model_path(embedding_model, auto_update),
                 device=DEVICE_TYPE,
                 trust_remote_code=RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
                 backend=SENTENCE_TRANSFORMERS_BACKEND,
@@ -175,11 +185,10 @@ def get_rf(
                     log.error(f"ExternalReranking: {e}")
                     raise Exception(ERROR_MESSAGES.DEFAULT(e))
             else:
-                import sentence_transformers
-
                 try:
-                    rf = sentence_transformers.CrossEncoder(
-                        get_model_path(reranking_model, auto_update),
+                    rf = get_model(
+                        "cross_encoder",
+                        model_name_or_path=get_model_path(reranking_model, auto_update),
                         device=DEVICE_TYPE,
                         trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
                         backend=SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND,
@@ -1131,6 +1140,77 @@ async def update_rag_config(
 ####################################
 
 
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        docs = text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        docs = text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
+        log.info("Using markdown header text splitter")
+
+        # Define headers to split on - covering most common markdown header levels
+        headers_to_split_on = [
+            ("#", "Header 1"),
+            ("##", "Header 2"),
+            ("###", "Header 3"),
+            ("####", "Header 4"),
+            ("#####", "Header 5"),
+            ("######", "Header 6"),
+        ]
+
+        markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=headers_to_split_on,
+            strip_headers=False,  # Keep headers in content for context
+        )
+
+        md_split_docs = []
+        for doc in docs:
+            md_header_splits = markdown_splitter.split_text(doc.page_content)
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=request.app.state.config.CHUNK_SIZE,
+                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+            md_header_splits = text_splitter.split_documents(md_header_splits)
+
+            # Convert back to Document objects, preserving original metadata
+            for split_chunk in md_header_splits:
+                headings_list = []
+                # Extract header values in order based on headers_to_split_on
+                for _, header_meta_key_name in headers_to_split_on:
+                    if header_meta_key_name in split_chunk.metadata:
+                        headings_list.append(split_chunk.metadata[header_meta_key_name])
+
+                md_split_docs.append(
+                    Document(
+                        page_content=split_chunk.page_content,
+                        metadata={**doc.metadata, "headings": headings_list},
+                    )
+                )
+
+        docs = md_split_docs
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+    return docs
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1175,74 +1255,7 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
-            log.info("Using markdown header text splitter")
-
-            # Define headers to split on - covering most common markdown header levels
-            headers_to_split_on = [
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                ("###", "Header 3"),
-                ("####", "Header 4"),
-                ("#####", "Header 5"),
-                ("######", "Header 6"),
-            ]
-
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=headers_to_split_on,
-                strip_headers=False,  # Keep headers in content for context
-            )
-
-            md_split_docs = []
-            for doc in docs:
-                md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
-                )
-                md_header_splits = text_splitter.split_documents(md_header_splits)
-
-                # Convert back to Document objects, preserving original metadata
-                for split_chunk in md_header_splits:
-                    headings_list = []
-                    # Extract header values in order based on headers_to_split_on
-                    for _, header_meta_key_name in headers_to_split_on:
-                        if header_meta_key_name in split_chunk.metadata:
-                            headings_list.append(
-                                split_chunk.metadata[header_meta_key_name]
-                            )
-
-                    md_split_docs.append(
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata, "headings": headings_list},
-                        )
-                    )
-
-            docs = md_split_docs
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+        docs = split_docs(request, docs)
 
     if len(docs) == 0:
         # When no content could be extracted from the document, raise an HTTP
@@ -2031,6 +2044,178 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         raise Exception("No search engine API key found in environment variables")
 
 
+async def load_web_page(
+    request: Request, url: str, semaphore: asyncio.Semaphore
+) -> list[Document]:
+    docs = get_cached_web_page(url)
+    if docs is not None:
+        return docs
+
+    try:
+        async with semaphore:
+            loader = get_web_loader(
+                url,
+                verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
+                requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
+                trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+            )
+            docs = await loader.aload()
+    except Exception as e:
+        log.warning(f"Error loading {url}: {e}")
+        return []
+
+    # Failed fetches come back empty and aren't worth caching
+    docs = [doc for doc in docs if doc.page_content and doc.page_content.strip()]
+    set_cached_web_page(url, docs)
+    return docs
+
+
+async def iter_web_pages(request: Request, urls: list[str]):
+    """
+    Yield (index, docs) for each url as soon as it has loaded, from the page
+    cache when possible. Pages still loading after WEB_SEARCH_LOADER_TIMEOUT
+    are dropped.
+    """
+    semaphore = asyncio.Semaphore(
+        max(request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS or 1, 1)
+    )
+
+    async def _load(idx: int, url: str):
+        return idx, await load_web_page(request, url, semaphore)
+
+    tasks = [asyncio.create_task(_load(idx, url)) for idx, url in enumerate(urls)]
+    try:
+        for next_page in asyncio.as_completed(
+            tasks, timeout=WEB_SEARCH_LOADER_TIMEOUT or None
+        ):
+            try:
+                yield await next_page
+            except asyncio.TimeoutError:
+                pending = sum(1 for task in tasks if not task.done())
+                log.warning(f"web search: dropping {pending} page(s) still loading")
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def get_web_page_chunks(
+    request: Request, docs: list[Document], user=None
+) -> list[dict]:
+    """
+    Split and embed the documents of one web page, reusing the chunks of an
+    identical earlier fetch.
+    """
+    config = request.app.state.config
+    embedding_config = {
+        "engine": config.RAG_EMBEDDING_ENGINE,
+        "model": config.RAG_EMBEDDING_MODEL,
+    }
+    key = get_chunk_cache_key(
+        docs[0].metadata.get("source", ""),
+        get_content_hash(docs),
+        embedding_config=embedding_config,
+        content_prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+        text_splitter=config.TEXT_SPLITTER,
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        tiktoken_encoding_name=config.TIKTOKEN_ENCODING_NAME,
+    )
+    chunks = get_cached_web_chunks(key)
+    if chunks is not None:
+        return chunks
+
+    docs = split_docs(request, docs)
+    if not docs:
+        return []
+
+    embeddings = request.app.state.EMBEDDING_FUNCTION(
+        [doc.page_content.replace("\n", " ") for doc in docs],
+        prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+        user=user,
+    )
+    chunks = [
+        {
+            "text": doc.page_content,
+            "vector": embeddings[idx],
+            "metadata": {**doc.metadata, "embedding_config": embedding_config},
+        }
+        for idx, doc in enumerate(docs)
+    ]
+    set_cached_web_chunks(key, chunks)
+    return chunks
+
+
+async def save_web_page_to_vector_db(
+    request: Request,
+    docs: list[Document],
+    collection_name: str,
+    insert_lock: asyncio.Lock,
+    user=None,
+) -> None:
+    chunks = await run_in_threadpool(get_web_page_chunks, request, docs, user)
+    if not chunks:
+        return
+
+    items = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": chunk["text"],
+            "vector": [float(value) for value in chunk["vector"]],
+            "metadata": chunk["metadata"],
+        }
+        for chunk in chunks
+    ]
+    # Embedding runs concurrently, writes to the collection one page at a time
+    async with insert_lock:
+        await run_in_threadpool(
+            VECTOR_DB_CLIENT.insert, collection_name=collection_name, items=items
+        )
+
+
+async def load_web_pages(request: Request, urls: list[str]) -> list[Document]:
+    pages = {idx: docs async for idx, docs in iter_web_pages(request, urls)}
+    return [doc for idx in sorted(pages) for doc in pages[idx]]
+
+
+async def save_web_pages_to_vector_db(
+    request: Request, urls: list[str], collection_name: str, user=None
+) -> list[Document]:
+    """
+    Load the pages into a fresh collection. Each page is split, embedded and
+    stored as soon as it has loaded, while slower pages are still fetched.
+
+    Returns once every page is stored (or WEB_SEARCH_LOADER_TIMEOUT passed),
+    so retrieval over the collection only starts after the slowest page.
+    """
+    if await run_in_threadpool(
+        VECTOR_DB_CLIENT.has_collection, collection_name=collection_name
+    ):
+        await run_in_threadpool(
+            VECTOR_DB_CLIENT.delete_collection, collection_name=collection_name
+        )
+
+    insert_lock = asyncio.Lock()
+    pages = {}
+    save_tasks = []
+    async for idx, docs in iter_web_pages(request, urls):
+        pages[idx] = docs
+        if docs:
+            save_tasks.append(
+                asyncio.create_task(
+                    save_web_page_to_vector_db(
+                        request, docs, collection_name, insert_lock, user
+                    )
+                )
+            )
+
+    for result in await asyncio.gather(*save_tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            log.debug(f"error saving docs: {result}")
+
+    return [doc for idx in sorted(pages) for doc in pages[idx]]
+
+
 @router.post("/process/web/search")
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
@@ -2071,6 +2256,11 @@ async def process_web_search(
             detail=ERROR_MESSAGES.WEB_SEARCH_ERROR(e),
         )
 
+    # Create a single collection for all documents
+    collection_name = (
+        f"web-search-{calculate_sha256_string('-'.join(form_data.queries))}"[:63]
+    )
+
     try:
         if request.app.state.config.BYPASS_WEB_SEARCH_WEB_LOADER:
             search_results = [
@@ -2090,14 +2280,12 @@ async def process_web_search(
                 for result in search_results
                 if hasattr(result, "snippet") and result.snippet is not None
             ]
+        elif request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
+            docs = await load_web_pages(request, urls)
         else:
-            loader = get_web_loader(
-                urls,
-                verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
-                requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
-                trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+            docs = await save_web_pages_to_vector_db(
+                request, urls, collection_name, user=user
             )
-            docs = await loader.aload()
 
         urls = [
             doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
@@ -2117,14 +2305,9 @@ async def process_web_search(
                 ],
                 "loaded_count": len(docs),
             }
-        else:
-            # Create a single collection for all documents
-            collection_name = (
-                f"web-search-{calculate_sha256_string('-'.join(form_data.queries))}"[
-                    :63
-                ]
-            )
 
+        if request.app.state.config.BYPASS_WEB_SEARCH_WEB_LOADER:
+            # Loaded pages are stored as they arrive, snippets all at once
             try:
                 await run_in_threadpool(
                     save_docs_to_vector_db,
@@ -2137,12 +2320,20 @@ async def process_web_search(
             except Exception as e:
                 log.debug(f"error saving docs: {e}")
 
-            return {
-                "status": True,
-                "collection_names": [collection_name],
-                "filenames": urls,
-                "loaded_count": len(docs),
-            }
+        if user:
+            try:
+                await run_in_threadpool(
+                    VectorCollections.set_collection_owner, collection_name, user.id
+                )
+            except Exception as e:
+                log.warning(f"Failed to record owner of {collection_name}: {e}")
+
+        return {
+            "status": True,
+            "collection_names": [collection_name],
+            "filenames": urls,
+            "loaded_count": len(docs),
+        }
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -2151,6 +2342,19 @@ async def process_web_search(
         )
 
 
+@router.get("/collections/footprint")
+async def get_collections_footprint(user=Depends(get_admin_user)):
+    footprint = await run_in_threadpool(VectorCollections.get_footprint)
+    return {
+        "types": footprint,
+        "total": {
+            "collections": sum(entry.collections for entry in footprint),
+            "item_count": sum(entry.item_count for entry in footprint),
+            "size": sum(entry.size for entry in footprint),
+        },
+    }
+
+
 class QueryDocForm(BaseModel):
     collection_name: str
     query: str
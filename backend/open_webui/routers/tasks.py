@@ -23,6 +23,7 @@ from open_webui.constants import TASKS
 from open_webui.routers.pipelines import process_pipeline_inlet_filter
 
 from open_webui.utils.task import get_task_model_id
+from open_webui.utils.vision_router import schedule_vision_prepass
 
 from open_webui.config import (
     DEFAULT_TITLE_GENERATION_PROMPT_TEMPLATE,
@@ -75,6 +76,7 @@ async def get_task_config(request: Request, user=Depends(get_verified_user)):
         "VISION_ROUTER_ENABLE_ADMINS": request.app.state.config.VISION_ROUTER_ENABLE_ADMINS,
         "VISION_ROUTER_ENABLE_USERS": request.app.state.config.VISION_ROUTER_ENABLE_USERS,
         "VISION_ROUTER_SHOW_STATUS_EVENTS": request.app.state.config.VISION_ROUTER_SHOW_STATUS_EVENTS,
+        "VISION_ROUTER_SPECULATIVE": request.app.state.config.VISION_ROUTER_SPECULATIVE,
     }
 
 
@@ -101,6 +103,7 @@ class TaskConfigForm(BaseModel):
     VISION_ROUTER_ENABLE_ADMINS: bool
     VISION_ROUTER_ENABLE_USERS: bool
     VISION_ROUTER_SHOW_STATUS_EVENTS: bool
+    VISION_ROUTER_SPECULATIVE: Optional[bool] = None
 
 
 @router.post("/config/update")
@@ -165,6 +168,10 @@ async def update_task_config(
     request.app.state.config.VISION_ROUTER_SHOW_STATUS_EVENTS = (
         form_data.VISION_ROUTER_SHOW_STATUS_EVENTS
     )
+    if form_data.VISION_ROUTER_SPECULATIVE is not None:
+        request.app.state.config.VISION_ROUTER_SPECULATIVE = (
+            form_data.VISION_ROUTER_SPECULATIVE
+        )
 
     return {
         "TASK_MODEL": request.app.state.config.TASK_MODEL,
@@ -189,9 +196,25 @@ async def update_task_config(
         "VISION_ROUTER_ENABLE_ADMINS": request.app.state.config.VISION_ROUTER_ENABLE_ADMINS,
         "VISION_ROUTER_ENABLE_USERS": request.app.state.config.VISION_ROUTER_ENABLE_USERS,
         "VISION_ROUTER_SHOW_STATUS_EVENTS": request.app.state.config.VISION_ROUTER_SHOW_STATUS_EVENTS,
+        "VISION_ROUTER_SPECULATIVE": request.app.state.config.VISION_ROUTER_SPECULATIVE,
     }
 
 
+class VisionPrepassForm(BaseModel):
+    model: str
+    images: list[str]
+
+
+@router.post("/vision_router/prepass")
+async def prefetch_vision_prepass(
+    request: Request, form_data: VisionPrepassForm, user=Depends(get_verified_user)
+):
+    scheduled = schedule_vision_prepass(
+        request, user, form_data.model, form_data.images
+    )
+    return {"scheduled": scheduled}
+
+
 @router.post("/title/completions")
 async def generate_title(
     request: Request, form_data: dict, user=Depends(get_verified_user)
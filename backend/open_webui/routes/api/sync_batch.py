@@ -1,18 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
 import os
 import secrets
-from typing import Any, Dict, List
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from open_webui.models.auths import Auths
 from open_webui.models.groups import Groups
 from open_webui.models.users import Users
 from open_webui.utils.auth import get_password_hash
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 router = APIRouter()
 
 OWUI_AUTH_TOKEN = os.getenv("OWUI_AUTH_TOKEN")
 DEFAULT_GROUP_NAME = os.getenv("OWUI_DEFAULT_GROUP", "Student")
+DEACTIVATED_ROLE = "pending"
+PASSWORD_HASH_WORKERS = int(os.getenv("OWUI_SYNC_HASH_WORKERS", "0")) or None
+PASSWORD_HASH_CHUNK_SIZE = 32
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        # Spawned, forking would copy the running server's loop and threads
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+async def _hash_passwords_in_pool(passwords: List[str]) -> List[str]:
+    """
+    bcrypt-hash `passwords` in a process pool, so a large sync neither blocks
+    the event loop nor runs on a single core.
+    """
+    if not passwords:
+        return []
+
+    loop = asyncio.get_running_loop()
+    executor = _get_hash_executor()
+    chunks = await asyncio.gather(
+        *[
+            loop.run_in_executor(
+                executor,
+                _hash_passwords,
+                passwords[i : i + PASSWORD_HASH_CHUNK_SIZE],
+            )
+            for i in range(0, len(passwords), PASSWORD_HASH_CHUNK_SIZE)
+        ]
+    )
+    return [hashed for chunk in chunks for hashed in chunk]
+
+
+async def _set_new_user_passwords(new_users: List[Dict[str, Any]]) -> None:
+    """
+    Hash the passwords given for new users. Synced accounts without one sign
+    in through Supabase; they share the hash of one random, never disclosed
+    secret per batch instead of costing a bcrypt round each.
+    """
+    given = [user for user in new_users if user.get("password")]
+    hashes = await _hash_passwords_in_pool([user["password"] for user in given])
+    for user, hashed in zip(given, hashes):
+        user["password"] = hashed
+
+    without = [user for user in new_users if not user.get("password")]
+    if without:
+        hashed = await asyncio.to_thread(get_password_hash, secrets.token_urlsafe(32))
+        for user in without:
+            user["password"] = hashed
 
 
 def _normalize_token(value: str) -> str:
@@ -20,8 +91,7 @@ def _normalize_token(value: str) -> str:
     return value.split(" ", 1)[1].strip() if value.lower().startswith("bearer ") else value
 
 
-@router.post("/upsert-users")
-async def upsert_users(payload: Dict[str, List[Dict[str, Any]]], request: Request):
+def _check_token(request: Request) -> None:
     auth = _normalize_token(request.headers.get("Authorization"))
     expected = _normalize_token(OWUI_AUTH_TOKEN)
 
@@ -32,6 +102,11 @@ async def upsert_users(payload: Dict[str, List[Dict[str, Any]]], request: Reques
             print(f"Auth mismatch expected={masked_expected} got={masked_auth}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
+
+@router.post("/upsert-users")
+async def upsert_users(payload: Dict[str, List[Dict[str, Any]]], request: Request):
+    _check_token(request)
+
     users = payload.get("users")
     if not isinstance(users, list):
         raise HTTPException(status_code=400, detail="Invalid payload")
@@ -42,52 +117,140 @@ async def upsert_users(payload: Dict[str, List[Dict[str, Any]]], request: Reques
     failed = 0
     results = []
 
-    default_group = Groups.get_group_by_name(DEFAULT_GROUP_NAME)
+    groups_by_name = {group.name.lower(): group for group in Groups.get_groups()}
+    default_group = groups_by_name.get(DEFAULT_GROUP_NAME.lower())
 
+    # Normalize the payload; later entries for the same email win and each
+    # email gets a single result
+    planned: Dict[str, Dict[str, Any]] = {}
     for item in users:
         email = (item.get("email") or "").strip().lower()
         if not email:
             failed += 1
             results.append({"email": None, "status": "missing-email"})
             continue
+        if email not in planned:
+            results.append({"email": email, "status": None})
 
-        name = (item.get("name") or email.split("@")[0]).strip()
-        role = (item.get("role") or "user").strip()
         group_name = (item.get("group") or "").strip()
+        group = groups_by_name.get(group_name.lower()) if group_name else None
+        password = item.get("password")
+
+        planned[email] = {
+            "email": email,
+            "name": (item.get("name") or email.split("@")[0]).strip(),
+            "role": (item.get("role") or "user").strip(),
+            "password": password if isinstance(password, str) else None,
+            "group": group or default_group,
+        }
 
-        group = Groups.get_group_by_name(group_name) if group_name else None
-        if not group:
-            group = default_group
-
-        try:
-            existing = Users.get_user_by_email(email)
-            if existing:
-                Users.update_user_by_id(existing.id, {"name": name, "email": email, "role": role})
-                if group:
-                    Groups.sync_groups_by_group_ids(existing.id, [group.id])
-                updated += 1
-                results.append({"email": email, "status": "updated"})
-            else:
-                password = secrets.token_urlsafe(12)
-                hashed = get_password_hash(password)
-                new_user = Auths.insert_new_auth(
-                    email=email,
-                    password=hashed,
-                    name=name,
-                    role=role,
-                )
-                if new_user and group:
-                    Groups.sync_groups_by_group_ids(new_user.id, [group.id])
-                created += 1
-                results.append({"email": email, "status": "created"})
-        except Exception as e:  # pragma: no cover - unexpected errors
+    existing_by_email = {
+        user.email: user for user in Users.get_users_by_emails(list(planned.keys()))
+    }
+
+    new_users = []
+    updated_users = []
+    assignments = {}
+    for email, entry in planned.items():
+        existing = existing_by_email.get(email)
+        if existing:
+            user_id = existing.id
+            updated_users.append(
+                {
+                    "id": user_id,
+                    "name": entry["name"],
+                    "email": email,
+                    "role": entry["role"],
+                }
+            )
+            entry["status"] = "updated"
+        else:
+            user_id = str(uuid.uuid4())
+            new_users.append(
+                {
+                    "id": user_id,
+                    "name": entry["name"],
+                    "email": email,
+                    "role": entry["role"],
+                    "password": entry["password"],
+                }
+            )
+            entry["status"] = "created"
+
+        if entry["group"]:
+            assignments[user_id] = entry["group"].id
+
+    error = None
+    try:
+        await _set_new_user_passwords(new_users)
+        # Users, auths and group memberships are committed together
+        Auths.upsert_auths_bulk(new_users, updated_users, assignments)
+    except Exception as e:
+        log.exception(e)
+        error = str(e)
+
+    for result in results:
+        if result["email"] is None:
+            continue
+        if error:
             failed += 1
-            results.append({"email": email, "status": "failed", "error": str(e)})
+            result.update({"status": "failed", "error": error})
+            continue
 
-    return {
+        entry = planned[result["email"]]
+        result["status"] = entry["status"]
+        if result["status"] == "created":
+            created += 1
+        else:
+            updated += 1
+
+    content = {
         "received": received,
         "created": created,
         "updated": updated,
         "failed": failed,
         "results": results,
     }
+    if error:
+        # Nothing of the batch was written; make the caller retry it
+        return JSONResponse(status_code=500, content=content)
+    return content
+
+
+@router.post("/deactivate-users")
+async def deactivate_users(payload: Dict[str, List[Any]], request: Request):
+    """
+    Sets the role of existing users to pending. Unknown emails are skipped,
+    this never creates an account; neither are admins demoted.
+    """
+    _check_token(request)
+
+    emails = payload.get("emails")
+    if not isinstance(emails, list):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    normalized = list(
+        dict.fromkeys(
+            email.strip().lower()
+            for email in emails
+            if isinstance(email, str) and email.strip()
+        )
+    )
+    existing = Users.get_users_by_emails(normalized)
+    deactivated = [
+        {"id": user.id, "role": DEACTIVATED_ROLE}
+        for user in existing
+        if user.role not in ("admin", DEACTIVATED_ROLE)
+    ]
+
+    try:
+        Auths.upsert_auths_bulk([], deactivated)
+    except Exception as e:  # pragma: no cover - unexpected errors
+        log.exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "received": len(emails),
+        "deactivated": len(deactivated),
+        "missing": len(normalized) - len(existing),
+    }
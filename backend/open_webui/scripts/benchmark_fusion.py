@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of merging retrieval results: the previous sha256/dict merge
+against fuse_query_results (score and rrf).
+
+    python -m open_webui.scripts.benchmark_fusion --collections 20 --k 50
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+from open_webui.retrieval.fusion import fuse_query_results
+
+
+def sha256_merge(query_results: list[dict], k: int) -> dict:
+    # The merge used before fuse_query_results, kept for comparison
+    combined = dict()
+    for data in query_results:
+        for distance, document, metadata in zip(
+            data["distances"][0], data["documents"][0], data["metadatas"][0]
+        ):
+            if isinstance(document, str):
+                doc_hash = hashlib.sha256(document.encode()).hexdigest()
+                if doc_hash not in combined or distance > combined[doc_hash][0]:
+                    combined[doc_hash] = (distance, document, metadata)
+
+    combined = sorted(combined.values(), key=lambda x: x[0], reverse=True)
+    distances, documents, metadatas = zip(*combined[:k]) if combined else ([], [], [])
+    return {
+        "distances": [list(distances)],
+        "documents": [list(documents)],
+        "metadatas": [list(metadatas)],
+    }
+
+
+def make_results(rng, collections: int, queries: int, k: int, chunk_size: int):
+    results = []
+    for collection in range(collections):
+        # Queries of one collection overlap heavily, like real multi-query RAG
+        pool = rng.choice(k * 3, size=k * 2, replace=False)
+        for _ in range(queries):
+            ids = rng.choice(pool, size=k, replace=False)
+            distances = np.sort(rng.random(k))[::-1]
+            results.append(
+                {
+                    "ids": [[f"{collection}-{i}" for i in ids]],
+                    "distances": [distances.tolist()],
+                    "documents": [
+                        [f"{collection}-{i} " + "x" * chunk_size for i in ids]
+                    ],
+                    "metadatas": [[{"source": f"{collection}-{i}"} for i in ids]],
+                }
+            )
+    return results
+
+
+def bench(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = make_results(rng, args.collections, args.queries, args.k, args.chunk_size)
+    entries = sum(len(r["ids"][0]) for r in results)
+    print(
+        f"{len(results)} result lists, {entries} entries, "
+        f"{args.chunk_size}-char chunks, k={args.k}"
+    )
+
+    for name, fn in [
+        ("sha256 merge", lambda: sha256_merge(results, args.k)),
+        ("fuse score", lambda: fuse_query_results(results, args.k)),
+        ("fuse rrf", lambda: fuse_query_results(results, args.k, method="rrf")),
+    ]:
+        print(f"{name:<14} {bench(fn, args.repeat):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
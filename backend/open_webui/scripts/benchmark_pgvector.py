@@ -0,0 +1,103 @@
+"""
+Benchmark pgvector ingest throughput and search recall@k.
+
+Runs against PGVECTOR_DB_URL with the current PGVECTOR_* settings, e.g.
+
+    PGVECTOR_DB_URL=postgresql://... PGVECTOR_INDEX_METHOD=hnsw \\
+        python -m open_webui.scripts.benchmark_pgvector --rows 20000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+
+def make_vectors(rng, count: int, dim: int, centers: np.ndarray) -> np.ndarray:
+    # Clustered data, closer to real embeddings than uniform noise
+    vectors = centers[rng.integers(0, len(centers), count)]
+    vectors = vectors + rng.normal(scale=0.3, size=(count, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000, help="chunks in total")
+    parser.add_argument("--collections", type=int, default=4)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--insert-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+    rng = np.random.default_rng(0)
+    client = PgvectorClient()
+    run_id = uuid.uuid4().hex[:8]
+    centers = rng.normal(size=(32, args.dim))
+
+    # Uneven collection sizes: one large collection and a few small ones
+    sizes = [args.rows // 2] + [args.rows // 2 // (args.collections - 1)] * (
+        args.collections - 1
+    )
+    collections = {}
+
+    start = time.perf_counter()
+    for idx, size in enumerate(sizes):
+        name = f"benchmark-{run_id}-{idx}"
+        vectors = make_vectors(rng, size, args.dim, centers)
+        ids = [str(uuid.uuid4()) for _ in range(size)]
+        for i in range(0, size, args.insert_size):
+            client.insert(
+                name,
+                [
+                    {
+                        "id": ids[j],
+                        "text": f"chunk {j}",
+                        "vector": vectors[j].tolist(),
+                        "metadata": {"source": name, "index": j},
+                    }
+                    for j in range(i, min(i + args.insert_size, size))
+                ],
+            )
+        collections[name] = (ids, vectors)
+    elapsed = time.perf_counter() - start
+    print(
+        f"ingest: {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:.0f} rows/s)"
+    )
+
+    # Inserts only schedule these in the background, build them upfront
+    start = time.perf_counter()
+    client.rebuild_vector_index()
+    for name in collections:
+        client.update_collection_index(name)
+    print(f"index: {time.perf_counter() - start:.2f}s")
+
+    try:
+        for name, (ids, vectors) in collections.items():
+            queries = make_vectors(rng, args.queries, args.dim, centers)
+            truth = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+
+            start = time.perf_counter()
+            result = client.search(name, queries.tolist(), limit=args.k)
+            elapsed = time.perf_counter() - start
+
+            recall = np.mean(
+                [
+                    len({ids[i] for i in expected} & set(found)) / args.k
+                    for expected, found in zip(truth, result.ids)
+                ]
+            )
+            print(
+                f"{name} ({len(ids)} rows): recall@{args.k} {recall:.3f}, "
+                f"{elapsed / args.queries * 1000:.1f}ms/query"
+            )
+    finally:
+        for name in collections:
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Bring the pgvector indexes in line with the PGVECTOR_* settings.
+
+Rebuilds the vector index when PGVECTOR_INDEX_METHOD or its parameters
+changed, then gives collections above PGVECTOR_PARTIAL_INDEX_THRESHOLD
+chunks their own partial index. All indexes are built concurrently, so this
+can run against a live deployment, e.g.
+
+    PGVECTOR_DB_URL=postgresql://... PGVECTOR_INDEX_METHOD=hnsw \\
+        python -m open_webui.scripts.pgvector_indexes
+"""
+
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--skip-collections",
+        action="store_true",
+        help="only rebuild the vector index, not the per-collection ones",
+    )
+    args = parser.parse_args()
+
+    from sqlalchemy import select
+
+    from open_webui.retrieval.vector.dbs.pgvector import DocumentChunk, PgvectorClient
+
+    client = PgvectorClient()
+    client.rebuild_vector_index()
+
+    if not args.skip_collections:
+        collection_names = (
+            client.session.execute(select(DocumentChunk.collection_name).distinct())
+            .scalars()
+            .all()
+        )
+        client.session.rollback()  # read-only transaction
+        for collection_name in collection_names:
+            client.update_collection_index(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -206,6 +206,11 @@ def get_active_user_ids():
     return list(USER_POOL.keys())
 
 
+def get_active_user_count() -> int:
+    """Get the number of active users without listing them."""
+    return len(USER_POOL)
+
+
 def get_user_active_status(user_id):
     """Check if a user is currently active."""
     return user_id in USER_POOL
@@ -55,6 +55,10 @@ class StorageProvider(ABC):
     def delete_all_files(self) -> None:
         pass
 
+    @abstractmethod
+    def delete_files_by_prefix(self, prefix: str) -> None:
+        pass
+
     @abstractmethod
     def delete_file(self, file_path: str) -> None:
         pass
@@ -104,6 +108,21 @@ class LocalStorageProvider(StorageProvider):
         else:
             log.warning(f"Directory {UPLOAD_DIR} not found in local storage.")
 
+    @staticmethod
+    def delete_files_by_prefix(prefix: str) -> None:
+        """Handles deletion of the files whose name starts with prefix from local storage."""
+        if not os.path.exists(UPLOAD_DIR):
+            return
+        for filename in os.listdir(UPLOAD_DIR):
+            if not filename.startswith(prefix):
+                continue
+            file_path = os.path.join(UPLOAD_DIR, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.unlink(file_path)
+            except Exception as e:
+                log.exception(f"Failed to delete {file_path}. Reason: {e}")
+
 
 class S3StorageProvider(StorageProvider):
     def __init__(self):
@@ -212,6 +231,23 @@ class S3StorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
 
+    def delete_files_by_prefix(self, prefix: str) -> None:
+        """Handles deletion of the files whose name starts with prefix from S3 storage."""
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(
+                Bucket=self.bucket_name, Prefix=os.path.join(self.key_prefix, prefix)
+            ):
+                for content in page.get("Contents", []):
+                    self.s3_client.delete_object(
+                        Bucket=self.bucket_name, Key=content["Key"]
+                    )
+        except ClientError as e:
+            raise RuntimeError(f"Error deleting files from S3: {e}")
+
+        # Always delete from local storage
+        LocalStorageProvider.delete_files_by_prefix(prefix)
+
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
     def _extract_s3_key(self, full_file_path: str) -> str:
         return "/".join(full_file_path.split("//")[1].split("/")[1:])
@@ -285,6 +321,17 @@ class GCSStorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
 
+    def delete_files_by_prefix(self, prefix: str) -> None:
+        """Handles deletion of the files whose name starts with prefix from GCS storage."""
+        try:
+            for blob in self.bucket.list_blobs(prefix=prefix):
+                blob.delete()
+        except NotFound as e:
+            raise RuntimeError(f"Error deleting files from GCS: {e}")
+
+        # Always delete from local storage
+        LocalStorageProvider.delete_files_by_prefix(prefix)
+
 
 class AzureStorageProvider(StorageProvider):
     def __init__(self):
@@ -355,6 +402,17 @@ class AzureStorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
 
+    def delete_files_by_prefix(self, prefix: str) -> None:
+        """Handles deletion of the files whose name starts with prefix from Azure Blob Storage."""
+        try:
+            for blob in self.container_client.list_blobs(name_starts_with=prefix):
+                self.container_client.delete_blob(blob.name)
+        except Exception as e:
+            raise RuntimeError(f"Error deleting files from Azure Blob Storage: {e}")
+
+        # Always delete from local storage
+        LocalStorageProvider.delete_files_by_prefix(prefix)
+
 
 def get_storage_provider(storage_provider: str):
     if storage_provider == "local":
@@ -178,6 +178,153 @@ class TestChats(AbstractPostgresTest):
         assert data["title"] == "Just another title"
         assert data["user_id"] == "2"
 
+    def test_search_chats(self):
+        from open_webui.models.chats import ChatForm
+
+        self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                **{
+                    "chat": {
+                        "title": "Kubernetes networking",
+                        "history": {
+                            "currentId": "1",
+                            "messages": {
+                                "1": {"id": "1", "content": "How do pods talk?"}
+                            },
+                        },
+                    }
+                }
+            ),
+        )
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/search?text=kube"))
+        assert response.status_code == 200
+        assert [chat["title"] for chat in response.json()] == ["Kubernetes networking"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search?text=pod networ")
+            )
+        assert [chat["title"] for chat in response.json()] == ["Kubernetes networking"]
+
+        with mock_webui_user(id="3"):
+            response = self.fast_api_client.get(self.create_url("/search?text=kube"))
+        assert response.json() == []
+
+    def test_search_index_follows_completed_messages(self):
+        from open_webui.models.chats import ChatForm
+
+        chat = self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                **{
+                    "chat": {
+                        "title": "Streaming",
+                        "history": {"currentId": "1", "messages": {}},
+                    }
+                }
+            ),
+        )
+
+        def search(text):
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.get(
+                    self.create_url(f"/search?text={text}")
+                )
+            return [chat["title"] for chat in response.json()]
+
+        # Partial content saved while streaming isn't indexed yet
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "1", {"content": "photosynthesis"}, reindex=False
+        )
+        assert search("photosynthesis") == []
+
+        self.chats.update_chat_search_index_by_id(chat.id)
+        assert search("photosynthesis") == ["Streaming"]
+
+        # Metadata updates don't touch the index, content changes do
+        self.chats.add_message_status_to_chat_by_id_and_message_id(
+            chat.id, "1", {"description": "done"}
+        )
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "1", {"content": "chlorophyll"}
+        )
+        assert search("photosynthesis") == []
+        assert search("chlorophyll") == ["Streaming"]
+
+    def insert_tagged_chats(self, count, tag_name):
+        from open_webui.models.chats import ChatForm
+
+        for i in range(count):
+            chat = self.chats.insert_new_chat(
+                "2", ChatForm(**{"chat": {"title": f"chat {i}"}})
+            )
+            self.chats.add_chat_tag_by_id_and_user_id_and_tag_name(
+                chat.id, "2", tag_name
+            )
+
+    def test_get_chats_by_tag_pages_keep_tag(self):
+        from open_webui.models.tags import Tags
+
+        self.insert_tagged_chats(3, "work")
+        with mock_webui_user(id="2"):
+            first = self.fast_api_client.post(
+                self.create_url("/tags"), json={"name": "work", "limit": 2}
+            ).json()
+            last = first[-1]
+            second = self.fast_api_client.post(
+                self.create_url("/tags"),
+                json={
+                    "name": "work",
+                    "limit": 2,
+                    "cursor": f"{last['updated_at']}:{last['id']}",
+                },
+            ).json()
+            past_end = self.fast_api_client.post(
+                self.create_url("/tags"), json={"name": "work", "skip": 10}
+            ).json()
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert {chat["title"] for chat in first + second} == {
+            "chat 0",
+            "chat 1",
+            "chat 2",
+        }
+        assert past_end == []
+        assert Tags.get_tag_by_name_and_user_id("work", "2") is not None
+
+    def test_get_chats_by_unused_tag_deletes_it(self):
+        from open_webui.models.tags import Tags
+
+        Tags.insert_new_tag("unused", "2")
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/tags"), json={"name": "unused"}
+            )
+        assert response.json() == []
+        assert Tags.get_tag_by_name_and_user_id("unused", "2") is None
+
+    def test_cursor_with_filter(self):
+        self.insert_tagged_chats(3, "work")
+        self.chats.archive_all_chats_by_user_id("2")
+        with mock_webui_user(id="2"):
+            first = self.fast_api_client.get(
+                self.create_url("/archived?query=chat")
+            ).json()
+            cursor = f"{first[1]['updated_at']}:{first[1]['id']}"
+            rest = self.fast_api_client.get(
+                self.create_url(f"/archived?query=chat&cursor={cursor}")
+            ).json()
+            rejected = self.fast_api_client.get(
+                self.create_url(
+                    f"/archived?order_by=title&direction=asc&cursor={cursor}"
+                )
+            )
+        assert [chat["id"] for chat in rest] == [chat["id"] for chat in first[2:]]
+        assert rejected.status_code == 400
+
     def test_delete_chat_by_id(self):
         chat_id = self.chats.get_chats()[0].id
         with mock_webui_user(id="2"):
@@ -50,3 +50,144 @@ class TestSyncBatch(AbstractPostgresTest):
         assert user is not None
         group = Groups.get_group_by_name("Student")
         assert user.id in group.user_ids
+
+    def test_sync_batch_updates_and_moves_groups(self):
+        Groups.insert_new_group("owner", GroupForm(name="Teacher", description="d"))
+        payload = {
+            "users": [
+                {"name": "Jane Doe", "email": "jane@example.com", "group": "Student"},
+                {"name": "John Doe", "email": "john@example.com", "group": "Student"},
+            ]
+        }
+        response = self.fast_api_client.post(
+            self.create_url(""),
+            json=payload,
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 200
+        assert response.json()["created"] == 2
+
+        payload = {
+            "users": [
+                {"name": "Jane Roe", "email": "JANE@example.com", "group": "Teacher"},
+                {"name": "New User", "email": "new@example.com"},
+                {"name": "No Email"},
+            ]
+        }
+        response = self.fast_api_client.post(
+            self.create_url(""),
+            json=payload,
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 3
+        assert data["created"] == 1
+        assert data["updated"] == 1
+        assert data["failed"] == 1
+        assert [r["status"] for r in data["results"]] == [
+            "updated",
+            "created",
+            "missing-email",
+        ]
+
+        jane = Users.get_user_by_email("jane@example.com")
+        john = Users.get_user_by_email("john@example.com")
+        new = Users.get_user_by_email("new@example.com")
+        assert jane.name == "Jane Roe"
+
+        student = Groups.get_group_by_name("Student")
+        teacher = Groups.get_group_by_name("Teacher")
+        assert jane.id in teacher.user_ids
+        assert jane.id not in student.user_ids
+        assert john.id in student.user_ids
+        assert new.id in student.user_ids
+
+    def test_sync_batch_deduplicates_emails(self):
+        payload = {
+            "users": [
+                {"name": "Jane Doe", "email": "jane@example.com"},
+                {"name": "Jane Roe", "email": "JANE@example.com"},
+            ]
+        }
+        response = self.fast_api_client.post(
+            self.create_url(""),
+            json=payload,
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 2
+        assert data["created"] == 1
+        assert [r["status"] for r in data["results"]] == ["created"]
+        assert Users.get_user_by_email("jane@example.com").name == "Jane Roe"
+
+    def test_sync_batch_failed_group_sync_writes_nothing(self, monkeypatch):
+        def apply_user_assignments(db, assignments):
+            raise RuntimeError("group sync failed")
+
+        monkeypatch.setattr(Groups, "apply_user_assignments", apply_user_assignments)
+        payload = {"users": [{"name": "Jane Doe", "email": "jane@example.com"}]}
+        response = self.fast_api_client.post(
+            self.create_url(""),
+            json=payload,
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 500
+        data = response.json()
+        assert data["failed"] == 1
+        assert data["results"][0]["error"] == "group sync failed"
+        assert Users.get_user_by_email("jane@example.com") is None
+
+    def test_sync_batch_hashes_one_secret_per_batch(self):
+        from open_webui.models.auths import Auths
+        from open_webui.utils.auth import verify_password
+
+        payload = {
+            "users": [
+                {"name": "Jane Doe", "email": "jane@example.com"},
+                {"name": "John Doe", "email": "john@example.com"},
+                {"name": "Own", "email": "own@example.com", "password": "s3cret"},
+            ]
+        }
+        response = self.fast_api_client.post(
+            self.create_url(""),
+            json=payload,
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 200
+        assert response.json()["created"] == 3
+
+        jane = Users.get_user_by_email("jane@example.com")
+        john = Users.get_user_by_email("john@example.com")
+        assert Auths.authenticate_user("own@example.com", "s3cret") is not None
+        assert Auths.authenticate_user("jane@example.com", "") is None
+
+        from open_webui.internal.db import get_db
+        from open_webui.models.auths import Auth
+
+        with get_db() as db:
+            hashes = {
+                auth.id: auth.password
+                for auth in db.query(Auth).filter(Auth.id.in_([jane.id, john.id]))
+            }
+        assert hashes[jane.id] == hashes[john.id]
+        assert not verify_password("s3cret", hashes[jane.id])
+
+    def test_deactivate_users_skips_unknown_emails(self):
+        Users.insert_new_user(
+            id="jane",
+            name="Jane Doe",
+            email="jane@example.com",
+            profile_image_url="/user.png",
+            role="user",
+        )
+        response = self.fast_api_client.post(
+            "/api/internal/deactivate-users",
+            json={"emails": ["JANE@example.com", "unknown@example.com"]},
+            headers={"Authorization": "Bearer testtoken"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"received": 2, "deactivated": 1, "missing": 1}
+        assert Users.get_user_by_email("jane@example.com").role == "pending"
+        assert Users.get_user_by_email("unknown@example.com") is None
@@ -96,6 +96,14 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename).exists()
         assert not (upload_dir / self.filename_extra).exists()
 
+    def test_delete_files_by_prefix(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        (upload_dir / self.filename).write_bytes(self.file_content)
+        (upload_dir / self.filename_extra).write_bytes(self.file_content)
+        self.Storage.delete_files_by_prefix("test_")
+        assert (upload_dir / self.filename).exists()
+        assert not (upload_dir / self.filename_extra).exists()
+
 
 @mock_aws
 class TestS3StorageProvider:
@@ -187,6 +195,20 @@ class TestS3StorageProvider:
         assert not (upload_dir / self.filename).exists()
         assert not (upload_dir / self.filename_extra).exists()
 
+    def test_delete_files_by_prefix(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
+
+        self.Storage.delete_files_by_prefix("test_")
+        assert (upload_dir / self.filename).exists()
+        assert not (upload_dir / self.filename_extra).exists()
+        self.s3_client.Object(self.Storage.bucket_name, self.filename).load()
+        with pytest.raises(ClientError) as exc:
+            self.s3_client.Object(self.Storage.bucket_name, self.filename_extra).load()
+        assert exc.value.response["Error"]["Code"] == "404"
+
     def test_init_without_credentials(self, monkeypatch):
         """Test that S3StorageProvider can initialize without explicit credentials."""
         # Temporarily unset the environment variables
@@ -0,0 +1,27 @@
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from open_webui.utils.audio.transcription import get_chunk_ranges
+
+
+def tone(duration_ms):
+    return (
+        Sine(440).to_audio_segment(duration=duration_ms).set_frame_rate(16000)
+    ).set_channels(1)
+
+
+def silence(duration_ms):
+    return AudioSegment.silent(duration_ms, frame_rate=16000)
+
+
+class TestChunkRanges:
+    def test_short_audio_is_one_chunk(self):
+        assert get_chunk_ranges(tone(3000), 10_000) == [(0, 3000)]
+
+    def test_cuts_at_last_pause_before_limit(self):
+        audio = tone(9000) + silence(1000) + tone(9000) + silence(1000) + tone(9000)
+        assert get_chunk_ranges(audio, 25_000) == [(0, 19500), (19500, 29000)]
+
+    def test_hard_cut_without_pauses(self):
+        ranges = get_chunk_ranges(tone(30_000), 12_000)
+        assert ranges == [(0, 12_000), (12_000, 24_000), (24_000, 30_000)]
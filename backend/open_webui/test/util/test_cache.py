@@ -0,0 +1,57 @@
+import time
+
+from open_webui.utils.cache import LRUCache
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(maxsize=4, ttl=0.05)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=10)
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_bounded_by_bytes(self):
+        cache = LRUCache(maxsize=10, maxbytes=10, getsizeof=len)
+        cache.set("a", b"12345")
+        cache.set("b", b"12345")
+        cache.set("c", b"1")
+        assert cache.get("a") is None
+        assert cache.currbytes == 6
+        cache.set("d", b"x" * 11)
+        assert cache.get("d") is None
+        assert cache.pop("b") == b"12345"
+        assert cache.currbytes == 1
+
+    def test_oversized_value_replaces_previous(self):
+        cache = LRUCache(maxsize=10, maxbytes=10, getsizeof=len)
+        cache.set("a", b"12345")
+        cache.set("a", b"x" * 11)
+        assert cache.get("a") is None
+        assert cache.currbytes == 0
+
+    def test_on_evict(self):
+        evicted = []
+        cache = LRUCache(
+            maxsize=1, ttl=0.05, on_evict=lambda k, v: evicted.append((k, v))
+        )
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert evicted == [("a", 1)]
+        time.sleep(0.06)
+        assert cache.get("b") is None
+        assert evicted == [("a", 1), ("b", 2)]
+        cache.set("c", 3)
+        assert cache.pop("c") == 3
+        assert len(evicted) == 2
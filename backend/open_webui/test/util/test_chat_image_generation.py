@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import middleware
+from open_webui.utils.middleware import (
+    chat_image_generation_handler,
+    get_image_generation_seed,
+)
+
+
+def make_request():
+    config = SimpleNamespace(ENABLE_IMAGE_PROMPT_GENERATION=False)
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+
+async def emit(event):
+    pass
+
+
+class TestImageGenerationSeed:
+    def test_chat_seed_wins_over_model_seed(self):
+        model = {"info": {"params": {"seed": 7}}}
+
+        assert get_image_generation_seed({"seed": 42}, model) == 42
+        assert get_image_generation_seed({"options": {"seed": 42}}, model) == 42
+        assert get_image_generation_seed({}, model) == 7
+
+    def test_unseeded(self):
+        assert get_image_generation_seed({}, {}) is None
+        assert get_image_generation_seed({"seed": "random"}, None) is None
+
+
+class TestChatImageGenerationHandler:
+    @pytest.mark.asyncio
+    async def test_seed_reaches_image_generation(self, monkeypatch):
+        forms = []
+
+        async def image_generations(request, form_data, user):
+            forms.append(form_data)
+            return [{"url": "/image.png"}]
+
+        monkeypatch.setattr(middleware, "image_generations", image_generations)
+        extra_params = {
+            "__event_emitter__": emit,
+            "__model__": {"info": {"params": {"seed": 7}}},
+        }
+
+        for seed in (42, None):
+            form_data = {
+                "model": "model",
+                "messages": [{"role": "user", "content": "a cat"}],
+            }
+            if seed is not None:
+                form_data["seed"] = seed
+            await chat_image_generation_handler(
+                make_request(), form_data, extra_params, None
+            )
+
+        assert [(form.prompt, form.seed) for form in forms] == [
+            ("a cat", 42),
+            ("a cat", 7),
+        ]
@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import io
+import json
+import time
+import uuid
+
+import pytest
+from aiohttp import WSMsgType, web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.code_interpreter import JupyterKernelPool
+
+
+class FakeJupyter:
+    """Stand-in Jupyter server: kernels are namespaces code is exec'd in."""
+
+    def __init__(self):
+        self.kernels = {}
+        self.created = 0
+        self.deleted = []
+        self.create_delay = 0
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/kernels", self.create_kernel)
+        self.app.router.add_get("/api/kernels/{id}", self.get_kernel)
+        self.app.router.add_delete("/api/kernels/{id}", self.delete_kernel)
+        self.app.router.add_post("/api/kernels/{id}/interrupt", self.interrupt)
+        self.app.router.add_get("/api/kernels/{id}/channels", self.channels)
+
+    async def create_kernel(self, request):
+        await asyncio.sleep(self.create_delay)
+        kernel_id = uuid.uuid4().hex
+        self.kernels[kernel_id] = {}
+        self.created += 1
+        return web.json_response({"id": kernel_id, "execution_state": "idle"})
+
+    async def get_kernel(self, request):
+        if request.match_info["id"] not in self.kernels:
+            return web.json_response({}, status=404)
+        return web.json_response({"execution_state": "idle"})
+
+    async def delete_kernel(self, request):
+        self.kernels.pop(request.match_info["id"], None)
+        self.deleted.append(request.match_info["id"])
+        return web.Response(status=204)
+
+    async def interrupt(self, request):
+        return web.Response(status=204)
+
+    async def channels(self, request):
+        namespace = self.kernels[request.match_info["id"]]
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            message = json.loads(msg.data)
+            parent_header = message["header"]
+
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                exec(message["content"]["code"], namespace)
+
+            await ws.send_json(
+                {
+                    "parent_header": parent_header,
+                    "msg_type": "stream",
+                    "content": {"name": "stdout", "text": stdout.getvalue()},
+                }
+            )
+            await ws.send_json(
+                {
+                    "parent_header": parent_header,
+                    "msg_type": "status",
+                    "content": {"execution_state": "idle"},
+                }
+            )
+        return ws
+
+
+@contextlib.asynccontextmanager
+async def fake_jupyter():
+    fake = FakeJupyter()
+    server = TestServer(fake.app)
+    await server.start_server()
+    fake.url = str(server.make_url("/"))
+    try:
+        yield fake
+    finally:
+        await server.close()
+
+
+class TestJupyterKernelPool:
+    @pytest.mark.asyncio
+    async def test_chat_keeps_its_kernel(self):
+        async with fake_jupyter() as jupyter:
+            pool = JupyterKernelPool(jupyter.url, warm_size=0)
+            try:
+                await pool.execute("x = 41", chat_id="chat-1")
+                result = await pool.execute("print(x + 1)", chat_id="chat-1")
+                other = await pool.execute("print('x' in dir())", chat_id="chat-2")
+
+                assert result.stdout == "42"
+                assert other.stdout == "False"
+                assert jupyter.created == 2
+            finally:
+                await pool.close()
+
+            assert jupyter.kernels == {}
+
+    @pytest.mark.asyncio
+    async def test_executions_without_chat_get_a_fresh_kernel(self):
+        async with fake_jupyter() as jupyter:
+            pool = JupyterKernelPool(jupyter.url, warm_size=0)
+            try:
+                await pool.execute("x = 1")
+                result = await pool.execute("print('x' in dir())")
+
+                assert result.stdout == "False"
+                assert len(jupyter.deleted) == 2
+                assert pool.size == 0
+            finally:
+                await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_warm_kernels_are_used_first(self):
+        async with fake_jupyter() as jupyter:
+            pool = JupyterKernelPool(jupyter.url, warm_size=1)
+            try:
+                await pool.refill()
+                warm = pool.warm[0]
+
+                await pool.execute("print(1)", chat_id="chat-1")
+
+                assert pool.chat_kernels["chat-1"] is warm
+            finally:
+                await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_chat_when_full(self):
+        async with fake_jupyter() as jupyter:
+            pool = JupyterKernelPool(jupyter.url, max_size=2, warm_size=0)
+            try:
+                await pool.execute("print(1)", chat_id="chat-1")
+                await pool.execute("print(2)", chat_id="chat-2")
+                await pool.execute("print(1)", chat_id="chat-1")
+                await pool.execute("print(3)", chat_id="chat-3")
+
+                assert set(pool.chat_kernels) == {"chat-1", "chat-3"}
+                assert len(jupyter.kernels) == 2
+            finally:
+                await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_reaps_idle_and_dead_kernels(self):
+        async with fake_jupyter() as jupyter:
+            pool = JupyterKernelPool(jupyter.url, warm_size=1, idle_timeout=60)
+            try:
+                await pool.refill()
+                await pool.execute("print(1)", chat_id="chat-1")
+                await pool.execute("print(2)", chat_id="chat-2")
+                await pool.refill()
+                # No more pre-starting in the background from here on
+                pool.warm_size = 0
+                await pool._refill_task
+
+                pool.chat_kernels["chat-1"].last_used = time.monotonic() - 120
+                jupyter.kernels.pop(pool.warm[0].id)
+
+                await pool.reap()
+
+                assert set(pool.chat_kernels) == {"chat-2"}
+                assert pool.warm == []
+                assert pool.size == 1
+            finally:
+                await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_kernel_started_for_a_timed_out_execution_is_kept(self):
+        async with fake_jupyter() as jupyter:
+            jupyter.create_delay = 0.2
+            pool = JupyterKernelPool(jupyter.url, warm_size=0)
+            try:
+                result = await pool.execute("print(1)", timeout=0.05)
+                assert result.stderr.startswith("Error")
+
+                for _ in range(50):
+                    if pool.warm:
+                        break
+                    await asyncio.sleep(0.02)
+                assert pool.size == 1
+                assert len(pool.warm) == 1
+
+                result = await pool.execute("print(2)", chat_id="chat-1")
+                assert result.stdout == "2"
+                assert jupyter.created == 1
+            finally:
+                await pool.close()
+
+            assert pool.size == 0
+            assert jupyter.kernels == {}
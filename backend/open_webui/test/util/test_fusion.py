@@ -0,0 +1,43 @@
+from open_webui.retrieval.fusion import fuse_query_results
+
+
+def make_result(ids, distances):
+    return {
+        "ids": [ids],
+        "distances": [distances],
+        "documents": [[f"doc {i}" for i in ids]],
+        "metadatas": [[{"id": i} for i in ids]],
+    }
+
+
+class TestFuseQueryResults:
+    def test_dedups_by_id_keeping_best_score(self):
+        result = fuse_query_results(
+            [make_result(["a", "b"], [0.9, 0.5]), make_result(["b", "c"], [0.8, 0.7])],
+            k=10,
+        )
+        assert result["documents"][0] == ["doc a", "doc b", "doc c"]
+        assert result["distances"][0] == [0.9, 0.8, 0.7]
+
+    def test_dedups_by_text_without_ids(self):
+        results = [make_result(["a"], [0.4]), make_result(["a"], [0.6])]
+        for r in results:
+            del r["ids"]
+        result = fuse_query_results(results, k=10)
+        assert result["documents"][0] == ["doc a"]
+        assert result["distances"][0] == [0.6]
+
+    def test_rrf_prefers_chunks_ranked_by_several_lists(self):
+        results = [
+            make_result(["a", "b", "c"], [0.99, 0.5, 0.4]),
+            make_result(["b", "c", "d"], [0.6, 0.5, 0.4]),
+            make_result(["c", "b", "e"], [0.7, 0.5, 0.4]),
+        ]
+        assert fuse_query_results(results, k=2)["documents"][0] == ["doc a", "doc c"]
+        assert fuse_query_results(results, k=2, method="rrf")["documents"][0] == [
+            "doc b",
+            "doc c",
+        ]
+
+    def test_empty(self):
+        assert fuse_query_results([], k=5)["documents"] == [[]]
@@ -0,0 +1,158 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+from open_webui.utils.images import cache as image_cache
+from open_webui.utils.images.cache import ImageGenerationCache, get_image_cache_key
+
+
+class FakeStorage:
+    def __init__(self, path):
+        self.path = path
+
+    def upload_file(self, file, filename, tags):
+        contents = file.read()
+        file_path = os.path.join(self.path, filename)
+        with open(file_path, "wb") as f:
+            f.write(contents)
+        return contents, file_path
+
+    def get_file(self, file_path):
+        return file_path
+
+    def delete_file(self, file_path):
+        os.remove(file_path)
+
+    def delete_files_by_prefix(self, prefix):
+        for filename in os.listdir(self.path):
+            if filename.startswith(prefix):
+                os.remove(os.path.join(self.path, filename))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FakeStorage(str(tmp_path))
+    monkeypatch.setattr(image_cache, "Storage", storage)
+    return storage
+
+
+def make_generate(calls, data=b"image"):
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [(io.BytesIO(data), "image/png")], {"prompt": "cat"}
+
+    return generate
+
+
+def read_images(images):
+    contents = []
+    for file, _ in images:
+        contents.append(file.read())
+        file.close()
+    return contents
+
+
+class TestImageGenerationCache:
+    def test_key_ignores_order(self):
+        assert get_image_cache_key({"a": 1, "b": 2}) == get_image_cache_key(
+            {"b": 2, "a": 1}
+        )
+        assert get_image_cache_key({"seed": 1}) != get_image_cache_key({"seed": 2})
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_generate_once(self, storage):
+        cache = ImageGenerationCache()
+        calls = []
+
+        results = await asyncio.gather(
+            cache.get("key", make_generate(calls)),
+            cache.get("key", make_generate(calls)),
+        )
+        again, metadata = await cache.get("key", make_generate(calls))
+
+        assert len(calls) == 1
+        assert [read_images(images) for images, _ in results] == [[b"image"]] * 2
+        assert read_images(again) == [b"image"]
+        assert metadata == {"prompt": "cat"}
+
+    @pytest.mark.asyncio
+    async def test_eviction_deletes_stored_images(self, storage, tmp_path):
+        cache = ImageGenerationCache(maxsize=1)
+
+        read_images((await cache.get("a", make_generate([])))[0])
+        read_images((await cache.get("b", make_generate([])))[0])
+
+        assert [path.name for path in tmp_path.iterdir()] == [
+            "image-generation-b-0.png"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_sweep_deletes_images_of_previous_runs(self, storage, tmp_path):
+        (tmp_path / "image-generation-old-0.png").write_bytes(b"old")
+        (tmp_path / "upload.png").write_bytes(b"upload")
+        cache = ImageGenerationCache()
+        calls = []
+        read_images((await cache.get("key", make_generate(calls)))[0])
+
+        cache.sweep()
+        images, _ = await cache.get("key", make_generate(calls))
+
+        assert len(calls) == 2
+        assert read_images(images) == [b"image"]
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "image-generation-key-0.png",
+            "upload.png",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_regenerates_when_stored_image_is_gone(self, storage, tmp_path):
+        cache = ImageGenerationCache()
+        calls = []
+
+        read_images((await cache.get("key", make_generate(calls)))[0])
+        os.remove(tmp_path / "image-generation-key-0.png")
+        images, _ = await cache.get("key", make_generate(calls, b"new"))
+
+        assert len(calls) == 2
+        assert read_images(images) == [b"new"]
+
+    @pytest.mark.asyncio
+    async def test_waiter_takes_over_cancelled_generation(self, storage):
+        cache = ImageGenerationCache()
+        calls = []
+
+        async def slow_generate():
+            calls.append(1)
+            await asyncio.sleep(10)
+
+        leader = asyncio.create_task(cache.get("key", slow_generate))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get("key", make_generate(calls)))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        images, _ = await waiter
+
+        assert leader.cancelled()
+        assert len(calls) == 2
+        assert read_images(images) == [b"image"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_generation_running(self, storage):
+        cache = ImageGenerationCache()
+        calls = []
+
+        leader = asyncio.create_task(cache.get("key", make_generate(calls)))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get("key", make_generate(calls)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        images, _ = await leader
+
+        assert waiter.cancelled()
+        assert len(calls) == 1
+        assert read_images(images) == [b"image"]
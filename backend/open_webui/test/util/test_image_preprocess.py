@@ -0,0 +1,128 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from open_webui.utils.images import preprocess
+from open_webui.utils.images.preprocess import (
+    preprocess_image_bytes,
+    preprocess_image_url,
+    preprocess_message_images,
+)
+
+
+def make_image(size, mode="RGB", format="PNG", **kwargs):
+    # Noise so the encoders can't shrink it to nothing
+    image = Image.frombytes(
+        mode, size, bytes(i * 7 % 251 for i in range(size[0] * size[1] * len(mode)))
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **kwargs)
+    return buffer.getvalue()
+
+
+def open_image(data):
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def data_url(data, mime_type="image/png"):
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode()}"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    preprocess._cache.clear()
+
+
+class TestPreprocessImageBytes:
+    def test_downscales_longest_side(self):
+        data, mime_type = preprocess_image_bytes(
+            make_image((400, 100)), "image/png", max_dimension=200
+        )
+
+        assert mime_type == "image/jpeg"
+        assert open_image(data).size == (200, 50)
+
+    def test_keeps_alpha_as_png(self):
+        data, mime_type = preprocess_image_bytes(
+            make_image((400, 400), mode="RGBA"), "image/png", max_dimension=100
+        )
+
+        assert mime_type == "image/png"
+        assert open_image(data).mode == "RGBA"
+
+    def test_converts_palette_and_grayscale_to_jpeg(self):
+        for mode in ("P", "L"):
+            data, mime_type = preprocess_image_bytes(
+                make_image((400, 400), mode=mode), "image/png", max_dimension=100
+            )
+
+            assert mime_type == "image/jpeg"
+            assert open_image(data).mode == "RGB"
+
+    def test_keeps_small_images_that_wouldnt_shrink(self):
+        # JPEG headers alone are bigger than this PNG
+        original = make_image((4, 4))
+
+        assert preprocess_image_bytes(original, "image/png") == (
+            original,
+            "image/png",
+        )
+
+    def test_applies_exif_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 degrees clockwise
+        original = make_image((200, 100), format="JPEG", exif=exif.tobytes())
+
+        data, _ = preprocess_image_bytes(original, "image/jpeg", max_dimension=100)
+
+        assert open_image(data).size == (50, 100)
+
+    def test_leaves_animations_alone(self):
+        frames = [Image.new("RGB", (400, 400), color) for color in ("red", "blue")]
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:])
+        original = buffer.getvalue()
+
+        assert preprocess_image_bytes(original, "image/gif", max_dimension=100) == (
+            original,
+            "image/gif",
+        )
+
+
+class TestPreprocessImageUrl:
+    @pytest.mark.asyncio
+    async def test_passes_through_other_urls(self):
+        for url in ("https://example.com/cat.png", "data:text/plain;base64,aGk="):
+            assert await preprocess_image_url(url) == url
+
+    @pytest.mark.asyncio
+    async def test_keeps_undecodable_images(self):
+        url = data_url(b"not an image")
+
+        assert await preprocess_image_url(url) == url
+
+    @pytest.mark.asyncio
+    async def test_rewrites_content_parts_and_ollama_images(self, monkeypatch):
+        monkeypatch.setattr(preprocess, "ENABLE_IMAGE_PREPROCESSING", True)
+        image = make_image((4000, 100))
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "image_url", "image_url": {"url": data_url(image)}}
+                ],
+                "images": [base64.b64encode(image).decode(), "http://x/y.png"],
+            }
+        ]
+
+        await preprocess_message_images(messages)
+
+        url = messages[0]["content"][0]["image_url"]["url"]
+        assert url.startswith("data:image/jpeg;base64,")
+        resized = open_image(base64.b64decode(messages[0]["images"][0]))
+        assert resized.size == (1568, 39)
+        assert messages[0]["images"][1] == "http://x/y.png"
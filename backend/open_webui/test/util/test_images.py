@@ -0,0 +1,48 @@
+import base64
+
+import aiohttp
+import pytest
+
+from open_webui.routers import images
+from open_webui.routers.images import (
+    close_image_session,
+    get_image_session,
+    load_b64_image_data,
+)
+
+DATA = bytes(range(256)) * 40
+
+
+class TestLoadB64ImageData:
+    def test_decodes_data_uri(self):
+        file, mime_type = load_b64_image_data(
+            "data:image/jpeg;base64," + base64.b64encode(DATA).decode()
+        )
+
+        assert mime_type == "image/jpeg"
+        assert file.read() == DATA
+
+    def test_decodes_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(images, "B64_DECODE_CHUNK_SIZE", 8)
+        encoded = base64.b64encode(DATA).decode()
+        # Line breaks shift the chunk boundaries off the base64 quanta
+        wrapped = "\n".join(encoded[i : i + 76] for i in range(0, len(encoded), 76))
+
+        file, mime_type = load_b64_image_data(wrapped)
+
+        assert mime_type == "image/png"
+        assert file.read() == DATA
+
+    def test_invalid_data(self):
+        assert load_b64_image_data("data:image/png;base64,abc") == (None, None)
+
+
+class TestImageSession:
+    @pytest.mark.asyncio
+    async def test_cookies_are_not_shared(self):
+        session = get_image_session()
+        try:
+            assert session is get_image_session()
+            assert isinstance(session.cookie_jar, aiohttp.DummyCookieJar)
+        finally:
+            await close_image_session()
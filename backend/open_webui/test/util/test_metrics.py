@@ -0,0 +1,25 @@
+from open_webui.utils.telemetry import metrics as telemetry_metrics
+
+
+class TestCachedGauges:
+    def setup_method(self):
+        telemetry_metrics._gauge_values.clear()
+
+    def test_nothing_observed_before_first_refresh(self):
+        assert telemetry_metrics._observe_cached("users.total") == []
+
+    def test_refresh_uses_counts(self, monkeypatch):
+        monkeypatch.setattr(telemetry_metrics.Users, "get_num_users", lambda: 42)
+        monkeypatch.setattr(
+            telemetry_metrics.Users,
+            "get_users",
+            lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError),
+        )
+        monkeypatch.setattr(telemetry_metrics, "get_active_user_count", lambda: 3)
+
+        telemetry_metrics.refresh_gauges()
+
+        [total] = telemetry_metrics._observe_cached("users.total")
+        [active] = telemetry_metrics._observe_cached("users.active")
+        assert total.value == 42
+        assert active.value == 3
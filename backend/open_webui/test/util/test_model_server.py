@@ -0,0 +1,125 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from open_webui.utils import model_server
+from open_webui.utils.model_server import BatchedModel, ModelServerClient, RemoteModel
+
+
+class FakeEncoder:
+    def __init__(self, dim=3, delay=0):
+        self.dim = dim
+        self.delay = delay
+        self.batches = []
+
+    def encode(self, sentences, prompt=None, batch_size=32):
+        if isinstance(sentences, str):
+            return self.encode([sentences], prompt, batch_size)[0]
+        time.sleep(self.delay)
+        self.batches.append(len(sentences))
+        offset = 100 if prompt else 0
+        return np.array([[len(s) + offset] * self.dim for s in sentences])
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        model_server, "load_model", lambda kind, kwargs: FakeEncoder(**kwargs)
+    )
+    socket_path = str(tmp_path / "models.sock")
+    threading.Thread(
+        target=model_server.serve, args=(socket_path, 64, 20), daemon=True
+    ).start()
+
+    client = ModelServerClient(socket_path)
+    for _ in range(50):
+        try:
+            client.request({"op": "ping"})
+            break
+        except OSError:
+            time.sleep(0.05)
+    return client
+
+
+class TestModelServer:
+    def test_encode_single_and_list(self, client):
+        model = RemoteModel(client, "sentence_transformer", {"dim": 2})
+        assert model.encode("abc").tolist() == [3, 3]
+        assert model.encode(["a", "bb"], prompt="q: ").tolist() == [
+            [101, 101],
+            [102, 102],
+        ]
+
+    def test_models_are_loaded_once(self, client):
+        first = RemoteModel(client, "sentence_transformer", {"dim": 2})
+        second = RemoteModel(client, "sentence_transformer", {"dim": 2})
+        assert first.key == second.key
+
+    def test_concurrent_requests_are_batched(self, client):
+        model = RemoteModel(client, "sentence_transformer", {"dim": 4})
+        results = {}
+
+        def encode(i):
+            results[i] = model.encode("x" * i).tolist()
+
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {i: [i] * 4 for i in range(8)}
+
+    def test_errors_are_raised(self, client):
+        model = RemoteModel(client, "sentence_transformer", {"dim": 2})
+        with pytest.raises(RuntimeError):
+            model._call("missing_method", "x")
+
+    def test_slow_reply_falls_back_to_local_model(self, client):
+        client = ModelServerClient(client.socket_path, timeout=0.1)
+        model = RemoteModel(client, "sentence_transformer", {"dim": 2, "delay": 0.3})
+
+        assert model.encode("abc").tolist() == [3, 3]
+        assert model.key is None
+        # The timed out connection is not reused
+        assert client.request({"op": "ping"}) == "pong"
+
+    def test_unreachable_server_falls_back_to_local_model(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            model_server, "load_model", lambda kind, kwargs: FakeEncoder(**kwargs)
+        )
+        client = ModelServerClient(str(tmp_path / "missing.sock"))
+        model = RemoteModel(client, "sentence_transformer", {"dim": 2})
+
+        assert model.key is None
+        assert model.encode(["a", "bb"]).tolist() == [[1, 1], [2, 2]]
+
+
+class TestBatchedModel:
+    def test_concurrent_encodes_share_a_forward_pass(self):
+        encoder = FakeEncoder(dim=2)
+        model = BatchedModel(encoder, "test", batch_size=64, batch_wait_ms=50)
+        barrier = threading.Barrier(8)
+        results = {}
+
+        def encode(i):
+            barrier.wait()
+            results[i] = model.encode("x" * i, prompt="q: ").tolist()
+
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {i: [100 + i] * 2 for i in range(8)}
+        assert sum(encoder.batches) == 8
+        assert len(encoder.batches) < 8
+
+    def test_attributes_pass_through(self):
+        encoder = FakeEncoder(dim=5)
+        model = BatchedModel(encoder, "test", batch_size=4, batch_wait_ms=1)
+        assert model.dim == 5
+        assert model.encode([]).shape == (0,)
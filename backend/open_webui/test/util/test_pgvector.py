@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import (
+    PgvectorClient,
+    get_collection_index_name,
+    get_collection_index_sql,
+    get_vector_index_using,
+    is_vector_index_current,
+)
+
+# As reported by pg_indexes
+IVFFLAT_INDEXDEF = (
+    "CREATE INDEX idx_document_chunk_vector ON public.document_chunk "
+    "USING ivfflat (vector vector_cosine_ops) WITH (lists='100')"
+)
+HNSW_INDEXDEF = (
+    "CREATE INDEX idx_document_chunk_vector ON public.document_chunk "
+    "USING hnsw (vector vector_cosine_ops) WITH (m='16', ef_construction='64')"
+)
+
+
+@pytest.fixture
+def index_config(monkeypatch):
+    def configure(method, **params):
+        monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_METHOD", method)
+        for key, value in params.items():
+            monkeypatch.setattr(pgvector, f"PGVECTOR_{key}", value)
+
+    configure("ivfflat", IVFFLAT_LISTS=100, HNSW_M=16, HNSW_EF_CONSTRUCTION=64)
+    return configure
+
+
+class TestVectorIndexDDL:
+    def test_ivfflat(self, index_config):
+        assert get_vector_index_using() == (
+            "ivfflat (vector vector_cosine_ops) WITH (lists = 100)"
+        )
+        assert is_vector_index_current(IVFFLAT_INDEXDEF)
+        assert not is_vector_index_current(HNSW_INDEXDEF)
+
+    def test_hnsw(self, index_config):
+        index_config("hnsw")
+
+        assert get_vector_index_using() == (
+            "hnsw (vector vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        )
+        assert is_vector_index_current(HNSW_INDEXDEF)
+        assert not is_vector_index_current(IVFFLAT_INDEXDEF)
+
+    def test_changed_parameters_are_outdated(self, index_config):
+        index_config("ivfflat", IVFFLAT_LISTS=200)
+        assert not is_vector_index_current(IVFFLAT_INDEXDEF)
+
+        index_config("hnsw", HNSW_M=32)
+        assert not is_vector_index_current(HNSW_INDEXDEF)
+
+    def test_none_disables_indexes(self, index_config):
+        index_config("none")
+
+        assert get_vector_index_using() is None
+        assert get_collection_index_sql("docs") is None
+        assert not is_vector_index_current(IVFFLAT_INDEXDEF)
+
+    def test_collection_index(self, index_config):
+        sql = get_collection_index_sql("it's")
+        name = get_collection_index_name("it's")
+
+        assert sql.startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ")
+        assert "USING ivfflat (vector vector_cosine_ops) WITH (lists = 100)" in sql
+        assert sql.endswith("WHERE collection_name = 'it''s'")
+        assert get_collection_index_name("a") != get_collection_index_name("b")
+
+
+class TestCollectionIndexScheduling:
+    def test_builds_in_background_deduplicating_pending(
+        self, index_config, monkeypatch
+    ):
+        monkeypatch.setattr(pgvector, "PGVECTOR_PARTIAL_INDEX_THRESHOLD", 10)
+        client = PgvectorClient.__new__(PgvectorClient)
+        client._index_queue = pgvector.queue.Queue()
+        client._index_pending = set()
+        client._index_lock = threading.Lock()
+        client._index_thread = None
+
+        started = threading.Event()
+        release = threading.Event()
+        built = []
+
+        def update_collection_index(collection_name):
+            started.set()
+            release.wait(1)
+            built.append((collection_name, threading.current_thread().name))
+
+        client.update_collection_index = update_collection_index
+        client.schedule_collection_index("docs")
+        assert started.wait(1)
+        # Queued again while building, but only once
+        client.schedule_collection_index("docs")
+        client.schedule_collection_index("docs")
+        client.schedule_collection_index("other")
+        release.set()
+        for _ in range(100):
+            if len(built) == 3:
+                break
+            time.sleep(0.01)
+
+        assert [name for name, _ in built] == ["docs", "docs", "other"]
+        assert {thread for _, thread in built} == {"pgvector-index"}
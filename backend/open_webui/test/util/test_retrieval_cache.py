@@ -0,0 +1,99 @@
+from open_webui.retrieval import cache as retrieval_cache
+from open_webui.retrieval.cache import (
+    bump_collection_version,
+    clear_retrieval_cache,
+    get_cached_retrieval_result,
+    get_retrieval_cache_key,
+    set_cached_retrieval_result,
+)
+
+
+class TestRetrievalCache:
+    def setup_method(self):
+        clear_retrieval_cache()
+
+    def test_key_depends_on_params(self):
+        key = get_retrieval_cache_key(["a", "b"], ["q"], k=4)
+        assert key == get_retrieval_cache_key(["b", "a"], ["q"], k=4)
+        assert key != get_retrieval_cache_key(["a", "b"], ["q"], k=5)
+        assert key != get_retrieval_cache_key(["a", "b"], ["q2"], k=4)
+
+    def test_mutation_invalidates(self):
+        result = {"documents": [["doc"]], "metadatas": [[{}]], "distances": [[1.0]]}
+        key = get_retrieval_cache_key(["kb-1"], ["q"], k=4)
+        set_cached_retrieval_result(key, result)
+
+        cached = get_cached_retrieval_result(key)
+        assert cached == result
+        cached["documents"][0].append("other")
+        assert get_cached_retrieval_result(key) == result
+
+        bump_collection_version("kb-1")
+        assert (
+            get_cached_retrieval_result(get_retrieval_cache_key(["kb-1"], ["q"], k=4))
+            is None
+        )
+
+    def test_reset_invalidates_everything(self):
+        key = get_retrieval_cache_key(["kb-2"], ["q"], k=4)
+        set_cached_retrieval_result(key, {"documents": [["doc"]]})
+        bump_collection_version(None)
+        assert get_retrieval_cache_key(["kb-2"], ["q"], k=4) != key
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hmget(self, name, keys):
+        values = self.hashes.get(name, {})
+        return [str(values[key]) if key in values else None for key in keys]
+
+    def hincrby(self, name, key, amount):
+        values = self.hashes.setdefault(name, {})
+        values[key] = values.get(key, 0) + amount
+        return values[key]
+
+
+class BrokenRedis:
+    def hmget(self, name, keys):
+        raise ConnectionError("unavailable")
+
+    hincrby = hmget
+
+
+class TestSharedRetrievalCacheVersions:
+    def setup_method(self):
+        clear_retrieval_cache()
+
+    def test_versions_are_shared_through_redis(self, monkeypatch):
+        redis = FakeRedis()
+        monkeypatch.setattr(retrieval_cache, "_redis", redis)
+        key = get_retrieval_cache_key(["kb-1"], ["q"], k=4)
+
+        # Another worker writes to the collection
+        redis.hincrby(retrieval_cache.REDIS_VERSIONS_KEY, "kb-1", 1)
+        assert get_retrieval_cache_key(["kb-1"], ["q"], k=4) != key
+
+        key = get_retrieval_cache_key(["kb-1"], ["q"], k=4)
+        bump_collection_version(None)
+        assert get_retrieval_cache_key(["kb-1"], ["q"], k=4) != key
+        assert redis.hashes[retrieval_cache.REDIS_VERSIONS_KEY] == {"kb-1": 1, "": 1}
+
+    def test_unreadable_versions_bypass_the_cache(self, monkeypatch):
+        monkeypatch.setattr(retrieval_cache, "_redis", BrokenRedis())
+
+        key = get_retrieval_cache_key(["kb-1"], ["q"], k=4)
+        set_cached_retrieval_result(key, {"documents": [["doc"]]})
+
+        assert key is None
+        assert get_cached_retrieval_result(key) is None
+
+    def test_failed_bump_clears_the_local_cache(self, monkeypatch):
+        key = get_retrieval_cache_key(["kb-1"], ["q"], k=4)
+        set_cached_retrieval_result(key, {"documents": [["doc"]]})
+        monkeypatch.setattr(retrieval_cache, "_redis", BrokenRedis())
+
+        bump_collection_version("kb-1")
+
+        assert get_cached_retrieval_result(key) is None
@@ -0,0 +1,264 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.retrieval import utils as retrieval_utils
+from open_webui.retrieval.cache import clear_retrieval_cache
+from open_webui.retrieval.utils import get_sources_from_items
+
+ADMIN = SimpleNamespace(id="admin", role="admin")
+USER = SimpleNamespace(id="user", role="user")
+
+
+def make_file(id, content):
+    return SimpleNamespace(id=id, filename=f"{id}.txt", data={"content": content})
+
+
+class FakeFiles:
+    def __init__(self, files):
+        self.files = {file.id: file for file in files}
+        self.calls = []
+
+    def get_files_by_ids(self, ids):
+        self.calls.append(sorted(ids))
+        return [self.files[id] for id in ids if id in self.files]
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_note_by_id(self, id):
+        return self.rows.get(id)
+
+    get_knowledge_by_id = get_note_by_id
+
+
+@pytest.fixture
+def retrieval(monkeypatch):
+    searches = []
+
+    def query_collection(collection_names, queries, embedding_function, k):
+        searches.append(("vector", sorted(collection_names)))
+        return {
+            "documents": [[f"{name} chunk" for name in sorted(collection_names)]],
+            "metadatas": [[{"source": name} for name in sorted(collection_names)]],
+            "distances": [[0.9] * len(collection_names)],
+        }
+
+    def get_all_items_from_collections(collection_names):
+        searches.append(("all", sorted(collection_names)))
+        return {
+            "documents": [[f"{name} all" for name in sorted(collection_names)]],
+            "metadatas": [[{"source": name} for name in sorted(collection_names)]],
+        }
+
+    files = FakeFiles([make_file("f1", "file one"), make_file("f2", "file two")])
+    notes = FakeTable(
+        {
+            "n1": SimpleNamespace(
+                id="n1",
+                title="Note",
+                user_id="user",
+                access_control=None,
+                data={"content": {"md": "# note"}},
+            ),
+            "n2": SimpleNamespace(
+                id="n2",
+                title="Private",
+                user_id="other",
+                access_control={},
+                data={"content": {"md": "secret"}},
+            ),
+        }
+    )
+    knowledges = FakeTable(
+        {"kb": SimpleNamespace(access_control=None, data={"file_ids": ["f1", "f2"]})}
+    )
+
+    monkeypatch.setattr(retrieval_utils, "query_collection", query_collection)
+    monkeypatch.setattr(
+        retrieval_utils,
+        "get_all_items_from_collections",
+        get_all_items_from_collections,
+    )
+    monkeypatch.setattr(retrieval_utils, "Files", files)
+    monkeypatch.setattr(retrieval_utils, "Notes", notes)
+    monkeypatch.setattr(retrieval_utils, "Knowledges", knowledges)
+    monkeypatch.setattr(
+        retrieval_utils,
+        "has_access",
+        lambda user_id, type, access_control: access_control is None,
+    )
+    monkeypatch.setattr(
+        retrieval_utils, "touch_ephemeral_collections", lambda names: None
+    )
+    clear_retrieval_cache()
+    return SimpleNamespace(searches=searches, files=files)
+
+
+def make_request(bypass=False):
+    config = SimpleNamespace(
+        BYPASS_EMBEDDING_AND_RETRIEVAL=bypass,
+        RAG_EMBEDDING_ENGINE="",
+        RAG_EMBEDDING_MODEL="model",
+        RAG_RERANKING_ENGINE="",
+        RAG_RERANKING_MODEL="",
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+
+def get_sources(items, user=USER, full_context=False, bypass=False):
+    return get_sources_from_items(
+        request=make_request(bypass),
+        items=items,
+        queries=["question"],
+        embedding_function=lambda queries, prefix=None: [[0.0]] * len(queries),
+        k=4,
+        reranking_function=None,
+        k_reranker=4,
+        r=0.0,
+        hybrid_bm25_weight=0.5,
+        hybrid_search=False,
+        full_context=full_context,
+        user=user,
+    )
+
+
+class TestGetSourcesFromItems:
+    def test_text_items(self, retrieval):
+        sources = get_sources(
+            [
+                {
+                    "type": "text",
+                    "file": {"data": {"content": "uploaded", "meta": {"a": 1}}},
+                },
+                {"type": "text", "id": "t1", "name": "Text", "content": "typed"},
+            ]
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["uploaded"],
+            ["typed"],
+        ]
+        assert sources[1]["metadata"] == [{"file_id": "t1", "name": "Text"}]
+        assert retrieval.searches == []
+
+    def test_notes_respect_access(self, retrieval):
+        sources = get_sources(
+            [{"type": "note", "id": "n1"}, {"type": "note", "id": "n2"}]
+        )
+
+        assert [source["document"] for source in sources] == [["# note"]]
+        assert len(get_sources([{"type": "note", "id": "n2"}], user=ADMIN)) == 1
+
+    def test_file_items_are_searched(self, retrieval):
+        sources = get_sources(
+            [
+                {"type": "file", "id": "f1"},
+                {"type": "file", "id": "old", "legacy": True},
+            ]
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["file-f1 chunk"],
+            ["old chunk"],
+        ]
+        assert sources[0]["distances"] == [0.9]
+        assert sorted(retrieval.searches) == [
+            ("vector", ["file-f1"]),
+            ("vector", ["old"]),
+        ]
+
+    def test_full_context_files_are_loaded_in_one_query(self, retrieval):
+        sources = get_sources(
+            [
+                {"type": "file", "id": "f1", "context": "full"},
+                {"type": "file", "id": "f2", "context": "full"},
+                {
+                    "type": "file",
+                    "id": "f3",
+                    "context": "full",
+                    "file": {"data": {"content": "inline"}},
+                },
+                {"type": "file", "id": "missing", "context": "full"},
+            ]
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["file one"],
+            ["file two"],
+            ["inline"],
+        ]
+        assert retrieval.files.calls == [["f1", "f2", "missing"]]
+        assert retrieval.searches == []
+
+    def test_collections(self, retrieval):
+        sources = get_sources(
+            [
+                {"type": "collection", "id": "kb"},
+                {"type": "collection", "legacy": True, "collection_names": ["a", "b"]},
+                {"type": "collection", "id": "kb", "context": "full"},
+            ]
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["kb chunk"],
+            ["a chunk", "b chunk"],
+            ["file one", "file two"],
+        ]
+        assert (
+            get_sources([{"type": "collection", "id": "missing", "context": "full"}])
+            == []
+        )
+
+    def test_bypass_embedding_loads_full_context(self, retrieval):
+        sources = get_sources(
+            [{"type": "file", "id": "f1"}, {"type": "collection", "id": "kb"}],
+            bypass=True,
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["file one"],
+            ["file one", "file two"],
+        ]
+        assert retrieval.searches == []
+
+    def test_web_search_and_collection_names(self, retrieval):
+        sources = get_sources(
+            [
+                {"docs": [{"content": "page", "metadata": {"source": "url"}}]},
+                {"collection_name": "web-1"},
+                {"collection_names": ["web-2", "web-1"]},
+            ]
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["page"],
+            ["web-1 chunk"],
+            ["web-2 chunk"],
+        ]
+        # web-1 was already searched for the previous item
+        assert sorted(retrieval.searches) == [
+            ("vector", ["web-1"]),
+            ("vector", ["web-2"]),
+        ]
+
+    def test_full_context_mode_returns_all_chunks(self, retrieval):
+        sources = get_sources(
+            [{"type": "file", "id": "f1"}, {"collection_name": "web-1"}],
+            full_context=True,
+        )
+
+        assert [source["document"] for source in sources] == [
+            ["file-f1 all"],
+            ["web-1 all"],
+        ]
+        assert all(kind == "all" for kind, _ in retrieval.searches)
+
+    def test_repeated_searches_are_cached(self, retrieval):
+        get_sources([{"type": "file", "id": "f1"}])
+        sources = get_sources([{"type": "file", "id": "f1"}])
+
+        assert sources[0]["document"] == ["file-f1 chunk"]
+        assert retrieval.searches == [("vector", ["file-f1"])]
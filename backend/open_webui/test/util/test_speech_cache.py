@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils.audio.speech import SpeechCache, SpeechStream
+
+
+def write_entry(directory, name, size, mtime):
+    for suffix, data in ((".mp3", b"x" * size), (".json", b"{}")):
+        path = directory / f"{name}{suffix}"
+        path.write_bytes(data)
+        os.utime(path, (mtime, mtime))
+
+
+class TestSpeechCache:
+    def test_evicts_least_recently_used_over_budget(self, tmp_path):
+        now = time.time()
+        write_entry(tmp_path, "old", 100, now - 30)
+        write_entry(tmp_path, "mid", 100, now - 20)
+        write_entry(tmp_path, "new", 100, now - 10)
+
+        cache = SpeechCache(tmp_path, max_bytes=250)
+        assert cache.get("old") is not None  # refreshes its LRU timestamp
+        cache.evict()
+
+        assert cache.get("mid") is None
+        assert not (tmp_path / "mid.json").exists()
+        assert cache.get("old") is not None
+        assert cache.get("new") is not None
+
+    def test_expires_by_age(self, tmp_path):
+        write_entry(tmp_path, "stale", 10, time.time() - 100)
+        write_entry(tmp_path, "fresh", 10, time.time())
+
+        cache = SpeechCache(tmp_path, max_age=50)
+        assert cache.get("stale") is None
+        assert cache.get("fresh") is not None
+        cache.evict()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["fresh.json", "fresh.mp3"]
+
+    def test_sweeps_stale_partial_writes(self, tmp_path):
+        stale = tmp_path / ".dead.abc.tmp"
+        stale.write_bytes(b"x")
+        os.utime(stale, (time.time() - 3600, time.time() - 3600))
+        live = tmp_path / ".live.def.tmp"
+        live.write_bytes(b"x")
+
+        SpeechCache(tmp_path, max_bytes=100).evict()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".live.def.tmp"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_write_removes_partial_file(self, tmp_path):
+        cache = SpeechCache(tmp_path)
+        speech_stream = SpeechStream(cache, "name", {})
+        cache._inflight["name"] = speech_stream
+        written = asyncio.Event()
+
+        async def iter_chunked(size):
+            yield b"audio"
+            written.set()
+            await asyncio.Event().wait()
+
+        speech_stream._response = SimpleNamespace(
+            content=SimpleNamespace(iter_chunked=iter_chunked),
+            release=lambda: None,
+        )
+        task = asyncio.create_task(speech_stream._pump())
+        await written.wait()
+        assert any(p.suffix == ".tmp" for p in tmp_path.iterdir())
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert list(tmp_path.iterdir()) == []
+        assert "name" not in cache._inflight
@@ -0,0 +1,76 @@
+import contextvars
+
+from sqlalchemy import create_engine, text
+
+from open_webui.utils.telemetry.stages import (
+    finish_stage_timer,
+    get_stage_timer,
+    stage,
+    start_stage_timer,
+)
+
+
+class TestStageTimer:
+    def run(self, fn):
+        # Every test gets its own context, like a request does
+        return contextvars.Context().run(fn)
+
+    def test_stages_accumulate(self):
+        def fn():
+            timer = start_stage_timer()
+            with stage("tools"):
+                pass
+            with stage("tools"):
+                pass
+            with stage("files"):
+                pass
+            return timer
+
+        timer = self.run(fn)
+
+        assert set(timer.stages) == {"tools", "files"}
+        assert timer.to_dict()["stages_ms"].keys() == {"tools", "files"}
+
+    def test_first_token_recorded_once(self):
+        def fn():
+            timer = start_stage_timer()
+            timer.record_first_token("openai")
+            first = timer.ttft["openai"]
+            timer.record_first_token("openai")
+            return timer, first
+
+        timer, first = self.run(fn)
+
+        assert timer.ttft == {"openai": first}
+
+    def test_finished_once(self):
+        def fn():
+            timer = start_stage_timer()
+            return timer, finish_stage_timer(), finish_stage_timer()
+
+        timer, first, second = self.run(fn)
+
+        assert first is timer
+        assert second is None
+
+    def test_stage_without_timer(self):
+        def fn():
+            with stage("payload"):
+                pass
+            return get_stage_timer()
+
+        assert self.run(fn) is None
+
+    def test_counts_db_queries(self):
+        engine = create_engine("sqlite://")
+
+        def fn():
+            timer = start_stage_timer()
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+            return timer
+
+        timer = self.run(fn)
+
+        assert timer.db_queries == 2
@@ -0,0 +1,80 @@
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from open_webui.middleware import supabase_auth
+from open_webui.middleware.supabase_auth import _JWKSCache
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+
+def make_token(private_key, kid, **claims):
+    payload = {"sub": "user-1", "email": "a@example.com", "exp": time.time() + 60}
+    payload.update(claims)
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeJWKSClient:
+    def __init__(self, jwks):
+        self.jwks = jwks
+        self.calls = 0
+
+    def fetch_data(self):
+        self.calls += 1
+        return {"keys": list(self.jwks)}
+
+
+class TestJWKSVerification:
+    def setup_method(self):
+        self.key_1, jwk_1 = make_key("key-1")
+        self.client = FakeJWKSClient([jwk_1])
+        self.cache = _JWKSCache("https://example.com/jwks", refresh_interval=300)
+        self.cache._client = self.client
+
+    def decode(self, monkeypatch, token):
+        monkeypatch.setattr(supabase_auth, "SUPABASE_JWT_SECRET", "")
+        monkeypatch.setattr(supabase_auth, "SUPABASE_JWT_AUD", "")
+        monkeypatch.setattr(supabase_auth, "_get_jwks_cache", lambda: self.cache)
+        return supabase_auth._decode_supabase_jwt(token)
+
+    def test_cold_cache_fetches_before_verifying(self, monkeypatch):
+        claims = self.decode(monkeypatch, make_token(self.key_1, "key-1"))
+
+        assert claims["sub"] == "user-1"
+        assert self.client.calls == 1
+
+    def test_rotated_key_is_fetched(self, monkeypatch):
+        self.cache.fetch_missing_key("key-1")
+        key_2, jwk_2 = make_key("key-2")
+        self.client.jwks.append(jwk_2)
+        # Outside the rate limit of the first fetch
+        self.cache._attempted_at -= self.cache.min_fetch_interval
+
+        claims = self.decode(monkeypatch, make_token(key_2, "key-2"))
+
+        assert claims["sub"] == "user-1"
+        assert self.client.calls == 2
+
+    def test_unknown_kids_are_rate_limited(self, monkeypatch):
+        key_2, _ = make_key("key-2")
+
+        assert self.decode(monkeypatch, make_token(key_2, "key-2")) is None
+        assert self.decode(monkeypatch, make_token(key_2, "key-3")) is None
+        assert self.client.calls == 1
+
+    def test_expired_token(self, monkeypatch):
+        token = make_token(self.key_1, "key-1", exp=time.time() - 10)
+
+        assert self.decode(monkeypatch, token) is None
+
+    def test_invalid_signature(self, monkeypatch):
+        other_key, _ = make_key("key-1")
+
+        assert self.decode(monkeypatch, make_token(other_key, "key-1")) is None
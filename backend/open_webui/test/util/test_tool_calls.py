@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils.tools import run_tool_calls
+
+
+def make_calls(*delays):
+    return [
+        {"id": f"call-{idx}", "function": {"name": "sleep"}, "delay": delay}
+        for idx, delay in enumerate(delays)
+    ]
+
+
+async def execute(tool_call):
+    await asyncio.sleep(tool_call["delay"])
+    if tool_call["delay"] < 0:
+        raise ValueError("negative delay")
+    return {"tool_call_id": tool_call["id"], "content": str(tool_call["delay"])}
+
+
+class TestRunToolCalls:
+    @pytest.mark.asyncio
+    async def test_results_keep_call_order(self):
+        reported = []
+
+        async def on_result(results):
+            reported.append([result["tool_call_id"] for result in results])
+
+        results = await run_tool_calls(
+            make_calls(0.03, 0.01, 0.02), execute, on_result=on_result
+        )
+
+        assert [result["content"] for result in results] == ["0.03", "0.01", "0.02"]
+        assert reported == [
+            ["call-1"],
+            ["call-1", "call-2"],
+            ["call-0", "call-1", "call-2"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_become_results(self):
+        results = await run_tool_calls(make_calls(0, -1, 5), execute, timeout=0.05)
+
+        assert results == [
+            {"tool_call_id": "call-0", "content": "0"},
+            {"tool_call_id": "call-1", "content": "negative delay"},
+            {
+                "tool_call_id": "call-2",
+                "content": "Tool call timed out after 0.05 seconds",
+            },
+        ]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        running = 0
+        peak = 0
+
+        async def counting_execute(tool_call):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await execute(tool_call)
+            finally:
+                running -= 1
+
+        results = await run_tool_calls(
+            make_calls(*[0.01] * 7), counting_execute, max_concurrency=3
+        )
+
+        assert len(results) == 7
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failing_reporter_does_not_stop_calls(self):
+        async def on_result(results):
+            raise RuntimeError("socket closed")
+
+        results = await run_tool_calls(make_calls(0, 0), execute, on_result=on_result)
+
+        assert [result["content"] for result in results] == ["0", "0"]
@@ -0,0 +1,71 @@
+import aiohttp
+import pytest
+
+from open_webui.utils.tools import (
+    close_tool_server_session,
+    get_openapi_operations,
+    get_tool_server_session,
+)
+
+SPEC = {
+    "openapi": "3.1.0",
+    "paths": {
+        "/users/{user_id}": {
+            "parameters": [{"name": "user_id", "in": "path"}],
+            "get": {
+                "operationId": "get_user",
+                "parameters": [
+                    {"name": "user_id", "in": "path", "required": True},
+                    {"name": "fields", "in": "query"},
+                ],
+            },
+            "PUT": {
+                "operationId": "update_user",
+                "parameters": [{"name": "user_id", "in": "path"}],
+                "requestBody": {"content": {"application/json": {"schema": {}}}},
+            },
+        },
+        "/status": {
+            "get": {"summary": "no operationId"},
+        },
+        "/other": {
+            "post": {"operationId": "get_user"},
+        },
+    },
+}
+
+
+class TestOpenAPIOperations:
+    def test_indexes_by_operation_id(self):
+        operations = get_openapi_operations(SPEC)
+
+        assert set(operations) == {"get_user", "update_user"}
+        assert operations["get_user"] == {
+            "method": "get",
+            "path": "/users/{user_id}",
+            "parameters": {"user_id": "path", "fields": "query"},
+            "has_body": False,
+        }
+
+    def test_method_is_lowercased_and_body_detected(self):
+        operation = get_openapi_operations(SPEC)["update_user"]
+
+        assert operation["method"] == "put"
+        assert operation["has_body"] is True
+
+    def test_first_operation_wins(self):
+        assert get_openapi_operations(SPEC)["get_user"]["path"] == "/users/{user_id}"
+
+    def test_empty_spec(self):
+        assert get_openapi_operations({}) == {}
+
+
+class TestToolServerSession:
+    @pytest.mark.asyncio
+    async def test_cookies_are_not_shared(self):
+        session = get_tool_server_session()
+        try:
+            assert session is get_tool_server_session()
+            assert isinstance(session.cookie_jar, aiohttp.DummyCookieJar)
+        finally:
+            await close_tool_server_session()
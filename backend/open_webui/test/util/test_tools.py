@@ -0,0 +1,76 @@
+from pydantic import BaseModel
+
+from open_webui.utils.tools import get_cleaned_tool_specs, get_tool_instance
+
+
+class Tools:
+    class Valves(BaseModel):
+        api_key: str = ""
+
+    def __init__(self):
+        self.valves = self.Valves()
+
+    def search(self, query: str, __user__: dict = {}) -> str:
+        """
+        Search the web.
+        :param query: What to search for
+        """
+        return self.valves.api_key
+
+    def undocumented(self) -> str:
+        return ""
+
+
+SPECS = [
+    {
+        "name": "search",
+        "parameters": {
+            "properties": {
+                "query": {"type": "str"},
+                "__user__": {"type": "object"},
+            }
+        },
+    },
+    {"name": "undocumented", "parameters": {"properties": {}}},
+    {"name": "removed", "parameters": {"properties": {}}},
+]
+
+
+class TestCleanedToolSpecs:
+    def test_cleans_specs(self):
+        specs = get_cleaned_tool_specs(Tools(), SPECS)
+
+        assert [spec["name"] for spec in specs] == ["search", "undocumented"]
+        assert specs[0]["parameters"]["properties"] == {"query": {"type": "string"}}
+        assert specs[0]["description"].strip() == "Search the web."
+        assert specs[1]["description"] == "undocumented"
+
+    def test_does_not_modify_stored_specs(self):
+        get_cleaned_tool_specs(Tools(), SPECS)
+
+        assert SPECS[0]["parameters"]["properties"]["query"] == {"type": "str"}
+        assert "__user__" in SPECS[0]["parameters"]["properties"]
+
+
+class TestToolInstance:
+    def make_entry(self):
+        return {"module": Tools(), "valves_snapshot": None}
+
+    def test_shared_module_is_not_mutated(self):
+        entry = self.make_entry()
+
+        instance = get_tool_instance(entry, {"api_key": "secret"})
+
+        assert instance.search("q") == "secret"
+        assert entry["module"].valves.api_key == ""
+
+    def test_snapshot_reused_until_valves_change(self):
+        entry = self.make_entry()
+
+        first = get_tool_instance(entry, {"api_key": "a"})
+        assert get_tool_instance(entry, {"api_key": "a"}) is first
+
+        second = get_tool_instance(entry, {"api_key": "b"})
+        assert second is not first
+        assert first.search("q") == "a"
+        assert second.search("q") == "b"
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+from open_webui.models.vector_collections import get_collection_type
+from open_webui.retrieval.vector import lifecycle
+
+
+class FakeRegistry:
+    def __init__(self, names):
+        self.names = list(names)
+        self.deleted = []
+
+    def get_expired_collections(self, type, last_accessed_before, limit):
+        return [SimpleNamespace(name=name) for name in self.names[:limit]]
+
+    def delete_collection_by_name(self, name):
+        self.names.remove(name)
+        self.deleted.append(name)
+
+    def has_collections(self, type):
+        return any(get_collection_type(name) == type for name in self.names)
+
+    def register_collections(self, names):
+        names = [name for name in names if name not in self.names]
+        self.names.extend(names)
+        return len(names)
+
+
+class FakeVectorDB:
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.deleted = []
+
+    def has_collection(self, collection_name):
+        return collection_name in self.existing
+
+    def list_collections(self):
+        return sorted(self.existing)
+
+    def delete_collection(self, collection_name):
+        if collection_name == "web-search-broken":
+            raise RuntimeError("unavailable")
+        self.existing.discard(collection_name)
+        self.deleted.append(collection_name)
+
+
+class TestCollectionType:
+    def test_types_from_names(self):
+        assert get_collection_type("web-search-abc") == "web_search"
+        assert get_collection_type("file-123") == "file"
+        assert get_collection_type("user-memory-1") == "memory"
+        assert (
+            get_collection_type("0b7c5a3e-3c1f-4b55-9d0c-6f1a2b3c4d5e") == "knowledge"
+        )
+        assert get_collection_type("f" * 63) == "other"
+
+
+class TestReaper:
+    def test_deletes_expired_collections_in_batches(self, monkeypatch):
+        names = [f"web-search-{i}" for i in range(5)] + ["web-search-broken"]
+        registry = FakeRegistry(names)
+        vector_db = FakeVectorDB(names[:3] + ["web-search-broken"])
+        monkeypatch.setattr(lifecycle, "VectorCollections", registry)
+        monkeypatch.setattr(lifecycle, "VECTOR_DB_CLIENT", vector_db)
+        monkeypatch.setitem(lifecycle.EPHEMERAL_COLLECTION_TTLS, "web_search", 60)
+
+        assert lifecycle.reap_expired_collections(batch_size=2) == 6
+        assert registry.names == []
+        assert vector_db.deleted == names[:3]
+
+    def test_disabled_ttl_keeps_collections(self, monkeypatch):
+        registry = FakeRegistry(["web-search-0"])
+        monkeypatch.setattr(lifecycle, "VectorCollections", registry)
+        monkeypatch.setitem(lifecycle.EPHEMERAL_COLLECTION_TTLS, "web_search", 0)
+
+        assert lifecycle.reap_expired_collections() == 0
+        assert registry.names == ["web-search-0"]
+
+
+class TestBackfill:
+    def test_registers_existing_collections_once(self, monkeypatch):
+        registry = FakeRegistry([])
+        vector_db = FakeVectorDB(["web-search-a", "web-search-b", "file-1"])
+        monkeypatch.setattr(lifecycle, "VectorCollections", registry)
+        monkeypatch.setattr(lifecycle, "VECTOR_DB_CLIENT", vector_db)
+        monkeypatch.setitem(lifecycle.EPHEMERAL_COLLECTION_TTLS, "web_search", 60)
+
+        assert lifecycle.backfill_ephemeral_collections() == 2
+        assert registry.names == ["web-search-a", "web-search-b"]
+
+        vector_db.existing.add("web-search-c")
+        assert lifecycle.backfill_ephemeral_collections() == 0
+
+    def test_skips_backends_that_cannot_list(self, monkeypatch):
+        registry = FakeRegistry([])
+        vector_db = FakeVectorDB(["web-search-a"])
+        vector_db.list_collections = lambda: None
+        monkeypatch.setattr(lifecycle, "VectorCollections", registry)
+        monkeypatch.setattr(lifecycle, "VECTOR_DB_CLIENT", vector_db)
+        monkeypatch.setitem(lifecycle.EPHEMERAL_COLLECTION_TTLS, "web_search", 60)
+
+        assert lifecycle.backfill_ephemeral_collections() == 0
+        assert registry.names == []
@@ -0,0 +1,28 @@
+import pytest
+
+from open_webui.retrieval import utils as retrieval_utils
+from open_webui.retrieval.utils import has_cosine_vector_scores
+from open_webui.retrieval.vector.type import VectorType
+
+
+class TestCosineVectorScores:
+    @pytest.mark.parametrize(
+        "vector_db, metric_type, expected",
+        [
+            (VectorType.CHROMA, "COSINE", True),
+            (VectorType.PGVECTOR, "COSINE", True),
+            (VectorType.QDRANT, "IP", True),
+            (VectorType.MILVUS, "COSINE", True),
+            (VectorType.MILVUS, "cosine", True),
+            (VectorType.MILVUS, "IP", False),
+            (VectorType.MILVUS, "L2", False),
+            (VectorType.OPENSEARCH, "COSINE", False),
+        ],
+    )
+    def test_depends_on_db_and_metric(
+        self, monkeypatch, vector_db, metric_type, expected
+    ):
+        monkeypatch.setattr(retrieval_utils, "VECTOR_DB", vector_db)
+        monkeypatch.setattr(retrieval_utils, "MILVUS_METRIC_TYPE", metric_type)
+
+        assert has_cosine_vector_scores() is expected
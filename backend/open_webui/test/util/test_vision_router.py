@@ -0,0 +1,175 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import vision_router
+from open_webui.utils.vision_router import (
+    schedule_vision_prepass,
+    vision_router_inlet,
+)
+
+IMAGE = {"type": "image_url", "image_url": {"url": "data:image/png;base64,aW1hZ2U="}}
+PREPASS = {"caption": "a cat", "ocr_text": ""}
+
+
+def make_request(**config):
+    settings = {
+        "VISION_ROUTER_ENABLED": True,
+        "VISION_ROUTER_MODE": "prepass",
+        "VISION_ROUTER_MODEL": "vision",
+        "VISION_ROUTER_SHOW_STATUS_EVENTS": False,
+        "VISION_ROUTER_SPECULATIVE": True,
+    }
+    settings.update(config)
+    models = {"text": {"id": "text"}, "vision": {"id": "vision"}}
+    return SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(config=SimpleNamespace(**settings), MODELS=models)
+        ),
+        state=SimpleNamespace(),
+    )
+
+
+def make_body(content):
+    return {"model": "text", "messages": [{"role": "user", "content": content}]}
+
+
+USER = SimpleNamespace(id="1", role="user")
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    calls = []
+
+    async def generate_direct_chat_completion(request, body, user, models):
+        calls.append(body["model"])
+        return {"choices": [{"message": {"content": json.dumps(PREPASS)}}]}
+
+    monkeypatch.setattr(
+        vision_router,
+        "generate_direct_chat_completion",
+        generate_direct_chat_completion,
+    )
+    vision_router._prepass_cache.clear()
+    return calls
+
+
+def get_meta(body):
+    return body["messages"][-1]["metadata"]["vision_router"]
+
+
+class TestVisionRouterInlet:
+    @pytest.mark.asyncio
+    async def test_without_images_is_left_alone(self, completions):
+        body = make_body([{"type": "text", "text": "hi"}])
+
+        body = await vision_router_inlet(make_request(), body, USER, {})
+
+        assert body["model"] == "text"
+        assert len(body["messages"]) == 1
+        assert get_meta(body)["skipped_reason"] == "no_images"
+        assert completions == []
+
+    @pytest.mark.asyncio
+    async def test_prepass_replaces_images(self, completions):
+        body = make_body([{"type": "text", "text": "what is this?"}, IMAGE])
+
+        body = await vision_router_inlet(make_request(), body, USER, {})
+
+        system, user = body["messages"]
+        assert body["model"] == "text"
+        assert completions == ["vision"]
+        assert system["role"] == "system"
+        assert json.dumps(PREPASS) in system["content"]
+        assert user["content"] == [{"type": "text", "text": "what is this?"}]
+        assert get_meta(body)["used_model"] == "vision"
+
+    @pytest.mark.asyncio
+    async def test_reroute_switches_model(self, completions):
+        body = make_body([IMAGE])
+
+        body = await vision_router_inlet(
+            make_request(VISION_ROUTER_MODE="reroute"), body, USER, {}
+        )
+
+        assert body["model"] == "vision"
+        assert body["messages"][-1]["content"] == [IMAGE]
+        assert completions == []
+
+    @pytest.mark.asyncio
+    async def test_model_with_vision_is_skipped(self, completions):
+        request = make_request()
+        request.app.state.MODELS["text"]["capabilities"] = {"vision": True}
+        body = make_body([IMAGE])
+
+        body = await vision_router_inlet(request, body, USER, {})
+
+        assert get_meta(body)["skipped_reason"] == "model_has_vision"
+        assert body["messages"][-1]["content"] == [IMAGE]
+        assert completions == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["prepass", "reroute"])
+    async def test_no_vision_model_falls_back_to_original(self, completions, mode):
+        body = make_body([IMAGE])
+
+        body = await vision_router_inlet(
+            make_request(VISION_ROUTER_MODEL="", VISION_ROUTER_MODE=mode),
+            body,
+            USER,
+            {},
+        )
+
+        assert body["model"] == "text"
+        assert body["messages"] == [
+            {
+                "role": "user",
+                "content": [IMAGE],
+                "metadata": {"vision_router": get_meta(body)},
+            }
+        ]
+        assert get_meta(body)["used_model"] is None
+        assert completions == []
+
+    @pytest.mark.asyncio
+    async def test_failed_prepass_keeps_images(self, completions, monkeypatch):
+        async def generate_direct_chat_completion(request, body, user, models):
+            return {"choices": [{"message": {"content": "no json here"}}]}
+
+        monkeypatch.setattr(
+            vision_router,
+            "generate_direct_chat_completion",
+            generate_direct_chat_completion,
+        )
+        body = make_body([IMAGE])
+
+        body = await vision_router_inlet(make_request(), body, USER, {})
+
+        assert get_meta(body)["skipped_reason"] == "json_parse_failed"
+        assert body["messages"][-1]["content"] == [IMAGE]
+
+
+class TestScheduleVisionPrepass:
+    @pytest.mark.asyncio
+    async def test_warms_the_cache(self, completions, monkeypatch):
+        async def preprocess_image_url(url):
+            return url
+
+        monkeypatch.setattr(vision_router, "preprocess_image_url", preprocess_image_url)
+        request = make_request()
+
+        assert schedule_vision_prepass(request, USER, "text", [IMAGE]) == 1
+        await asyncio.gather(*vision_router._prefetch_tasks)
+        await asyncio.sleep(0)
+        assert not vision_router._prefetch_tasks
+        body = await vision_router_inlet(request, make_body([IMAGE]), USER, {})
+
+        assert completions == ["vision"]
+        assert get_meta(body)["cache_hits"] == 1
+
+    def test_no_vision_model_schedules_nothing(self, completions):
+        request = make_request(VISION_ROUTER_MODEL="")
+
+        assert schedule_vision_prepass(request, USER, "text", [IMAGE]) == 0
@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.web.cache import (
+    clear_web_cache,
+    get_cached_web_chunks,
+    get_cached_web_page,
+    get_chunk_cache_key,
+    get_content_hash,
+    set_cached_web_chunks,
+    set_cached_web_page,
+)
+
+
+def make_docs(text="hello world"):
+    return [Document(page_content=text, metadata={"source": "https://example.com"})]
+
+
+class TestWebPageCache:
+    def setup_method(self):
+        clear_web_cache()
+
+    def test_roundtrip_returns_copies(self):
+        set_cached_web_page("https://example.com", make_docs())
+
+        docs = get_cached_web_page("https://example.com")
+        docs[0].metadata["title"] = "changed"
+
+        assert get_cached_web_page("https://example.com")[0].metadata == {
+            "source": "https://example.com"
+        }
+        assert get_cached_web_page("https://other.com") is None
+
+    def test_empty_pages_are_not_cached(self):
+        set_cached_web_page("https://example.com", [])
+        assert get_cached_web_page("https://example.com") is None
+
+
+class TestWebChunkCache:
+    def setup_method(self):
+        clear_web_cache()
+
+    def test_key_depends_on_content_and_settings(self):
+        content_hash = get_content_hash(make_docs())
+        key = get_chunk_cache_key("https://example.com", content_hash, chunk_size=1000)
+
+        assert key == get_chunk_cache_key(
+            "https://example.com", content_hash, chunk_size=1000
+        )
+        assert key != get_chunk_cache_key(
+            "https://example.com", content_hash, chunk_size=500
+        )
+        assert key != get_chunk_cache_key(
+            "https://example.com",
+            get_content_hash(make_docs("changed")),
+            chunk_size=1000,
+        )
+
+    def test_vectors_are_stored_compactly(self):
+        set_cached_web_chunks(
+            "key",
+            [{"text": "hello", "vector": [0.1, 0.2], "metadata": {"source": "x"}}],
+        )
+
+        [chunk] = get_cached_web_chunks("key")
+        assert chunk["text"] == "hello"
+        assert chunk["vector"].dtype.name == "float32"
+        assert chunk["vector"].tolist() == pytest.approx([0.1, 0.2])
+        assert get_cached_web_chunks("missing") is None
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import aiofiles
+import aiohttp
+from fastapi import HTTPException
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT,
+    SPEECH_CACHE_MAX_AGE,
+    SPEECH_CACHE_MAX_SIZE_MB,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+CHUNK_SIZE = 16 * 1024
+# Minimum seconds between two eviction scans of the cache directory
+EVICTION_INTERVAL = 60
+# Partial writes untouched for this long were left behind by a dead worker
+STALE_TMP_AGE = 600
+
+
+class SpeechCache:
+    """
+    Directory of synthesized speech, `<name>.mp3` next to the `<name>.json`
+    request body. Entries are dropped after `max_age` seconds and least
+    recently used ones once the directory grows beyond `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._last_eviction = 0.0
+        # Synthesis currently streaming, so identical requests share it
+        self._inflight: dict[str, "SpeechStream"] = {}
+
+    def get(self, name: str) -> Optional[Path]:
+        file_path = self.directory / f"{name}.mp3"
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+
+        if self.max_age and time.time() - stat.st_mtime > self.max_age:
+            self._remove(name)
+            return None
+
+        try:
+            # mtime doubles as the LRU timestamp
+            os.utime(file_path)
+        except OSError:
+            pass
+        return file_path
+
+    def evict(self) -> None:
+        now = time.time()
+        entries = {}
+        for file_path in self.directory.iterdir():
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            if file_path.name.startswith("."):
+                if file_path.suffix == ".tmp" and now - stat.st_mtime > STALE_TMP_AGE:
+                    file_path.unlink(missing_ok=True)
+                continue
+            mtime, size = entries.get(file_path.stem, (0.0, 0))
+            entries[file_path.stem] = (max(mtime, stat.st_mtime), size + stat.st_size)
+
+        total = 0
+        for name, (mtime, size) in sorted(
+            entries.items(), key=lambda entry: entry[1][0], reverse=True
+        ):
+            if (self.max_age and now - mtime > self.max_age) or (
+                self.max_bytes and total + size > self.max_bytes
+            ):
+                self._remove(name)
+            else:
+                total += size
+
+    async def evict_in_background(self) -> None:
+        if not (self.max_bytes or self.max_age):
+            return
+        if time.monotonic() - self._last_eviction < EVICTION_INTERVAL:
+            return
+        self._last_eviction = time.monotonic()
+        try:
+            await asyncio.to_thread(self.evict)
+        except Exception as e:
+            log.warning(f"Failed to evict speech cache: {e}")
+
+    async def stream(
+        self,
+        name: str,
+        payload: dict,
+        send_request: Callable[[aiohttp.ClientSession], Awaitable],
+    ) -> "SpeechStream":
+        """
+        Start synthesis of `name`, or join the one already running. Returns
+        once the upstream has answered, so errors still surface as
+        HTTPException before any audio is sent.
+        """
+        speech_stream = self._inflight.get(name)
+        if speech_stream is None:
+            speech_stream = SpeechStream(self, name, payload)
+            speech_stream.started = asyncio.ensure_future(
+                speech_stream.start(send_request)
+            )
+            self._inflight[name] = speech_stream
+
+        await asyncio.shield(speech_stream.started)
+        return speech_stream
+
+    def _remove(self, name: str) -> None:
+        for suffix in (".mp3", ".json"):
+            try:
+                (self.directory / f"{name}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SpeechStream:
+    """
+    One upstream synthesis. A background task reads the audio, keeps it in
+    memory for every listener and writes it to the cache; the entry only
+    becomes visible once the audio is complete.
+    """
+
+    def __init__(self, cache: SpeechCache, name: str, payload: dict):
+        self.cache = cache
+        self.name = name
+        self.payload = payload
+        self.media_type = "audio/mpeg"
+        self.started: Optional[asyncio.Future] = None
+
+        self._chunks: list[bytes] = []
+        self._done = False
+        self._error: Optional[Exception] = None
+        self._condition = asyncio.Condition()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._response = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, send_request) -> None:
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            trust_env=True,
+        )
+        try:
+            self._response = await send_request(self._session)
+            if not self._response.ok:
+                raise HTTPException(
+                    status_code=self._response.status,
+                    detail=await get_error_detail(self._response),
+                )
+            self.media_type = self._response.headers.get(
+                "Content-Type", self.media_type
+            )
+        except Exception:
+            self.cache._inflight.pop(self.name, None)
+            await self._close()
+            raise
+
+        self._task = asyncio.create_task(self._pump())
+
+    async def _pump(self) -> None:
+        file_path = self.cache.directory / f"{self.name}.mp3"
+        tmp_path = self.cache.directory / f".{self.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in self._response.content.iter_chunked(CHUNK_SIZE):
+                    await f.write(chunk)
+                    async with self._condition:
+                        self._chunks.append(chunk)
+                        self._condition.notify_all()
+
+            os.replace(tmp_path, file_path)
+            async with aiofiles.open(
+                self.cache.directory / f"{self.name}.json", "w"
+            ) as f:
+                await f.write(json.dumps(self.payload))
+        except Exception as e:
+            log.exception(f"Speech synthesis failed: {e}")
+            self._error = e
+        finally:
+            # Left over when the write failed or the task was cancelled
+            tmp_path.unlink(missing_ok=True)
+            self.cache._inflight.pop(self.name, None)
+            await self._close()
+            async with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+        await self.cache.evict_in_background()
+
+    async def _close(self) -> None:
+        if self._response is not None:
+            self._response.release()
+        if self._session is not None:
+            await self._session.close()
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        idx = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: idx < len(self._chunks) or self._done
+                )
+                chunks = self._chunks[idx:]
+                done = self._done
+
+            for chunk in chunks:
+                yield chunk
+            idx += len(chunks)
+
+            if done and idx >= len(self._chunks):
+                if self._error is not None:
+                    raise self._error
+                return
+
+
+async def get_error_detail(response) -> str:
+    try:
+        res = await response.json(content_type=None)
+        error = res.get("error") if isinstance(res, dict) else None
+        if isinstance(error, dict):
+            error = error.get("message", "")
+        if error:
+            return f"External: {error}"
+    except Exception:
+        pass
+    return "Prosper Chat: Server Connection Error"
+
+
+def get_speech_cache(directory: Path) -> SpeechCache:
+    return SpeechCache(
+        directory,
+        max_bytes=(
+            SPEECH_CACHE_MAX_SIZE_MB * 1024 * 1024 if SPEECH_CACHE_MAX_SIZE_MB else None
+        ),
+        max_age=SPEECH_CACHE_MAX_AGE or None,
+    )
@@ -0,0 +1,123 @@
+import logging
+import math
+import os
+
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+CHUNK_FORMAT = "mp3"
+CHUNK_BITRATE = "32k"
+# Encoded size per ms of audio at CHUNK_BITRATE, with headroom for framing
+CHUNK_BYTES_PER_MS = 32_000 / 8 / 1000 * 1.1
+
+# How far back from a chunk's size limit to look for a pause to cut at
+SILENCE_SEARCH_MS = 30_000
+MIN_SILENCE_MS = 400
+MIN_CHUNK_MS = 5_000
+
+
+def get_silence_threshold(audio: AudioSegment) -> float:
+    # Relative to the average loudness, so quiet recordings still split
+    if math.isinf(audio.dBFS):
+        return -50.0
+    return audio.dBFS - 16
+
+
+def get_chunk_ranges(audio: AudioSegment, max_chunk_ms: int) -> list[tuple[int, int]]:
+    """
+    Cut points (start_ms, end_ms) that keep every chunk under max_chunk_ms,
+    preferring the last pause before each limit so words aren't split.
+    """
+    duration_ms = len(audio)
+    silence_thresh = get_silence_threshold(audio)
+
+    ranges = []
+    start = 0
+    while duration_ms - start > max_chunk_ms:
+        end = start + max_chunk_ms
+        window_start = max(end - SILENCE_SEARCH_MS, start + MIN_CHUNK_MS)
+
+        cut = end
+        if window_start < end:
+            silences = detect_silence(
+                audio[window_start:end],
+                min_silence_len=MIN_SILENCE_MS,
+                silence_thresh=silence_thresh,
+                seek_step=10,
+            )
+            if silences:
+                silence_start, silence_end = silences[-1]
+                cut = window_start + (silence_start + silence_end) // 2
+
+        ranges.append((start, cut))
+        start = cut
+
+    ranges.append((start, duration_ms))
+    return ranges
+
+
+def _export_chunk(
+    audio: AudioSegment, start: int, end: int, path: str, max_bytes: int
+) -> list[str]:
+    audio[start:end].export(path, format=CHUNK_FORMAT, bitrate=CHUNK_BITRATE)
+    if os.path.getsize(path) <= max_bytes:
+        return [path]
+
+    # Rare with a constant bitrate; halve in memory rather than decoding again
+    os.remove(path)
+    if end - start <= MIN_CHUNK_MS:
+        raise Exception("Audio chunk cannot be reduced below max file size.")
+    middle = start + (end - start) // 2
+    base, ext = os.path.splitext(path)
+    return _export_chunk(audio, start, middle, f"{base}a{ext}", max_bytes) + (
+        _export_chunk(audio, middle, end, f"{base}b{ext}", max_bytes)
+    )
+
+
+def prepare_audio_chunks(
+    file_path: str, max_bytes: int, conversion_required: bool = False
+) -> list[str]:
+    """
+    Paths of the audio to transcribe, in order. Files that are supported and
+    small enough are used as they are. Anything else is decoded once,
+    downmixed to 16 kHz mono and exported as mp3 chunks cut at pauses.
+    """
+    if not conversion_required and os.path.getsize(file_path) <= max_bytes:
+        return [file_path]
+
+    audio = AudioSegment.from_file(file_path)
+    audio = audio.set_frame_rate(16000).set_channels(1)
+
+    max_chunk_ms = int(max_bytes / CHUNK_BYTES_PER_MS)
+    ranges = get_chunk_ranges(audio, max_chunk_ms)
+
+    base, _ = os.path.splitext(file_path)
+    chunk_paths = []
+    try:
+        for idx, (start, end) in enumerate(ranges):
+            chunk_paths.extend(
+                _export_chunk(
+                    audio, start, end, f"{base}_chunk_{idx}.{CHUNK_FORMAT}", max_bytes
+                )
+            )
+    except Exception:
+        remove_audio_chunks(file_path, chunk_paths)
+        raise
+
+    log.info(f"Split {file_path} into {len(chunk_paths)} chunk(s)")
+    return chunk_paths
+
+
+def remove_audio_chunks(file_path: str, chunk_paths: list[str]) -> None:
+    # Only the chunks we created, never the original file
+    for chunk_path in chunk_paths:
+        if chunk_path != file_path and os.path.isfile(chunk_path):
+            try:
+                os.remove(chunk_path)
+            except Exception:
+                pass
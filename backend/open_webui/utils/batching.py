@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable
+
+from opentelemetry import metrics
+
+log = logging.getLogger(__name__)
+
+# No-ops until a MeterProvider is installed (ENABLE_OTEL_METRICS)
+meter = metrics.get_meter(__name__)
+batch_size_histogram = meter.create_histogram(
+    name="model.batch.size",
+    description="Items per micro-batched forward pass",
+    unit="1",
+)
+queue_wait_histogram = meter.create_histogram(
+    name="model.batch.queue_wait",
+    description="Time a request waited for its batch to start",
+    unit="ms",
+)
+
+_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+
+def _observe_queue_depth(options: metrics.CallbackOptions):
+    return [
+        metrics.Observation(batcher._queue.qsize(), {"batcher": batcher.name})
+        for batcher in list(_batchers)
+    ]
+
+
+meter.create_observable_gauge(
+    name="model.batch.queue_depth",
+    description="Requests waiting for their batch to start",
+    unit="1",
+    callbacks=[_observe_queue_depth],
+)
+
+
+class _BatchRequest:
+    __slots__ = ("items", "future", "enqueued_at")
+
+    def __init__(self, items: list):
+        self.items = items
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from concurrent threads and runs them through
+    `fn` together: a batch is closed once it holds `max_batch_size` items or
+    `max_wait_ms` after its first request arrived. `fn` takes a list of items
+    and returns one result per item; each caller gets back its own slice.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list], list],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+        name: str = "batcher",
+    ):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue: "queue.Queue[_BatchRequest]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        _batchers.add(self)
+
+    def submit(self, items: list) -> list:
+        if not items:
+            return []
+        self._ensure_started()
+        request = _BatchRequest(list(items))
+        self._queue.put(request)
+        return request.future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> list[_BatchRequest]:
+        batch = [self._queue.get()]
+        size = len(batch[0].items)
+        deadline = batch[0].enqueued_at + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for request in batch for item in request.items]
+            self._record(batch, len(items))
+            try:
+                results = self.fn(items)
+                if len(results) != len(items):
+                    raise ValueError(
+                        f"{self.name}: got {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                request.future.set_result(results[offset : offset + len(request.items)])
+                offset += len(request.items)
+
+    def _record(self, batch: list[_BatchRequest], size: int):
+        attributes = {"batcher": self.name}
+        batch_size_histogram.record(size, attributes)
+        now = time.monotonic()
+        for request in batch:
+            queue_wait_histogram.record(
+                (now - request.enqueued_at) * 1000.0, attributes
+            )
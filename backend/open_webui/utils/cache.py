@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU cache with an optional TTL.
+
+    `maxsize` bounds the number of entries; when `getsizeof` is given,
+    `maxbytes` additionally bounds the summed size of the values.
+    `on_evict(key, value)` is called, outside the lock, for entries that are
+    dropped to make room or because they expired.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+        getsizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.getsizeof = getsizeof
+        self.on_evict = on_evict
+        self.currbytes = 0
+        self._data: "OrderedDict[Hashable, tuple[Optional[float], int, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, _, value = entry
+            if expires_at is None or time.monotonic() < expires_at:
+                self._data.move_to_end(key)
+                return value
+            self._remove(key)
+
+        if self.on_evict:
+            self.on_evict(key, value)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.getsizeof(value) if self.getsizeof else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            # Too big to cache, but don't keep serving the previous value
+            self.pop(key)
+            return
+
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, size, value)
+            self.currbytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self.currbytes > self.maxbytes
+            ):
+                oldest = next(iter(self._data))
+                evicted.append((oldest, self._remove(oldest)))
+
+        if self.on_evict:
+            for evicted_key, evicted_value in evicted:
+                self.on_evict(evicted_key, evicted_value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.currbytes = 0
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: Hashable) -> Any:
+        _, size, value = self._data.pop(key)
+        self.currbytes -= size
+        return value
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
 from typing import Optional
 
@@ -8,7 +9,13 @@ import aiohttp
 import websockets
 from pydantic import BaseModel
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    ENABLE_JUPYTER_KERNEL_POOL,
+    JUPYTER_KERNEL_IDLE_TIMEOUT,
+    JUPYTER_KERNEL_POOL_MAX_SIZE,
+    JUPYTER_KERNEL_POOL_WARM_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -108,10 +115,11 @@ class JupyterCodeExecuter:
             kernel_data = await response.json()
             self.kernel_id = kernel_data["id"]
 
-    def init_ws(self) -> (str, dict):
+    def init_ws(self, kernel_id: Optional[str] = None) -> (str, dict):
+        kernel_id = kernel_id or self.kernel_id
         ws_base = self.base_url.replace("http", "ws", 1)
         ws_params = "?" + "&".join([f"{key}={val}" for key, val in self.params.items()])
-        websocket_url = f"{ws_base}api/kernels/{self.kernel_id}/channels{ws_params if len(ws_params) > 1 else ''}"
+        websocket_url = f"{ws_base}api/kernels/{kernel_id}/channels{ws_params if len(ws_params) > 1 else ''}"
         ws_headers = {}
         if self.password and not self.token:
             ws_headers = {
@@ -135,74 +143,457 @@ class JupyterCodeExecuter:
             await self.execute_in_jupyter(ws)
 
     async def execute_in_jupyter(self, ws) -> None:
-        # send message
-        msg_id = uuid.uuid4().hex
-        await ws.send(
-            json.dumps(
-                {
-                    "header": {
-                        "msg_id": msg_id,
-                        "msg_type": "execute_request",
-                        "username": "user",
-                        "session": uuid.uuid4().hex,
-                        "date": "",
-                        "version": "5.3",
-                    },
-                    "parent_header": {},
-                    "metadata": {},
-                    "content": {
-                        "code": self.code,
-                        "silent": False,
-                        "store_history": True,
-                        "user_expressions": {},
-                        "allow_stdin": False,
-                        "stop_on_error": True,
-                    },
-                    "channel": "shell",
-                }
-            )
+        self.result, _ = await execute_in_kernel(ws, self.code, self.timeout)
+
+
+async def execute_in_kernel(
+    ws, code: str, timeout: int, session_id: Optional[str] = None
+) -> tuple[ResultModel, bool]:
+    """
+    Run `code` over an open kernel websocket. Returns the result and whether
+    the execution timed out (the kernel is then still busy with it).
+    """
+    # send message
+    msg_id = uuid.uuid4().hex
+    await ws.send(
+        json.dumps(
+            {
+                "header": {
+                    "msg_id": msg_id,
+                    "msg_type": "execute_request",
+                    "username": "user",
+                    "session": session_id or uuid.uuid4().hex,
+                    "date": "",
+                    "version": "5.3",
+                },
+                "parent_header": {},
+                "metadata": {},
+                "content": {
+                    "code": code,
+                    "silent": False,
+                    "store_history": True,
+                    "user_expressions": {},
+                    "allow_stdin": False,
+                    "stop_on_error": True,
+                },
+                "channel": "shell",
+            }
         )
-        # parse message
-        stdout, stderr, result = "", "", []
+    )
+    # parse message
+    stdout, stderr, result = "", "", []
+    timed_out = False
+    while True:
+        try:
+            # wait for message
+            message = await asyncio.wait_for(ws.recv(), timeout)
+            message_data = json.loads(message)
+            # msg id not match, skip
+            if message_data.get("parent_header", {}).get("msg_id") != msg_id:
+                continue
+            # check message type
+            msg_type = message_data.get("msg_type")
+            match msg_type:
+                case "stream":
+                    if message_data["content"]["name"] == "stdout":
+                        stdout += message_data["content"]["text"]
+                    elif message_data["content"]["name"] == "stderr":
+                        stderr += message_data["content"]["text"]
+                case "execute_result" | "display_data":
+                    data = message_data["content"]["data"]
+                    if "image/png" in data:
+                        result.append(f"data:image/png;base64,{data['image/png']}")
+                    elif "text/plain" in data:
+                        result.append(data["text/plain"])
+                case "error":
+                    stderr += "\n".join(message_data["content"]["traceback"])
+                case "status":
+                    if message_data["content"]["execution_state"] == "idle":
+                        break
+
+        except asyncio.TimeoutError:
+            stderr += "\nExecution timed out."
+            timed_out = True
+            break
+
+    return (
+        ResultModel(
+            stdout=stdout.strip(),
+            stderr=stderr.strip(),
+            result="\n".join(result).strip() if result else "",
+        ),
+        timed_out,
+    )
+
+
+class JupyterKernel:
+    """A kernel started by a `JupyterKernelPool`, with its open websocket"""
+
+    def __init__(self, kernel_id: str):
+        self.id = kernel_id
+        self.session_id = uuid.uuid4().hex
+        self.ws = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class JupyterKernelPool:
+    """
+    Kernels of one Jupyter server, managed through one signed-in session.
+
+    A chat keeps its kernel, so variables persist between its executions,
+    until the kernel has been idle for `idle_timeout` seconds. Executions
+    without a chat run on a kernel of their own that is shut down afterwards.
+    Up to `warm_size` kernels are started ahead of time so neither has to
+    wait for a kernel to start, and a used kernel is never handed to anyone
+    else. At most `max_size` kernels run at once; when full, the least
+    recently used idle chat kernel is shut down to make room.
+
+    Pools live in the memory of one process. With several uvicorn workers,
+    each worker has its own pools and limits, and a chat only keeps its
+    kernel (and variables) while its executions reach the same worker.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str = "",
+        password: str = "",
+        max_size: int = JUPYTER_KERNEL_POOL_MAX_SIZE,
+        warm_size: int = JUPYTER_KERNEL_POOL_WARM_SIZE,
+        idle_timeout: int = JUPYTER_KERNEL_IDLE_TIMEOUT,
+    ):
+        self.client = JupyterCodeExecuter(base_url, "", token, password)
+        self.max_size = max_size
+        self.warm_size = min(warm_size, max_size)
+        self.idle_timeout = idle_timeout
+
+        self.warm: list[JupyterKernel] = []
+        self.chat_kernels: dict[str, JupyterKernel] = {}
+        # Kernels started and not shut down yet, including those being started
+        self.size = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+
+        # Warm kernels being started
+        self._warming = 0
+        self._signed_in = False
+        self._sign_in_lock = asyncio.Lock()
+        self._condition = asyncio.Condition()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    async def execute(
+        self, code: str, timeout: int = 60, chat_id: Optional[str] = None
+    ) -> ResultModel:
+        self.last_used = time.monotonic()
+        self._start_background_tasks()
+
+        try:
+            kernel = await asyncio.wait_for(self.acquire(chat_id), timeout)
+        except Exception as err:
+            logger.exception("acquire kernel failed, %s", err)
+            return ResultModel(stderr=f"Error: {err}")
+
+        try:
+            async with kernel.lock:
+                result = await self.run(kernel, code, timeout)
+                kernel.last_used = time.monotonic()
+        except Exception as err:
+            logger.exception("execute code failed, %s", err)
+            # The kernel or its connection is broken, the chat gets a new one
+            await self.shutdown_kernel(kernel)
+            return ResultModel(stderr=f"Error: {err}")
+        except BaseException:
+            # Cancelled: a kernel without a chat is never handed out again
+            if chat_id is None:
+                await asyncio.shield(self.shutdown_kernel(kernel))
+            raise
+
+        if chat_id is None:
+            await self.shutdown_kernel(kernel)
+        self._start_background_tasks()
+        return result
+
+    async def acquire(self, chat_id: Optional[str] = None) -> JupyterKernel:
+        await self.sign_in()
+
+        if chat_id is not None and chat_id in self.chat_kernels:
+            return self.chat_kernels[chat_id]
+
+        kernel = self.warm.pop(0) if self.warm else await self.start_kernel()
+
+        if chat_id is not None:
+            # Another execution of this chat may have got a kernel meanwhile
+            if chat_id in self.chat_kernels:
+                self.warm.append(kernel)
+                return self.chat_kernels[chat_id]
+            self.chat_kernels[chat_id] = kernel
+        return kernel
+
+    async def run(self, kernel: JupyterKernel, code: str, timeout: int) -> ResultModel:
+        if kernel.ws is None:
+            kernel.ws = await self.connect(kernel)
+        try:
+            result, timed_out = await execute_in_kernel(
+                kernel.ws, code, timeout, kernel.session_id
+            )
+        except websockets.exceptions.ConnectionClosed:
+            # Reconnect once, the kernel itself (and its state) may be fine
+            kernel.ws = await self.connect(kernel)
+            result, timed_out = await execute_in_kernel(
+                kernel.ws, code, timeout, kernel.session_id
+            )
+
+        if timed_out:
+            # Stop the code still running so the kernel can be used again
+            async with self.client.session.post(
+                f"api/kernels/{kernel.id}/interrupt", params=self.client.params
+            ) as response:
+                response.raise_for_status()
+        return result
+
+    async def sign_in(self, force: bool = False) -> None:
+        async with self._sign_in_lock:
+            if self._signed_in and not force:
+                return
+            await self.client.sign_in()
+            self._signed_in = True
+
+    async def connect(self, kernel: JupyterKernel):
+        websocket_url, ws_headers = self.client.init_ws(kernel.id)
+        return await websockets.connect(websocket_url, additional_headers=ws_headers)
+
+    async def start_kernel(self) -> JupyterKernel:
+        await self._reserve()
+        # Once the slot is reserved the start runs to completion, even if the
+        # caller is cancelled; the kernel is then kept warm for the next one
+        starting = asyncio.ensure_future(self._start_reserved_kernel())
+        try:
+            return await asyncio.shield(starting)
+        except asyncio.CancelledError:
+            starting.add_done_callback(self._keep_unclaimed_kernel)
+            raise
+
+    def _keep_unclaimed_kernel(self, starting: asyncio.Future) -> None:
+        if starting.cancelled() or starting.exception() is not None:
+            # _start_reserved_kernel has released the slot
+            return
+        kernel = starting.result()
+        if self.closed:
+            asyncio.ensure_future(self.shutdown_kernel(kernel))
+        else:
+            self.warm.append(kernel)
+
+    async def _start_reserved_kernel(self) -> JupyterKernel:
+        try:
+            try:
+                kernel_id = await self._create_kernel()
+            except aiohttp.ClientResponseError as err:
+                if err.status not in (401, 403):
+                    raise
+                # The session expired, sign in again
+                await self.sign_in(force=True)
+                kernel_id = await self._create_kernel()
+        except BaseException:
+            await self._release()
+            raise
+
+        kernel = JupyterKernel(kernel_id)
+        try:
+            kernel.ws = await self.connect(kernel)
+        except BaseException:
+            await asyncio.shield(self.shutdown_kernel(kernel))
+            raise
+        return kernel
+
+    async def _create_kernel(self) -> str:
+        async with self.client.session.post(
+            "api/kernels", params=self.client.params
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["id"]
+
+    async def is_alive(self, kernel: JupyterKernel) -> bool:
+        try:
+            async with self.client.session.get(
+                f"api/kernels/{kernel.id}", params=self.client.params
+            ) as response:
+                if response.status != 200:
+                    return False
+                data = await response.json()
+                return data.get("execution_state") != "dead"
+        except Exception:
+            return False
+
+    async def shutdown_kernel(self, kernel: JupyterKernel) -> None:
+        if kernel in self.warm:
+            self.warm.remove(kernel)
+        for chat_id, chat_kernel in list(self.chat_kernels.items()):
+            if chat_kernel is kernel:
+                del self.chat_kernels[chat_id]
+
+        try:
+            if kernel.ws is not None:
+                try:
+                    await kernel.ws.close()
+                except Exception:
+                    pass
+                kernel.ws = None
+            try:
+                async with self.client.session.delete(
+                    f"api/kernels/{kernel.id}", params=self.client.params
+                ) as response:
+                    response.raise_for_status()
+            except Exception as err:
+                logger.exception("close kernel failed, %s", err)
+        finally:
+            await self._release()
+
+    async def _reserve(self) -> None:
         while True:
+            async with self._condition:
+                while self.size >= self.max_size:
+                    victim = self._get_least_recently_used_idle_kernel()
+                    if victim is not None:
+                        break
+                    await self._condition.wait()
+                else:
+                    self.size += 1
+                    return
+            await self.shutdown_kernel(victim)
+
+    async def _try_reserve(self) -> bool:
+        async with self._condition:
+            if self.size >= self.max_size:
+                return False
+            self.size += 1
+            return True
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.size -= 1
+            self._condition.notify_all()
+
+    def _get_least_recently_used_idle_kernel(self) -> Optional[JupyterKernel]:
+        idle = [
+            kernel for kernel in self.chat_kernels.values() if not kernel.lock.locked()
+        ]
+        return min(idle, key=lambda kernel: kernel.last_used) if idle else None
+
+    async def refill(self) -> None:
+        """Start kernels until `warm_size` are ready, without evicting any."""
+        while not self.closed and len(self.warm) + self._warming < self.warm_size:
+            self._warming += 1
+            try:
+                await self.sign_in()
+                if not await self._try_reserve():
+                    return
+                kernel = await self._start_reserved_kernel()
+            except Exception as err:
+                logger.warning(f"Could not pre-start Jupyter kernel: {err}")
+                return
+            finally:
+                self._warming -= 1
+            if self.closed:
+                await self.shutdown_kernel(kernel)
+                return
+            self.warm.append(kernel)
+
+    async def reap(self) -> None:
+        """Shut down idle chat kernels and warm kernels that stopped working."""
+        now = time.monotonic()
+        for kernel in list(self.chat_kernels.values()):
+            if not kernel.lock.locked() and now - kernel.last_used > self.idle_timeout:
+                await self.shutdown_kernel(kernel)
+
+        for kernel in list(self.warm):
+            if not await self.is_alive(kernel):
+                logger.info(f"Dropping unhealthy Jupyter kernel {kernel.id}")
+                await self.shutdown_kernel(kernel)
+
+    async def close(self) -> None:
+        self.closed = True
+        for task in (self._refill_task, self._reaper_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        for kernel in self.warm + list(self.chat_kernels.values()):
+            await self.shutdown_kernel(kernel)
+        await self.client.session.close()
+
+    def _start_background_tasks(self) -> None:
+        if self.closed:
+            return
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_periodically())
+        if len(self.warm) < self.warm_size and (
+            self._refill_task is None or self._refill_task.done()
+        ):
+            self._refill_task = asyncio.create_task(self.refill())
+
+    async def _reap_periodically(self) -> None:
+        interval = min(60, self.idle_timeout / 4)
+        while not self.closed:
+            await asyncio.sleep(interval)
             try:
-                # wait for message
-                message = await asyncio.wait_for(ws.recv(), self.timeout)
-                message_data = json.loads(message)
-                # msg id not match, skip
-                if message_data.get("parent_header", {}).get("msg_id") != msg_id:
-                    continue
-                # check message type
-                msg_type = message_data.get("msg_type")
-                match msg_type:
-                    case "stream":
-                        if message_data["content"]["name"] == "stdout":
-                            stdout += message_data["content"]["text"]
-                        elif message_data["content"]["name"] == "stderr":
-                            stderr += message_data["content"]["text"]
-                    case "execute_result" | "display_data":
-                        data = message_data["content"]["data"]
-                        if "image/png" in data:
-                            result.append(f"data:image/png;base64,{data['image/png']}")
-                        elif "text/plain" in data:
-                            result.append(data["text/plain"])
-                    case "error":
-                        stderr += "\n".join(message_data["content"]["traceback"])
-                    case "status":
-                        if message_data["content"]["execution_state"] == "idle":
-                            break
-
-            except asyncio.TimeoutError:
-                stderr += "\nExecution timed out."
-                break
-        self.result.stdout = stdout.strip()
-        self.result.stderr = stderr.strip()
-        self.result.result = "\n".join(result).strip() if result else ""
+                await self.reap()
+                # Nobody has used this server for a while (or its settings
+                # changed), don't keep warm kernels around for it
+                if (
+                    not self.chat_kernels
+                    and time.monotonic() - self.last_used > self.idle_timeout
+                ):
+                    remove_kernel_pool(self)
+                    await self.close()
+                    return
+                self._start_background_tasks()
+            except Exception as err:
+                logger.exception("reaping kernels failed, %s", err)
+
+
+# (base_url, token, password) -> pool
+_kernel_pools: dict[tuple, JupyterKernelPool] = {}
+
+
+def get_kernel_pool(
+    base_url: str, token: str = "", password: str = ""
+) -> JupyterKernelPool:
+    key = (base_url, token or "", password or "")
+    pool = _kernel_pools.get(key)
+    if pool is None or pool.closed:
+        pool = JupyterKernelPool(base_url, token or "", password or "")
+        _kernel_pools[key] = pool
+    return pool
+
+
+def remove_kernel_pool(pool: JupyterKernelPool) -> None:
+    for key, value in list(_kernel_pools.items()):
+        if value is pool:
+            del _kernel_pools[key]
+
+
+async def close_kernel_pools() -> None:
+    for pool in list(_kernel_pools.values()):
+        remove_kernel_pool(pool)
+        try:
+            await pool.close()
+        except Exception as err:
+            logger.exception("closing kernel pool failed, %s", err)
 
 
 async def execute_code_jupyter(
-    base_url: str, code: str, token: str = "", password: str = "", timeout: int = 60
+    base_url: str,
+    code: str,
+    token: str = "",
+    password: str = "",
+    timeout: int = 60,
+    chat_id: Optional[str] = None,
 ) -> dict:
+    if ENABLE_JUPYTER_KERNEL_POOL:
+        pool = get_kernel_pool(base_url, token, password)
+        result = await pool.execute(code, timeout, chat_id)
+        return result.model_dump()
+
     async with JupyterCodeExecuter(
         base_url, code, token, password, timeout
     ) as executor:
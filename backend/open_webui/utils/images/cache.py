@@ -0,0 +1,147 @@
+"""
+Content-addressed cache of generated images.
+
+A generation is keyed by a hash of everything that determines its output
+(engine, model, prompt, size, steps, seed, ...). The images are copied
+through the configured Storage provider under names derived from that key
+and deleted from it again when the entry is evicted; files left behind by a
+previous run are swept at startup. Requests that arrive while an identical
+generation is still running wait for its result instead of starting their
+own, and take over if that request is cancelled.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+from typing import Awaitable, BinaryIO, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.storage.provider import Storage
+from open_webui.utils.cache import LRUCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["IMAGES"])
+
+# (file, content type) of one image
+Image = tuple[BinaryIO, str]
+
+IMAGE_FILE_PREFIX = "image-generation-"
+
+
+def get_image_cache_key(params: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ImageGenerationCache:
+    def __init__(self, maxsize: int = 256):
+        self.entries = LRUCache(maxsize=maxsize, on_evict=self._delete_entry)
+        self.pending: dict[str, asyncio.Future] = {}
+
+    async def get(
+        self, key: str, generate: Callable[[], Awaitable[tuple[list[Image], dict]]]
+    ) -> tuple[list[Image], dict]:
+        """
+        Returns the images and metadata cached under `key`, opened from
+        storage, generating them with `generate` first on a miss. The caller
+        closes the returned files.
+        """
+        for _ in range(2):
+            entry = await self._get_entry(key, generate)
+            images = await asyncio.to_thread(self._open_entry, key, entry)
+            if images is not None:
+                return images, entry["metadata"]
+        raise Exception("Failed to load the generated images")
+
+    async def _get_entry(self, key: str, generate) -> dict:
+        while True:
+            entry = self.entries.get(key)
+            if entry is not None:
+                return entry
+
+            pending = self.pending.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the request we joined was cancelled, generate it ourselves
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it, don't warn about unretrieved errors
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.pending[key] = future
+        try:
+            images, metadata = await generate()
+            entry = await asyncio.to_thread(self._store_entry, key, images, metadata)
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self.pending.pop(key, None)
+
+    def _store_entry(self, key: str, images: list[Image], metadata: dict) -> dict:
+        stored = []
+        try:
+            for idx, (file, content_type) in enumerate(images):
+                extension = mimetypes.guess_extension(content_type) or ""
+                _, path = Storage.upload_file(
+                    file, f"{IMAGE_FILE_PREFIX}{key}-{idx}{extension}", {}
+                )
+                stored.append({"path": path, "content_type": content_type})
+        except Exception:
+            self._delete_entry(key, {"images": stored})
+            raise
+        finally:
+            for file, _ in images:
+                file.close()
+
+        entry = {"images": stored, "metadata": metadata}
+        self.entries.set(key, entry)
+        return entry
+
+    def _open_entry(self, key: str, entry: dict) -> Optional[list[Image]]:
+        images = []
+        try:
+            for image in entry["images"]:
+                file = open(Storage.get_file(image["path"]), "rb")
+                images.append((file, image["content_type"]))
+            return images
+        except Exception as e:
+            # Deleted from storage behind our back, generate it again
+            log.warning(f"Cached image for {key} is gone: {e}")
+            for file, _ in images:
+                file.close()
+            if self.entries.get(key) is entry:
+                self.entries.pop(key)
+                self._delete_entry(key, entry)
+            return None
+
+    def sweep(self) -> None:
+        """
+        Drops every entry and deletes all cached images from storage,
+        including those of previous runs, which the in-memory index no longer
+        knows about. Other workers regenerate the images they lose this way.
+        """
+        self.entries.clear()
+        try:
+            Storage.delete_files_by_prefix(IMAGE_FILE_PREFIX)
+        except Exception as e:
+            log.warning(f"Failed to sweep cached images: {e}")
+
+    def _delete_entry(self, key: str, entry: dict) -> None:
+        for image in entry["images"]:
+            try:
+                Storage.delete_file(image["path"])
+            except Exception as e:
+                log.warning(f"Failed to delete cached image {image['path']}: {e}")
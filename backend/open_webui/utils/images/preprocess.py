@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from open_webui.env import (
+    ENABLE_IMAGE_PREPROCESSING,
+    IMAGE_PREPROCESSING_CACHE_SIZE_MB,
+    IMAGE_PREPROCESSING_MAX_DIMENSION,
+    IMAGE_PREPROCESSING_QUALITY,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.cache import LRUCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Decoding/resizing is CPU bound; Pillow releases the GIL for most of it
+_executor = ThreadPoolExecutor(thread_name_prefix="image-preprocess")
+
+# sha256 of the original image bytes -> normalized data URL
+_cache = LRUCache(
+    maxsize=4096,
+    maxbytes=IMAGE_PREPROCESSING_CACHE_SIZE_MB * 1024 * 1024,
+    getsizeof=len,
+)
+
+
+def _encode(image: Image.Image, quality: int) -> tuple[bytes, str]:
+    buffer = io.BytesIO()
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if has_alpha:
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue(), "image/png"
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), "image/jpeg"
+
+
+def preprocess_image_bytes(
+    data: bytes,
+    mime_type: str,
+    max_dimension: int = IMAGE_PREPROCESSING_MAX_DIMENSION,
+    quality: int = IMAGE_PREPROCESSING_QUALITY,
+) -> tuple[bytes, str]:
+    """
+    Downscale `data` so its longest side is at most `max_dimension` and
+    re-encode it. Returns the original bytes when that isn't smaller.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, "is_animated", False):
+            return data, mime_type
+
+        resized = max(image.size) > max_dimension
+        image = ImageOps.exif_transpose(image)
+        if resized:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        encoded, encoded_type = _encode(image, quality)
+
+    if not resized and len(encoded) >= len(data):
+        return data, mime_type
+    return encoded, encoded_type
+
+
+def _preprocess_data_url(url: str) -> str:
+    try:
+        header, b64 = url.split(",", 1)
+        mime_type = header[len("data:") :].split(";", 1)[0] or "image/png"
+        data = base64.b64decode(b64)
+    except Exception as e:
+        log.debug(f"Skipping image preprocessing: {e}")
+        return url
+
+    key = hashlib.sha256(data).hexdigest()
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        encoded, encoded_type = preprocess_image_bytes(data, mime_type)
+    except Exception as e:
+        log.debug(f"Skipping image preprocessing: {e}")
+        encoded, encoded_type = data, mime_type
+
+    result = f"data:{encoded_type};base64,{base64.b64encode(encoded).decode()}"
+    _cache.set(key, result)
+    return result
+
+
+def _preprocess_image(image: str) -> str:
+    if image.startswith("data:"):
+        return _preprocess_data_url(image)
+    # Ollama style `images` entries: bare base64 without a data URL header
+    url = _preprocess_data_url(f"data:image/png;base64,{image}")
+    return url.split(",", 1)[1]
+
+
+async def preprocess_image_url(url: str) -> str:
+    """Normalize a base64 data URL off the event loop; other URLs pass through."""
+    if not url.startswith("data:image/") or ";base64," not in url:
+        return url
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _preprocess_data_url, url)
+
+
+async def preprocess_message_images(messages: list[dict]) -> list[dict]:
+    """
+    Downscale and re-encode the inline images of all messages in place, both
+    `image_url` content parts and Ollama style `images`.
+
+    None of the supported backends can fetch our file URLs, so images stay
+    inline (as smaller base64) rather than being swapped for file references.
+    """
+    if not ENABLE_IMAGE_PREPROCESSING:
+        return messages
+
+    jobs = []
+
+    async def update_part(part: dict):
+        image_url = part.get("image_url")
+        if isinstance(image_url, dict) and image_url.get("url"):
+            image_url["url"] = await preprocess_image_url(image_url["url"])
+
+    async def update_images(message: dict, idx: int):
+        loop = asyncio.get_running_loop()
+        message["images"][idx] = await loop.run_in_executor(
+            _executor, _preprocess_image, message["images"][idx]
+        )
+
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "image_url":
+                    jobs.append(update_part(part))
+
+        images = message.get("images")
+        if isinstance(images, list):
+            for idx, image in enumerate(images):
+                if isinstance(image, str) and not image.startswith("http"):
+                    jobs.append(update_images(message, idx))
+
+    if jobs:
+        await asyncio.gather(*jobs)
+    return messages
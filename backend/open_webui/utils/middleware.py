@@ -19,6 +19,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 
 from fastapi import Request, HTTPException
+from opentelemetry import metrics
 from starlette.responses import Response, StreamingResponse, JSONResponse
 
 
@@ -49,6 +50,7 @@ from open_webui.routers.pipelines import (
     process_pipeline_outlet_filter,
 )
 from open_webui.utils.vision_router import vision_router_inlet
+from open_webui.utils.images.preprocess import preprocess_message_images
 from open_webui.routers.memories import query_memory, QueryMemoryForm
 
 from open_webui.utils.webhook import post_webhook
@@ -77,7 +79,7 @@ from open_webui.utils.misc import (
     prepend_to_first_user_message_content,
     convert_logit_bias_input_to_json,
 )
-from open_webui.utils.tools import get_tools
+from open_webui.utils.tools import get_tools, run_tool_calls
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
@@ -85,6 +87,11 @@ from open_webui.utils.filter import (
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
 from open_webui.utils.payload import apply_model_system_prompt_to_body
+from open_webui.utils.telemetry.stages import (
+    finish_stage_timer,
+    get_stage_timer,
+    stage,
+)
 
 from open_webui.tasks import create_task
 
@@ -99,6 +106,7 @@ from open_webui.env import (
     CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    ENABLE_CHAT_STAGE_TIMINGS,
 )
 from open_webui.constants import TASKS
 
@@ -107,6 +115,47 @@ logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# No-ops until a MeterProvider is installed (ENABLE_OTEL_METRICS)
+meter = metrics.get_meter(__name__)
+active_streams_counter = meter.create_up_down_counter(
+    name="webui.chat.streams.active",
+    description="Chat responses currently being streamed",
+    unit="streams",
+)
+tokens_counter = meter.create_counter(
+    name="webui.chat.tokens",
+    description="Tokens reported by models in their usage",
+    unit="tokens",
+)
+
+
+def finish_stage_timings(metadata: dict) -> None:
+    timer = finish_stage_timer()
+    if timer is None:
+        return
+
+    timings = timer.to_dict()
+    log.debug(f"Chat stage timings: {timings}")
+    if (
+        ENABLE_CHAT_STAGE_TIMINGS
+        and metadata.get("chat_id")
+        and metadata.get("message_id")
+    ):
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            metadata["chat_id"],
+            metadata["message_id"],
+            {"timings": timings},
+        )
+
+
+def record_token_usage(usage: Optional[dict]) -> None:
+    if not isinstance(usage, dict):
+        return
+    for token_type in ("prompt", "completion"):
+        tokens = usage.get(f"{token_type}_tokens")
+        if isinstance(tokens, int) and tokens > 0:
+            tokens_counter.add(tokens, {"type": token_type})
+
 
 async def chat_completion_tools_handler(
     request: Request, body: dict, extra_params: dict, user: UserModel, models, tools
@@ -502,6 +551,21 @@ async def chat_web_search_handler(
     return form_data
 
 
+def get_image_generation_seed(form_data: dict, model: dict) -> Optional[int]:
+    """
+    The seed set in the chat's or else the model's parameters. Only seeded
+    generations are reproducible, so only those can be served from the image
+    generation cache.
+    """
+    seed = form_data.get("seed", form_data.get("options", {}).get("seed"))
+    if seed is None:
+        seed = (model or {}).get("info", {}).get("params", {}).get("seed")
+    try:
+        return int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
 async def chat_image_generation_handler(
     request: Request, form_data: dict, extra_params: dict, user
 ):
@@ -554,7 +618,14 @@ async def chat_image_generation_handler(
     try:
         images = await image_generations(
             request=request,
-            form_data=GenerateImageForm(**{"prompt": prompt}),
+            form_data=GenerateImageForm(
+                **{
+                    "prompt": prompt,
+                    "seed": get_image_generation_seed(
+                        form_data, extra_params.get("__model__")
+                    ),
+                }
+            ),
             user=user,
         )
 
@@ -831,54 +902,69 @@ async def process_chat_payload(request, form_data, user, metadata, model):
 
     variables = form_data.pop("variables", None)
 
+    # Downscale and re-encode inline images before anything forwards them
+    try:
+        with stage("image_preprocessing"):
+            form_data["messages"] = await preprocess_message_images(
+                form_data.get("messages", [])
+            )
+    except Exception as e:
+        log.exception(f"Error preprocessing images: {e}")
+
     # Vision router inlet (placeholder)
     try:
-        form_data = await vision_router_inlet(request, form_data, user, metadata)
+        with stage("vision_router"):
+            form_data = await vision_router_inlet(request, form_data, user, metadata)
     except Exception:
         pass
 
     # Process the form_data through the pipeline
     try:
-        form_data = await process_pipeline_inlet_filter(
-            request, form_data, user, models
-        )
+        with stage("pipeline_inlet"):
+            form_data = await process_pipeline_inlet_filter(
+                request, form_data, user, models
+            )
     except Exception as e:
         raise e
 
     try:
-        filter_functions = [
-            Functions.get_function_by_id(filter_id)
-            for filter_id in get_sorted_filter_ids(
-                request, model, metadata.get("filter_ids", [])
-            )
-        ]
+        with stage("filter_inlet"):
+            filter_functions = [
+                Functions.get_function_by_id(filter_id)
+                for filter_id in get_sorted_filter_ids(
+                    request, model, metadata.get("filter_ids", [])
+                )
+            ]
 
-        form_data, flags = await process_filter_functions(
-            request=request,
-            filter_functions=filter_functions,
-            filter_type="inlet",
-            form_data=form_data,
-            extra_params=extra_params,
-        )
+            form_data, flags = await process_filter_functions(
+                request=request,
+                filter_functions=filter_functions,
+                filter_type="inlet",
+                form_data=form_data,
+                extra_params=extra_params,
+            )
     except Exception as e:
         raise Exception(f"Error: {e}")
 
     features = form_data.pop("features", None)
     if features:
         if "memory" in features and features["memory"]:
-            form_data = await chat_memory_handler(
-                request, form_data, extra_params, user
-            )
+            with stage("memory"):
+                form_data = await chat_memory_handler(
+                    request, form_data, extra_params, user
+                )
 
         if "web_search" in features and features["web_search"]:
-            form_data = await chat_web_search_handler(
-                request, form_data, extra_params, user
-            )
+            with stage("web_search"):
+                form_data = await chat_web_search_handler(
+                    request, form_data, extra_params, user
+                )
 
         if "image_generation" in features and features["image_generation"]:
-            form_data = await chat_image_generation_handler(
-                request, form_data, extra_params, user
-            )
+            with stage("image_generation"):
+                form_data = await chat_image_generation_handler(
+                    request, form_data, extra_params, user
+                )
 
         if "code_interpreter" in features and features["code_interpreter"]:
             form_data["messages"] = add_or_update_user_message(
@@ -915,17 +1001,18 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     tools_dict = {}
 
     if tool_ids:
-        tools_dict = get_tools(
-            request,
-            tool_ids,
-            user,
-            {
-                **extra_params,
-                "__model__": models[task_model_id],
-                "__messages__": form_data["messages"],
-                "__files__": metadata.get("files", []),
-            },
-        )
+        with stage("tools_setup"):
+            tools_dict = get_tools(
+                request,
+                tool_ids,
+                user,
+                {
+                    **extra_params,
+                    "__model__": models[task_model_id],
+                    "__messages__": form_data["messages"],
+                    "__files__": metadata.get("files", []),
+                },
+            )
 
     if tool_servers:
         for tool_server in tool_servers:
@@ -949,15 +1036,19 @@ async def process_chat_payload(request, form_data, user, metadata, model):
         else:
             # If the function calling is not native, then call the tools function calling handler
             try:
-                form_data, flags = await chat_completion_tools_handler(
-                    request, form_data, extra_params, user, models, tools_dict
-                )
+                with stage("tools"):
+                    form_data, flags = await chat_completion_tools_handler(
+                        request, form_data, extra_params, user, models, tools_dict
+                    )
                 sources.extend(flags.get("sources", []))
             except Exception as e:
                 log.exception(e)
 
     try:
-        form_data, flags = await chat_completion_files_handler(request, form_data, user)
+        with stage("files"):
+            form_data, flags = await chat_completion_files_handler(
+                request, form_data, user
+            )
         sources.extend(flags.get("sources", []))
     except Exception as e:
         log.exception(e)
@@ -1292,6 +1383,8 @@ async def process_chat_response(
                         },
                     )
 
+                record_token_usage(response_data.get("usage"))
+
                 choices = response_data.get("choices", [])
                 if choices and choices[0].get("message", {}).get("content"):
                     content = response_data["choices"][0]["message"]["content"]
@@ -1821,6 +1914,9 @@ async def process_chat_response(
 
             solution_tags = [("<|begin_of_solution|>", "<|end_of_solution|>")]
 
+            stage_timer = get_stage_timer()
+            upstream = model.get("owned_by", "unknown")
+            active_streams_counter.add(1)
             try:
                 for event in events:
                     await event_emitter(
@@ -1908,6 +2004,7 @@ async def process_chat_response(
                                             )
                                         usage = data.get("usage", {})
                                         if usage:
+                                            record_token_usage(usage)
                                             await event_emitter(
                                                 {
                                                     "type": "chat:completion",
@@ -1919,6 +2016,8 @@ async def process_chat_response(
                                         continue
 
                                     delta = choices[0].get("delta", {})
+                                    if stage_timer is not None:
+                                        stage_timer.record_first_token(upstream)
                                     delta_tool_calls = delta.get("tool_calls", None)
 
                                     if delta_tool_calls:
@@ -2084,7 +2183,8 @@ async def process_chat_response(
                                             )
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
+                                            # Save message in the database, it
+                                            # is indexed for search once done
                                             Chats.upsert_message_to_chat_by_id_and_message_id(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
@@ -2093,6 +2193,7 @@ async def process_chat_response(
                                                         content_blocks
                                                     ),
                                                 },
+                                                reindex=False,
                                             )
                                         else:
                                             data = {
@@ -2188,9 +2289,7 @@ async def process_chat_response(
 
                     tools = metadata.get("tools", {})
 
-                    results = []
-
-                    for tool_call in response_tool_calls:
+                    async def execute_tool_call(tool_call):
                         tool_call_id = tool_call.get("id", "")
                         tool_name = tool_call.get("function", {}).get("name", "")
                         tool_args = tool_call.get("function", {}).get("arguments", "{}")
@@ -2241,7 +2340,7 @@ async def process_chat_response(
                                 }
 
                                 if tool.get("direct", False):
-                                    tool_result = await event_caller(
+                                    tool_call_coroutine = event_caller(
                                         {
                                             "type": "execute:tool",
                                             "data": {
@@ -2258,10 +2357,11 @@ async def process_chat_response(
 
                                 else:
                                     tool_function = tool["callable"]
-                                    tool_result = await tool_function(
+                                    tool_call_coroutine = tool_function(
                                         **tool_function_params
                                     )
 
+                                tool_result = await tool_call_coroutine
                             except Exception as e:
                                 tool_result = str(e)
 
@@ -2280,18 +2380,34 @@ async def process_chat_response(
                                 tool_result, indent=2, ensure_ascii=False
                             )
 
-                        results.append(
+                        return {
+                            "tool_call_id": tool_call_id,
+                            "content": tool_result,
+                            **(
+                                {"files": tool_result_files}
+                                if tool_result_files
+                                else {}
+                            ),
+                        }
+
+                    # Results are shown as each call finishes
+                    async def emit_tool_results(results):
+                        content_blocks[-1]["results"] = results
+                        await event_emitter(
                             {
-                                "tool_call_id": tool_call_id,
-                                "content": tool_result,
-                                **(
-                                    {"files": tool_result_files}
-                                    if tool_result_files
-                                    else {}
-                                ),
+                                "type": "chat:completion",
+                                "data": {
+                                    "content": serialize_content_blocks(content_blocks),
+                                },
                             }
                         )
 
+                    with stage("tool_calls"):
+                        results = await run_tool_calls(
+                            response_tool_calls,
+                            execute_tool_call,
+                            on_result=emit_tool_results,
+                        )
                     content_blocks[-1]["results"] = results
 
                     content_blocks.append(
@@ -2399,6 +2515,7 @@ async def process_chat_response(
                                             else None
                                         ),
                                         request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
+                                        chat_id=metadata.get("chat_id"),
                                     )
                                 else:
                                     output = {
@@ -2420,7 +2537,7 @@ async def process_chat_response(
                                                     load_b64_image_data(line)
                                                 )
                                                 if image_data is not None:
-                                                    image_url = upload_image(
+                                                    image_url = await upload_image(
                                                         request,
                                                         image_data,
                                                         content_type,
@@ -2445,7 +2562,7 @@ async def process_chat_response(
                                                     load_b64_image_data(line)
                                                 )
                                                 if image_data is not None:
-                                                    image_url = upload_image(
+                                                    image_url = await upload_image(
                                                         request,
                                                         image_data,
                                                         content_type,
@@ -2522,6 +2639,8 @@ async def process_chat_response(
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                else:
+                    Chats.update_chat_search_index_by_id(metadata["chat_id"])
 
                 # Send a webhook notification if the user is not active
                 if not get_active_status_by_user_id(user.id):
@@ -2560,6 +2679,11 @@ async def process_chat_response(
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                else:
+                    Chats.update_chat_search_index_by_id(metadata["chat_id"])
+            finally:
+                active_streams_counter.add(-1)
+                finish_stage_timings(metadata)
 
             if response.background is not None:
                 await response.background()
@@ -2578,29 +2702,38 @@ async def process_chat_response(
             def wrap_item(item):
                 return f"data: {item}\n\n"
 
-            for event in events:
-                event, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=event,
-                    extra_params=extra_params,
-                )
+            stage_timer = get_stage_timer()
+            upstream = model.get("owned_by", "unknown")
+            active_streams_counter.add(1)
+            try:
+                for event in events:
+                    event, _ = await process_filter_functions(
+                        request=request,
+                        filter_functions=filter_functions,
+                        filter_type="stream",
+                        form_data=event,
+                        extra_params=extra_params,
+                    )
 
-                if event:
-                    yield wrap_item(json.dumps(event))
+                    if event:
+                        yield wrap_item(json.dumps(event))
 
-            async for data in original_generator:
-                data, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=data,
-                    extra_params=extra_params,
-                )
+                async for data in original_generator:
+                    data, _ = await process_filter_functions(
+                        request=request,
+                        filter_functions=filter_functions,
+                        filter_type="stream",
+                        form_data=data,
+                        extra_params=extra_params,
+                    )
 
-                if data:
-                    yield data
+                    if data:
+                        if stage_timer is not None:
+                            stage_timer.record_first_token(upstream)
+                        yield data
+            finally:
+                active_streams_counter.add(-1)
+                finish_stage_timings(metadata)
 
         return StreamingResponse(
             stream_wrapper(response.body_iterator, events),
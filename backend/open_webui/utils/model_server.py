@@ -0,0 +1,501 @@
+"""
+Local model runtime shared by all web workers.
+
+Embedding, reranking, whisper and speech models are loaded once into a
+separate process that listens on a Unix socket (MODEL_SERVER_SOCKET). Web
+workers talk to it through proxies that expose the same methods as the
+local models (`encode`, `predict`, `transcribe`, `synthesize`).
+
+Replies are awaited for at most MODEL_SERVER_TIMEOUT seconds; when the
+server is unreachable or too slow, the proxy loads the model in-process and
+keeps using that copy.
+
+Whether served from here or loaded in-process, concurrent encode/predict
+calls can be micro-batched into one forward pass (ENABLE_MODEL_BATCHING).
+
+Run it on its own with
+
+    python -m open_webui.utils.model_server
+
+or let the first web worker that needs it start it (MODEL_SERVER_AUTOSTART).
+"""
+
+import argparse
+import fcntl
+import hashlib
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import numpy as np
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    ENABLE_MODEL_BATCHING,
+    ENABLE_MODEL_SERVER,
+    MODEL_BATCH_SIZE,
+    MODEL_BATCH_WAIT_MS,
+    MODEL_SERVER_AUTOSTART,
+    MODEL_SERVER_SOCKET,
+    MODEL_SERVER_TIMEOUT,
+)
+from open_webui.utils.batching import MicroBatcher
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Models whose encode()/predict() take a list of independent inputs
+BATCHED_KINDS = {"sentence_transformer", "cross_encoder"}
+
+CONNECT_TIMEOUT = 60
+
+
+####################################
+# Models
+####################################
+
+
+class WhisperRuntime:
+    """faster-whisper model whose transcribe() returns plain, picklable data."""
+
+    def __init__(self, **kwargs):
+        from faster_whisper import WhisperModel
+
+        try:
+            self.model = WhisperModel(**kwargs)
+        except Exception:
+            log.warning(
+                "WhisperModel initialization failed, attempting download with local_files_only=False"
+            )
+            self.model = WhisperModel(**{**kwargs, "local_files_only": False})
+
+    def transcribe(self, audio, **kwargs):
+        segments, info = self.model.transcribe(audio, **kwargs)
+        segments = [
+            SimpleNamespace(start=segment.start, end=segment.end, text=segment.text)
+            for segment in segments
+        ]
+        return segments, SimpleNamespace(
+            language=info.language,
+            language_probability=info.language_probability,
+            duration=info.duration,
+        )
+
+
+class SpeechT5Runtime:
+    """SpeechT5 text-to-speech with the CMU Arctic speaker embeddings."""
+
+    DEFAULT_SPEAKER_INDEX = 6799
+
+    def __init__(
+        self,
+        model: str = "microsoft/speecht5_tts",
+        speaker_dataset: str = "Matthijs/cmu-arctic-xvectors",
+    ):
+        from transformers import pipeline
+        from datasets import load_dataset
+
+        self.synthesiser = pipeline("text-to-speech", model)
+        self.embeddings_dataset = load_dataset(speaker_dataset, split="validation")
+
+    def synthesize(self, text: str, speaker: Optional[str] = None) -> dict:
+        import torch
+
+        speaker_index = self.DEFAULT_SPEAKER_INDEX
+        try:
+            speaker_index = self.embeddings_dataset["filename"].index(speaker)
+        except Exception:
+            pass
+
+        speaker_embedding = torch.tensor(
+            self.embeddings_dataset[speaker_index]["xvector"]
+        ).unsqueeze(0)
+
+        speech = self.synthesiser(
+            text, forward_params={"speaker_embeddings": speaker_embedding}
+        )
+        return {"audio": speech["audio"], "sampling_rate": speech["sampling_rate"]}
+
+
+def load_model(kind: str, kwargs: dict):
+    if kind == "sentence_transformer":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(**kwargs)
+    elif kind == "cross_encoder":
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(**kwargs)
+    elif kind == "faster_whisper":
+        return WhisperRuntime(**kwargs)
+    elif kind == "speech_t5":
+        return SpeechT5Runtime(**kwargs)
+    raise ValueError(f"Unknown model kind: {kind}")
+
+
+class BatchedModel:
+    """
+    Wraps a SentenceTransformer or CrossEncoder so that concurrent
+    encode()/predict() calls share one forward pass. Everything else is
+    passed through to the model.
+    """
+
+    def __init__(self, model, name: str, batch_size: int, batch_wait_ms: float):
+        self.model = model
+        self.name = name
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self._batchers: dict[tuple, MicroBatcher] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, sentences, *args, **kwargs):
+        return self._call("encode", sentences, args, kwargs)
+
+    def predict(self, sentences, *args, **kwargs):
+        return self._call("predict", sentences, args, kwargs)
+
+    def _call(self, method: str, inputs, args: tuple, kwargs: dict):
+        try:
+            batcher = self._get_batcher(method, args, kwargs)
+        except Exception:
+            # Arguments we can't key a batch on, run them on their own
+            return getattr(self.model, method)(inputs, *args, **kwargs)
+
+        single = isinstance(inputs, (str, tuple))
+        items = [inputs] if single else list(inputs)
+
+        results = batcher.submit(items)
+        results = np.stack(results) if len(results) else np.asarray(results)
+        return results[0] if single else results
+
+    def _get_batcher(self, method: str, args: tuple, kwargs: dict) -> MicroBatcher:
+        # Only calls with the same arguments can share a batch
+        batcher_key = (method, pickle.dumps((args, sorted(kwargs.items()))))
+        with self._lock:
+            batcher = self._batchers.get(batcher_key)
+            if batcher is None:
+                fn = getattr(self.model, method)
+                batcher = MicroBatcher(
+                    lambda items: list(
+                        fn(items, *args, **{"batch_size": self.batch_size, **kwargs})
+                    ),
+                    max_batch_size=self.batch_size,
+                    max_wait_ms=self.batch_wait_ms,
+                    name=f"{self.name}.{method}",
+                )
+                self._batchers[batcher_key] = batcher
+        return batcher
+
+
+def load_local_model(
+    kind: str,
+    kwargs: dict,
+    batch_size: int = MODEL_BATCH_SIZE,
+    batch_wait_ms: float = MODEL_BATCH_WAIT_MS,
+):
+    model = load_model(kind, kwargs)
+    if ENABLE_MODEL_BATCHING and kind in BATCHED_KINDS:
+        return BatchedModel(model, kind, batch_size, batch_wait_ms)
+    return model
+
+
+def get_model_key(kind: str, kwargs: dict) -> str:
+    return hashlib.sha256(pickle.dumps((kind, sorted(kwargs.items())))).hexdigest()
+
+
+####################################
+# Wire format: 4-byte length + pickle
+####################################
+
+
+def send_message(sock: socket.socket, message: Any) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(struct.pack("!I", len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Model server connection closed")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket) -> Any:
+    (size,) = struct.unpack("!I", _recv_exactly(sock, 4))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+####################################
+# Server
+####################################
+
+
+class ModelRegistry:
+    def __init__(self, batch_size: int, batch_wait_ms: float):
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.models: dict[str, Any] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def load(self, kind: str, kwargs: dict) -> str:
+        key = get_model_key(kind, kwargs)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self.models:
+                log.info(f"Loading {kind} model: {kwargs}")
+                self.models[key] = load_local_model(
+                    kind, kwargs, self.batch_size, self.batch_wait_ms
+                )
+        return key
+
+    def call(self, key: str, method: str, args: tuple, kwargs: dict):
+        return getattr(self.models[key], method)(*args, **kwargs)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        registry: ModelRegistry = self.server.registry
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                if message["op"] == "load":
+                    result = registry.load(message["kind"], message["kwargs"])
+                elif message["op"] == "call":
+                    result = registry.call(
+                        message["key"],
+                        message["method"],
+                        message.get("args", ()),
+                        message.get("kwargs", {}),
+                    )
+                elif message["op"] == "ping":
+                    result = "pong"
+                else:
+                    raise ValueError(f"Unknown op: {message['op']}")
+                response = {"result": result}
+            except Exception as e:
+                log.exception(f"Model server request failed: {e}")
+                response = {"error": f"{type(e).__name__}: {e}"}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class _ModelServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str, batch_size: int, batch_wait_ms: float) -> None:
+    # One server per socket: the lock is held for the lifetime of the process
+    lock_file = open(f"{socket_path}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        log.info(f"Model server already running on {socket_path}")
+        return
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = _ModelServer(socket_path, _RequestHandler)
+    os.chmod(socket_path, 0o600)
+    server.registry = ModelRegistry(batch_size, batch_wait_ms)
+
+    log.info(f"Model server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+####################################
+# Client
+####################################
+
+
+class ModelServerClient:
+    def __init__(
+        self,
+        socket_path: str,
+        autostart: bool = False,
+        timeout: Optional[float] = MODEL_SERVER_TIMEOUT,
+    ):
+        self.socket_path = socket_path
+        self.autostart = autostart
+        self.timeout = timeout
+        self._local = threading.local()
+        self._start_lock = threading.Lock()
+
+    def request(self, message: dict) -> Any:
+        for attempt in range(2):
+            sock = self._get_socket()
+            try:
+                send_message(sock, message)
+                response = recv_message(sock)
+                break
+            except (ConnectionError, OSError) as e:
+                # The reply may still arrive, so the connection can't be reused
+                self._local.sock = None
+                sock.close()
+                if attempt or isinstance(e, TimeoutError):
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Model server: {response['error']}")
+        return response["result"]
+
+    def _get_socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._connect()
+            self._local.sock = sock
+        return sock
+
+    def _connect(self) -> socket.socket:
+        try:
+            return self._open_socket()
+        except OSError:
+            if not self.autostart:
+                raise
+
+        with self._start_lock:
+            try:
+                return self._open_socket()
+            except OSError:
+                pass
+
+            log.info(f"Starting model server on {self.socket_path}")
+            subprocess.Popen(
+                [sys.executable, "-m", "open_webui.utils.model_server"],
+                env={**os.environ, "MODEL_SERVER_SOCKET": self.socket_path},
+                start_new_session=True,
+            )
+            deadline = time.monotonic() + CONNECT_TIMEOUT
+            while True:
+                try:
+                    return self._open_socket()
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.2)
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+
+class RemoteModel:
+    """
+    Proxy to a model loaded in the model server. Falls back to loading the
+    model in this process once the server can't be reached or times out.
+    """
+
+    def __init__(self, client: ModelServerClient, kind: str, kwargs: dict):
+        self.client = client
+        self.kind = kind
+        self.kwargs = kwargs
+        self.key = None
+        self._local_model = None
+        self._lock = threading.Lock()
+        try:
+            self.key = client.request({"op": "load", "kind": kind, "kwargs": kwargs})
+        except (ConnectionError, OSError) as e:
+            log.warning(f"Model server unavailable, loading {kind} in-process: {e}")
+
+    def _call(self, method: str, *args, **kwargs):
+        if self.key is not None:
+            try:
+                return self.client.request(
+                    {
+                        "op": "call",
+                        "key": self.key,
+                        "method": method,
+                        "args": args,
+                        "kwargs": kwargs,
+                    }
+                )
+            except (ConnectionError, OSError) as e:
+                log.warning(
+                    f"Model server request failed, running {self.kind} in-process: {e}"
+                )
+                self.key = None
+        return getattr(self._get_local_model(), method)(*args, **kwargs)
+
+    def _get_local_model(self):
+        with self._lock:
+            if self._local_model is None:
+                self._local_model = load_local_model(self.kind, self.kwargs)
+        return self._local_model
+
+    def encode(self, sentences, *args, **kwargs):
+        return self._call("encode", sentences, *args, **kwargs)
+
+    def predict(self, sentences, *args, **kwargs):
+        return self._call("predict", sentences, *args, **kwargs)
+
+    def transcribe(self, audio, **kwargs):
+        return self._call("transcribe", audio, **kwargs)
+
+    def synthesize(self, text, speaker=None):
+        return self._call("synthesize", text, speaker)
+
+
+_client: Optional[ModelServerClient] = None
+
+
+def get_model(kind: str, **kwargs):
+    """
+    Load a local model: in the model server when ENABLE_MODEL_SERVER is set,
+    in this process otherwise.
+    """
+    global _client
+    if not ENABLE_MODEL_SERVER:
+        return load_local_model(kind, kwargs)
+
+    if _client is None:
+        _client = ModelServerClient(MODEL_SERVER_SOCKET, MODEL_SERVER_AUTOSTART)
+    return RemoteModel(_client, kind, kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local model server")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET)
+    parser.add_argument("--batch-size", type=int, default=MODEL_BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=float, default=MODEL_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.socket, args.batch_size, args.batch_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,20 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.users.total / webui.users.active (gauges, refreshed in the background)
+* webui.chat.streams.active (up-down counter, chat responses being streamed)
+* webui.chat.tokens (counter, prompt/completion tokens reported by models)
+* webui.db.pool.connections (gauge, by state: used/idle)
+* webui.chat.stage.duration (histogram, milliseconds per pipeline stage)
+* webui.chat.ttft (histogram, milliseconds to the first token per upstream)
+* webui.chat.db_queries (histogram, database queries per chat turn)
+* webui.event_loop.lag (histogram, milliseconds)
+* model.batch.size (histogram, items per local model forward pass)
+* model.batch.queue_wait (histogram, milliseconds)
+* model.batch.queue_depth (gauge, requests waiting for a batch)
 
-Attributes used: http.method, http.route, http.status_code
+Attributes used: http.method, http.route, http.status_code, state, type,
+stage, upstream
 
 If you wish to add more attributes (e.g. user-agent) you can, but beware of
 high-cardinality label sets.
@@ -17,8 +29,10 @@ high-cardinality label sets.
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
-from typing import Dict, List, Sequence, Any
+from typing import Dict, List, Optional, Sequence, Any
 from base64 import b64encode
 
 from fastapi import FastAPI, Request
@@ -31,11 +45,12 @@ from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
     OTLPMetricExporter as OTLPHttpMetricExporter,
 )
 from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.view import View
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
 from opentelemetry.sdk.metrics.export import (
     PeriodicExportingMetricReader,
 )
 from opentelemetry.sdk.resources import Resource
+from sqlalchemy import Engine
 
 from open_webui.env import (
     OTEL_SERVICE_NAME,
@@ -44,12 +59,41 @@ from open_webui.env import (
     OTEL_METRICS_BASIC_AUTH_PASSWORD,
     OTEL_METRICS_OTLP_SPAN_EXPORTER,
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
+    OTEL_METRICS_GAUGE_REFRESH_INTERVAL,
+    SRC_LOG_LEVELS,
 )
-from open_webui.socket.main import get_active_user_ids
+from open_webui.socket.main import get_active_user_count
 from open_webui.models.users import Users
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
+# Values of gauges that need a query, kept up to date by
+# `periodic_gauge_refresh` so that metric collection never blocks on them
+_gauge_values: Dict[str, int] = {}
+
+
+def refresh_gauges() -> None:
+    _gauge_values["users.total"] = Users.get_num_users() or 0
+    _gauge_values["users.active"] = get_active_user_count()
+
+
+async def periodic_gauge_refresh() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(refresh_gauges)
+        except Exception as e:
+            log.warning(f"Failed to refresh metric gauges: {e}")
+        await asyncio.sleep(OTEL_METRICS_GAUGE_REFRESH_INTERVAL)
+
+
+def _observe_cached(key: str) -> Sequence[metrics.Observation]:
+    if key not in _gauge_values:
+        return []
+    return [metrics.Observation(value=_gauge_values[key])]
+
 
 def _build_meter_provider(resource: Resource) -> MeterProvider:
     """Return a configured MeterProvider."""
@@ -99,6 +143,61 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active",
         ),
+        View(
+            instrument_name="webui.chat.streams.active",
+        ),
+        View(
+            instrument_name="webui.chat.tokens",
+            attribute_keys=["type"],
+        ),
+        View(
+            instrument_name="webui.db.pool.connections",
+            attribute_keys=["state"],
+        ),
+        View(
+            instrument_name="model.batch.queue_depth",
+            attribute_keys=["batcher"],
+        ),
+        View(
+            instrument_name="webui.chat.stage.duration",
+            attribute_keys=["stage"],
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+            ),
+        ),
+        View(
+            instrument_name="webui.chat.ttft",
+            attribute_keys=["upstream"],
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000]
+            ),
+        ),
+        View(
+            instrument_name="webui.chat.db_queries",
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[5, 10, 20, 50, 100, 200, 500]
+            ),
+        ),
+        View(
+            instrument_name="webui.event_loop.lag",
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[1, 5, 10, 25, 50, 100, 250, 1000]
+            ),
+        ),
+        View(
+            instrument_name="model.batch.size",
+            attribute_keys=["batcher"],
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[1, 2, 4, 8, 16, 32, 64, 128, 256]
+            ),
+        ),
+        View(
+            instrument_name="model.batch.queue_wait",
+            attribute_keys=["batcher"],
+            aggregation=ExplicitBucketHistogramAggregation(
+                boundaries=[0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000]
+            ),
+        ),
     ]
 
     provider = MeterProvider(
@@ -109,7 +208,9 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
     return provider
 
 
-def setup_metrics(app: FastAPI, resource: Resource) -> None:
+def setup_metrics(
+    app: FastAPI, resource: Resource, db_engine: Optional[Engine] = None
+) -> None:
     """Attach OTel metrics middleware to *app* and initialise provider."""
 
     metrics.set_meter_provider(_build_meter_provider(resource))
@@ -130,19 +231,23 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
     def observe_active_users(
         options: metrics.CallbackOptions,
     ) -> Sequence[metrics.Observation]:
-        return [
-            metrics.Observation(
-                value=len(get_active_user_ids()),
-            )
-        ]
+        return _observe_cached("users.active")
 
     def observe_total_registered_users(
         options: metrics.CallbackOptions,
     ) -> Sequence[metrics.Observation]:
+        return _observe_cached("users.total")
+
+    def observe_db_pool_connections(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        # In-memory counters of the pool, cheap to read on every collection
+        pool = db_engine.pool if db_engine is not None else None
+        if not hasattr(pool, "checkedout"):
+            return []
         return [
-            metrics.Observation(
-                value=len(Users.get_users()["users"]),
-            )
+            metrics.Observation(value=pool.checkedout(), attributes={"state": "used"}),
+            metrics.Observation(value=pool.checkedin(), attributes={"state": "idle"}),
         ]
 
     meter.create_observable_gauge(
@@ -159,6 +264,13 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_active_users],
     )
 
+    meter.create_observable_gauge(
+        name="webui.db.pool.connections",
+        description="Database connections held by the pool",
+        unit="connections",
+        callbacks=[observe_db_pool_connections],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
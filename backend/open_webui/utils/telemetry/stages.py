@@ -0,0 +1,158 @@
+"""Per-request timings of the chat completion pipeline.
+
+`start_stage_timer` is called when a chat completion request comes in, and
+the pipeline wraps each of its stages in `stage(name)`. Every stage becomes
+an OTel span and a `webui.chat.stage.duration` measurement. Alongside, the
+timer records time to first token per upstream, counts the database queries
+made for the request and adds up how long the event loop was blocked while
+it ran. Without an OTel provider the spans and metrics are no-ops and only
+the timer itself is kept.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from opentelemetry import metrics, trace
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+stage_duration_histogram = meter.create_histogram(
+    name="webui.chat.stage.duration",
+    description="Duration of a chat completion pipeline stage",
+    unit="ms",
+)
+ttft_histogram = meter.create_histogram(
+    name="webui.chat.ttft",
+    description="Time from the chat completion request to its first token",
+    unit="ms",
+)
+db_queries_histogram = meter.create_histogram(
+    name="webui.chat.db_queries",
+    description="Database queries made for one chat completion",
+    unit="1",
+)
+loop_lag_histogram = meter.create_histogram(
+    name="webui.event_loop.lag",
+    description="How late the event loop resumed a sleeping task",
+    unit="ms",
+)
+
+# How often the event loop lag is sampled, in seconds
+LOOP_MONITOR_INTERVAL = 0.1
+
+_current_timer: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar(
+    "stage_timer", default=None
+)
+_active_timers: weakref.WeakSet[StageTimer] = weakref.WeakSet()
+_monitored_loops: weakref.WeakSet[asyncio.AbstractEventLoop] = weakref.WeakSet()
+
+
+class StageTimer:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages: dict[str, float] = {}  # stage -> ms
+        self.ttft: dict[str, float] = {}  # upstream -> ms
+        self.db_queries = 0
+        self.loop_blocked_ms = 0.0
+        self.finished = False
+
+    def add_stage(self, name: str, elapsed_ms: float) -> None:
+        # Stages can run more than once per turn (e.g. tool call rounds)
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def record_first_token(self, upstream: str) -> None:
+        if upstream in self.ttft:
+            return
+        elapsed_ms = (time.perf_counter() - self.started_at) * 1000.0
+        self.ttft[upstream] = elapsed_ms
+        ttft_histogram.record(elapsed_ms, {"upstream": upstream})
+
+    def to_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000.0, 1),
+            "stages_ms": {name: round(ms, 1) for name, ms in self.stages.items()},
+            "ttft_ms": {name: round(ms, 1) for name, ms in self.ttft.items()},
+            "db_queries": self.db_queries,
+            "loop_blocked_ms": round(self.loop_blocked_ms, 1),
+        }
+
+
+def start_stage_timer() -> StageTimer:
+    timer = StageTimer()
+    _current_timer.set(timer)
+    _active_timers.add(timer)
+    _ensure_loop_monitor()
+    return timer
+
+
+def get_stage_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+def finish_stage_timer() -> Optional[StageTimer]:
+    """
+    Records the per-request measurements of the current timer. Returns the
+    timer the first time only, so a turn is reported once.
+    """
+    timer = _current_timer.get()
+    if timer is None or timer.finished:
+        return None
+    timer.finished = True
+    _active_timers.discard(timer)
+    db_queries_histogram.record(timer.db_queries)
+    return timer
+
+
+@contextmanager
+def stage(name: str) -> Iterator[trace.Span]:
+    timer = _current_timer.get()
+    with tracer.start_as_current_span(f"chat.{name}") as span:
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            stage_duration_histogram.record(elapsed_ms, {"stage": name})
+            if timer is not None:
+                timer.add_stage(name, elapsed_ms)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.db_queries += 1
+
+
+def _ensure_loop_monitor() -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if loop in _monitored_loops:
+        return
+    _monitored_loops.add(loop)
+    # Own context, the monitor shouldn't hold on to this request's timer
+    loop.create_task(_monitor_loop_lag(), context=contextvars.Context())
+
+
+async def _monitor_loop_lag() -> None:
+    # A sleep that resumes late means something blocked the loop meanwhile;
+    # that time is charged to every request in flight
+    while True:
+        expected = time.perf_counter() + LOOP_MONITOR_INTERVAL
+        await asyncio.sleep(LOOP_MONITOR_INTERVAL)
+        lag_ms = max(time.perf_counter() - expected, 0.0) * 1000.0
+        loop_lag_histogram.record(lag_ms)
+        if lag_ms >= 1.0:
+            for timer in list(_active_timers):
+                timer.loop_blocked_ms += lag_ms
@@ -4,6 +4,7 @@ import re
 import inspect
 import aiohttp
 import asyncio
+import hashlib
 import yaml
 
 from pydantic import BaseModel
@@ -33,13 +34,16 @@ from langchain_core.utils.function_calling import (
 )
 
 
-from open_webui.models.tools import Tools
+from open_webui.models.tools import ToolModel, Tools
 from open_webui.models.users import UserModel
+from open_webui.utils.cache import LRUCache
 from open_webui.utils.plugin import load_tool_module_by_id
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
     AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    TOOL_CALL_MAX_CONCURRENCY,
+    TOOL_CALL_TIMEOUT,
 )
 
 import copy
@@ -67,13 +71,111 @@ def get_async_tool_function_and_apply_extra_params(
         return new_function
 
 
+# tool_id -> module, cleaned specs and valves snapshot, see `get_tool_entry`
+_tool_registry: dict[str, dict] = {}
+
+
+def get_cleaned_tool_specs(module: object, specs: list[dict]) -> list[dict]:
+    cleaned_specs = []
+    for spec in copy.deepcopy(specs):
+        function_name = spec["name"]
+        tool_function = getattr(module, function_name, None)
+        if tool_function is None:
+            log.warning(f"Tool function {function_name} not found, skipping")
+            continue
+
+        # TODO: Fix hack for OpenAI API
+        # Some times breaks OpenAI but others don't. Leaving the comment
+        for val in spec.get("parameters", {}).get("properties", {}).values():
+            if val.get("type") == "str":
+                val["type"] = "string"
+
+        # Remove internal reserved parameters (e.g. __id__, __user__)
+        spec["parameters"]["properties"] = {
+            key: val
+            for key, val in spec["parameters"]["properties"].items()
+            if not key.startswith("__")
+        }
+
+        # TODO: Support Pydantic models as parameters
+        if tool_function.__doc__ and tool_function.__doc__.strip() != "":
+            s = re.split(":(param|return)", tool_function.__doc__, 1)
+            spec["description"] = s[0]
+        else:
+            spec["description"] = function_name
+
+        cleaned_specs.append(spec)
+    return cleaned_specs
+
+
+def get_tool_entry(request: Request, tool: ToolModel) -> dict:
+    """
+    Loaded module and cleaned specs of a tool, rebuilt only when the tool's
+    content changes or its module was reloaded elsewhere (e.g. on update).
+    """
+    content_hash = hashlib.sha256(tool.content.encode()).hexdigest()
+    entry = _tool_registry.get(tool.id)
+    module = request.app.state.TOOLS.get(tool.id, None)
+
+    if entry and module is entry["module"] and entry["content_hash"] == content_hash:
+        return entry
+
+    if module is None or (entry and module is entry["module"]):
+        module, _ = load_tool_module_by_id(tool.id)
+        request.app.state.TOOLS[tool.id] = module
+        # Loading rewrites the stored content (see `replace_imports`)
+        tool = Tools.get_tool_by_id(tool.id) or tool
+        content_hash = hashlib.sha256(tool.content.encode()).hexdigest()
+
+    entry = {
+        "content_hash": content_hash,
+        "module": module,
+        "specs": get_cleaned_tool_specs(module, tool.specs),
+        "metadata": {
+            "file_handler": hasattr(module, "file_handler") and module.file_handler,
+            "citation": hasattr(module, "citation") and module.citation,
+        },
+        "valves_snapshot": None,
+    }
+    _tool_registry[tool.id] = entry
+    return entry
+
+
+def get_tool_instance(entry: dict, valves: dict) -> object:
+    """
+    The tool module with `valves` applied. Shared modules are never mutated:
+    each set of valves gets its own shallow copy, so requests already running
+    keep the valves they started with.
+    """
+    module = entry["module"]
+    if not (hasattr(module, "valves") and hasattr(module, "Valves")):
+        return module
+
+    snapshot = entry["valves_snapshot"]
+    if snapshot is not None and snapshot[0] == valves:
+        return snapshot[1]
+
+    instance = copy.copy(module)
+    instance.valves = module.Valves(**valves)
+    entry["valves_snapshot"] = (copy.deepcopy(valves), instance)
+    return instance
+
+
+def get_user_tool_valves(user: UserModel, tool_id: str) -> dict:
+    settings = user.settings.model_dump() if user.settings else {}
+    return settings.get("tools", {}).get("valves", {}).get(tool_id, {}) or {}
+
+
 def get_tools(
     request: Request, tool_ids: list[str], user: UserModel, extra_params: dict
 ) -> dict[str, dict]:
     tools_dict = {}
 
+    tools = {tool.id: tool for tool in Tools.get_tools_by_ids(tool_ids)}
+    tool_valves = Tools.get_tool_valves_by_ids(list(tools.keys())) if tools else {}
+
     for tool_id in tool_ids:
-        tool = Tools.get_tool_by_id(tool_id)
+        tool = tools.get(tool_id)
         if tool is None:
             if tool_id.startswith("server:"):
                 server_idx = int(tool_id.split(":")[1])
@@ -137,60 +239,33 @@ def get_tools(
             else:
                 continue
         else:
-            module = request.app.state.TOOLS.get(tool_id, None)
-            if module is None:
-                module, _ = load_tool_module_by_id(tool_id)
-                request.app.state.TOOLS[tool_id] = module
-
-            extra_params["__id__"] = tool_id
-
-            # Set valves for the tool
-            if hasattr(module, "valves") and hasattr(module, "Valves"):
-                valves = Tools.get_tool_valves_by_id(tool_id) or {}
-                module.valves = module.Valves(**valves)
-            if hasattr(module, "UserValves"):
-                extra_params["__user__"]["valves"] = module.UserValves(  # type: ignore
-                    **Tools.get_user_valves_by_id_and_user_id(tool_id, user.id)
-                )
-
-            for spec in tool.specs:
-                # TODO: Fix hack for OpenAI API
-                # Some times breaks OpenAI but others don't. Leaving the comment
-                for val in spec.get("parameters", {}).get("properties", {}).values():
-                    if val.get("type") == "str":
-                        val["type"] = "string"
-
-                # Remove internal reserved parameters (e.g. __id__, __user__)
-                spec["parameters"]["properties"] = {
-                    key: val
-                    for key, val in spec["parameters"]["properties"].items()
-                    if not key.startswith("__")
+            entry = get_tool_entry(request, tool)
+            module = entry["module"]
+            instance = get_tool_instance(entry, tool_valves.get(tool_id, {}))
+
+            tool_extra_params = {**extra_params, "__id__": tool_id}
+            if hasattr(module, "UserValves") and "__user__" in extra_params:
+                tool_extra_params["__user__"] = {
+                    **extra_params["__user__"],
+                    "valves": module.UserValves(  # type: ignore
+                        **get_user_tool_valves(user, tool_id)
+                    ),
                 }
 
+            for spec in entry["specs"]:
                 # convert to function that takes only model params and inserts custom params
                 function_name = spec["name"]
-                tool_function = getattr(module, function_name)
+                tool_function = getattr(instance, function_name)
                 callable = get_async_tool_function_and_apply_extra_params(
-                    tool_function, extra_params
+                    tool_function, tool_extra_params
                 )
 
-                # TODO: Support Pydantic models as parameters
-                if callable.__doc__ and callable.__doc__.strip() != "":
-                    s = re.split(":(param|return)", callable.__doc__, 1)
-                    spec["description"] = s[0]
-                else:
-                    spec["description"] = function_name
-
                 tool_dict = {
                     "tool_id": tool_id,
                     "callable": callable,
                     "spec": spec,
                     # Misc info
-                    "metadata": {
-                        "file_handler": hasattr(module, "file_handler")
-                        and module.file_handler,
-                        "citation": hasattr(module, "citation") and module.citation,
-                    },
+                    "metadata": entry["metadata"],
                 }
 
                 # TODO: if collision, prepend toolkit name
@@ -442,6 +517,67 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
+def get_openapi_operations(openapi_spec: dict) -> dict[str, dict]:
+    """
+    Index of an OpenAPI spec by operationId: the route, HTTP method and
+    where each parameter goes, so a tool call doesn't have to search the
+    spec. The first operation with a given operationId wins.
+    """
+    operations = {}
+    for path, methods in openapi_spec.get("paths", {}).items():
+        if not isinstance(methods, dict):
+            continue
+        for method, operation in methods.items():
+            if not isinstance(operation, dict) or not operation.get("operationId"):
+                continue
+            if operation["operationId"] in operations:
+                continue
+
+            operations[operation["operationId"]] = {
+                "method": method.lower(),
+                "path": path,
+                "parameters": {
+                    param["name"]: param["in"]
+                    for param in operation.get("parameters", [])
+                    if "name" in param and "in" in param
+                },
+                "has_body": bool(operation.get("requestBody", {}).get("content")),
+            }
+    return operations
+
+
+# Fetched tool server specs, revalidated with ETag/Last-Modified
+_tool_server_data_cache = LRUCache(maxsize=256)
+
+_tool_server_session: Optional[aiohttp.ClientSession] = None
+_tool_server_session_loop = None
+
+
+def get_tool_server_session() -> aiohttp.ClientSession:
+    """Shared session, so calls reuse pooled connections to the tool servers."""
+    global _tool_server_session, _tool_server_session_loop
+
+    loop = asyncio.get_running_loop()
+    if (
+        _tool_server_session is None
+        or _tool_server_session.closed
+        or _tool_server_session_loop is not loop
+    ):
+        # Shared by every user, so cookies set by one must not reach the others
+        _tool_server_session = aiohttp.ClientSession(
+            trust_env=True, cookie_jar=aiohttp.DummyCookieJar()
+        )
+        _tool_server_session_loop = loop
+    return _tool_server_session
+
+
+async def close_tool_server_session() -> None:
+    global _tool_server_session
+    if _tool_server_session is not None and not _tool_server_session.closed:
+        await _tool_server_session.close()
+    _tool_server_session = None
+
+
 async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     headers = {
         "Accept": "application/json",
@@ -450,23 +586,41 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
+    cache_key = hashlib.sha256(f"{url}\n{token or ''}".encode()).hexdigest()
+    cached = _tool_server_data_cache.get(cache_key)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     error = None
     try:
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
-            ) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
-                else:
-                    res = await response.json()
+        session = get_tool_server_session()
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+        ) as response:
+            if response.status == 304 and cached:
+                log.debug(f"Tool server spec not modified: {url}")
+                return copy.deepcopy(cached["data"])
+
+            if response.status != 200:
+                error_body = await response.json()
+                raise Exception(error_body)
+
+            # Check if URL ends with .yaml or .yml to determine format
+            if url.lower().endswith((".yaml", ".yml")):
+                text_content = await response.text()
+                res = yaml.safe_load(text_content)
+            else:
+                res = await response.json()
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
     except Exception as err:
         log.exception(f"Could not fetch tool server spec from {url}")
         if isinstance(err, dict) and "detail" in err:
@@ -479,8 +633,19 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
         "openapi": res,
         "info": res.get("info", {}),
         "specs": convert_openapi_to_tool_payload(res),
+        "operations": get_openapi_operations(res),
     }
 
+    if etag or last_modified:
+        _tool_server_data_cache.set(
+            cache_key,
+            {
+                "etag": etag,
+                "last_modified": last_modified,
+                "data": copy.deepcopy(data),
+            },
+        )
+
     log.info(f"Fetched data: {data}")
     return data
 
@@ -540,6 +705,7 @@ async def get_tool_servers_data(
                 "openapi": openapi_data,
                 "info": response.get("info"),
                 "specs": response.get("specs"),
+                "operations": response.get("operations"),
             }
         )
 
@@ -551,48 +717,29 @@ async def execute_tool_server(
 ) -> Any:
     error = None
     try:
-        openapi = server_data.get("openapi", {})
-        paths = openapi.get("paths", {})
-
-        matching_route = None
-        for route_path, methods in paths.items():
-            for http_method, operation in methods.items():
-                if isinstance(operation, dict) and operation.get("operationId") == name:
-                    matching_route = (route_path, methods)
-                    break
-            if matching_route:
-                break
-
-        if not matching_route:
-            raise Exception(f"No matching route found for operationId: {name}")
-
-        route_path, methods = matching_route
-
-        method_entry = None
-        for http_method, operation in methods.items():
-            if operation.get("operationId") == name:
-                method_entry = (http_method.lower(), operation)
-                break
+        operations = server_data.get("operations")
+        if operations is None:
+            operations = get_openapi_operations(server_data.get("openapi", {}))
+            server_data["operations"] = operations
 
-        if not method_entry:
-            raise Exception(f"No matching method found for operationId: {name}")
+        operation = operations.get(name)
+        if not operation:
+            raise Exception(f"No matching route found for operationId: {name}")
 
-        http_method, operation = method_entry
+        http_method = operation["method"]
 
         path_params = {}
         query_params = {}
         body_params = {}
 
-        for param in operation.get("parameters", []):
-            param_name = param["name"]
-            param_in = param["in"]
+        for param_name, param_in in operation["parameters"].items():
             if param_name in params:
                 if param_in == "path":
                     path_params[param_name] = params[param_name]
                 elif param_in == "query":
                     query_params[param_name] = params[param_name]
 
-        final_url = f"{url}{route_path}"
+        final_url = f"{url}{operation['path']}"
         for key, value in path_params.items():
             final_url = final_url.replace(f"{{{key}}}", str(value))
 
@@ -600,7 +747,7 @@ async def execute_tool_server(
             query_string = "&".join(f"{k}={v}" for k, v in query_params.items())
             final_url = f"{final_url}?{query_string}"
 
-        if operation.get("requestBody", {}).get("content"):
+        if operation["has_body"]:
             if params:
                 body_params = params
             else:
@@ -613,30 +760,22 @@ async def execute_tool_server(
         if token:
             headers["Authorization"] = f"Bearer {token}"
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch"]:
-                async with request_method(
-                    final_url,
-                    json=body_params,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
-            else:
-                async with request_method(
-                    final_url,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
+        request_kwargs = {}
+        if http_method in ["post", "put", "patch"]:
+            request_kwargs["json"] = body_params
+
+        session = get_tool_server_session()
+        async with session.request(
+            http_method,
+            final_url,
+            headers=headers,
+            ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+            **request_kwargs,
+        ) as response:
+            if response.status >= 400:
+                text = await response.text()
+                raise Exception(f"HTTP error {response.status}: {text}")
+            return await response.json()
 
     except Exception as err:
         error = str(err)
@@ -644,6 +783,53 @@ async def execute_tool_server(
         return {"error": error}
 
 
+async def run_tool_calls(
+    tool_calls: list[dict],
+    execute: Callable[[dict], Awaitable[dict]],
+    on_result: Optional[Callable[[list[dict]], Awaitable]] = None,
+    max_concurrency: int = TOOL_CALL_MAX_CONCURRENCY,
+    timeout: Optional[float] = TOOL_CALL_TIMEOUT,
+) -> list[dict]:
+    """
+    Run independent tool calls concurrently, at most `max_concurrency` at a
+    time and each for at most `timeout` seconds. Results keep the order of
+    `tool_calls`; a call that fails or times out gets its error as result.
+    `on_result` is awaited with the results so far whenever a call finishes.
+    """
+    results: list[Optional[dict]] = [None] * len(tool_calls)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    emit_lock = asyncio.Lock()
+
+    async def run(idx: int, tool_call: dict) -> None:
+        async with semaphore:
+            try:
+                results[idx] = await asyncio.wait_for(
+                    execute(tool_call), timeout=timeout or None
+                )
+            except asyncio.TimeoutError:
+                content = f"Tool call timed out after {timeout} seconds"
+            except Exception as e:
+                log.exception(f"Tool call failed: {e}")
+                content = str(e)
+            if results[idx] is None:
+                results[idx] = {
+                    "tool_call_id": tool_call.get("id", ""),
+                    "content": content,
+                }
+
+        if on_result:
+            async with emit_lock:
+                try:
+                    await on_result([result for result in results if result])
+                except Exception as e:
+                    log.warning(f"Failed to report tool call result: {e}")
+
+    await asyncio.gather(
+        *(run(idx, tool_call) for idx, tool_call in enumerate(tool_calls))
+    )
+    return results
+
+
 def get_tool_server_url(url: Optional[str], path: str) -> str:
     """
     Build the full URL for a tool server, given a base url and a path.
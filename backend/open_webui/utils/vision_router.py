@@ -1,16 +1,203 @@
 import asyncio
+import base64
+import hashlib
 import json
 import logging
 import time
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import Request
 
+from open_webui.env import VISION_ROUTER_CACHE_SIZE, VISION_ROUTER_CACHE_TTL
 from open_webui.socket.main import get_event_emitter
+from open_webui.utils.cache import LRUCache
+from open_webui.utils.images.preprocess import preprocess_image_url
 from open_webui.utils.chat import generate_direct_chat_completion
 
 log = logging.getLogger(__name__)
 
+PREPASS_MAX_IMAGES = 4
+PREPASS_TIMEOUT = 15
+PREPASS_USER_PROMPT = "Describe precisely; no speculation."
+PREPASS_SYSTEM_PROMPT = (
+    "You are a vision model. Output a strict JSON object with keys: "
+    "caption (<=60 words), ocr_text, objects (array of {name, confidence}), "
+    "people (count), notable_details (3-8 strings), nsfw_likelihood (0-1). "
+    "No prose outside the JSON."
+)
+
+
+class PrepassParseError(ValueError):
+    pass
+
+
+# (vision model, image content hash) -> prepass json
+_prepass_cache = LRUCache(maxsize=VISION_ROUTER_CACHE_SIZE, ttl=VISION_ROUTER_CACHE_TTL)
+# Prepasses currently running, so identical requests share one upstream call
+_prepass_inflight: dict[str, asyncio.Task] = {}
+# Speculative prepasses, referenced until done so they aren't garbage collected
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+def _get_image_url(image: Any) -> str:
+    if isinstance(image, dict):
+        image_url = image.get("image_url", image.get("url", ""))
+        return image_url.get("url", "") if isinstance(image_url, dict) else image_url
+    return image or ""
+
+
+def get_prepass_cache_key(vision_model_id: str, image: Any) -> str:
+    """Hash of the vision model and the image content (decoded for data URLs)."""
+    url = _get_image_url(image)
+    data = url.encode()
+    if url.startswith("data:") and "," in url:
+        try:
+            data = base64.b64decode(url.split(",", 1)[1])
+        except Exception:
+            pass
+    else:
+        # raw base64 in `images` (Ollama style)
+        try:
+            data = base64.b64decode(url, validate=True)
+        except Exception:
+            pass
+    return hashlib.sha256(vision_model_id.encode() + b"\0" + data).hexdigest()
+
+
+def _parse_prepass_content(content: str) -> dict:
+    try:
+        return json.loads(content)
+    except Exception:
+        start_idx = content.find("{")
+        end_idx = content.rfind("}")
+        if start_idx == -1 or end_idx == -1:
+            raise PrepassParseError("no json object found")
+        try:
+            return json.loads(content[start_idx : end_idx + 1])
+        except Exception as e:
+            raise PrepassParseError(str(e))
+
+
+async def _run_prepass(
+    request: Request, user: Any, vision_model_id: str, image: Any
+) -> dict:
+    if isinstance(image, dict):
+        prepass_user_msg = {
+            "role": "user",
+            "content": [{"type": "text", "text": PREPASS_USER_PROMPT}, image],
+        }
+    else:
+        prepass_user_msg = {
+            "role": "user",
+            "content": PREPASS_USER_PROMPT,
+            "images": [image],
+        }
+
+    prepass_body = {
+        "model": vision_model_id,
+        "messages": [
+            {"role": "system", "content": PREPASS_SYSTEM_PROMPT},
+            prepass_user_msg,
+        ],
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "max_tokens": 400,
+        "seed": 0,
+        "stream": False,
+    }
+
+    res = await asyncio.wait_for(
+        generate_direct_chat_completion(
+            request, prepass_body, user, request.app.state.MODELS
+        ),
+        timeout=PREPASS_TIMEOUT,
+    )
+    content = (res or {}).get("choices", [{}])[0].get("message", {}).get("content", "")
+    return _parse_prepass_content(content)
+
+
+async def get_vision_prepass(
+    request: Request, user: Any, vision_model_id: str, image: Any
+) -> tuple[dict, bool]:
+    """
+    Return (prepass json, cache hit) for a single image, reusing cached results
+    and joining an identical prepass that is already running.
+    """
+    key = get_prepass_cache_key(vision_model_id, image)
+    prepass = _prepass_cache.get(key)
+    if prepass is not None:
+        return prepass, True
+
+    task = _prepass_inflight.get(key)
+    if task is None:
+
+        async def run():
+            try:
+                prepass = await _run_prepass(request, user, vision_model_id, image)
+                _prepass_cache.set(key, prepass)
+                return prepass
+            finally:
+                _prepass_inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        _prepass_inflight[key] = task
+
+    # Shield so a cancelled chat request doesn't abort a prepass others await
+    return await asyncio.shield(task), False
+
+
+def get_skip_reason(request: Request, user: Any, model_id: str) -> Optional[str]:
+    cfg = request.app.state.config
+    model_info = request.app.state.MODELS.get(model_id, {})
+    if model_info.get("capabilities", {}).get("vision"):
+        return "model_has_vision"
+    if model_id in getattr(cfg, "VISION_ROUTER_SKIP_MODELS", []):
+        return "skip_list"
+    if user.role == "admin" and not getattr(cfg, "VISION_ROUTER_ENABLE_ADMINS", True):
+        return "admins_disabled"
+    if user.role == "user" and not getattr(cfg, "VISION_ROUTER_ENABLE_USERS", True):
+        return "users_disabled"
+    return None
+
+
+def schedule_vision_prepass(
+    request: Request, user: Any, model_id: str, images: list
+) -> int:
+    """
+    Speculatively start prepasses for freshly attached images so the results
+    are cached by the time the message is sent. Returns the number scheduled.
+    """
+    cfg = request.app.state.config
+    vision_model_id = getattr(cfg, "VISION_ROUTER_MODEL", "")
+    if (
+        not getattr(cfg, "VISION_ROUTER_ENABLED", False)
+        or not getattr(cfg, "VISION_ROUTER_SPECULATIVE", False)
+        or getattr(cfg, "VISION_ROUTER_MODE", "prepass") != "prepass"
+        or not vision_model_id
+        or get_skip_reason(request, user, model_id)
+    ):
+        return 0
+
+    async def prefetch(url: str):
+        try:
+            # Same normalization as the chat payload, so the cache keys match
+            url = await preprocess_image_url(url)
+            await get_vision_prepass(
+                request,
+                user,
+                vision_model_id,
+                {"type": "image_url", "image_url": {"url": url}},
+            )
+        except Exception as e:
+            log.debug(f"speculative vision prepass failed: {e}")
+
+    images = images[:PREPASS_MAX_IMAGES]
+    for image in images:
+        task = asyncio.create_task(prefetch(_get_image_url(image)))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+    return len(images)
+
 
 async def vision_router_inlet(request: Request, body: dict, user: Any, metadata: dict):
     """Filter chat completion requests for vision prepass or reroute.
@@ -57,12 +244,13 @@ async def vision_router_inlet(request: Request, body: dict, user: Any, metadata:
             return body
 
         last_msg = messages[last_index]
-        images = (last_msg.get("images") or [])[:4]
+        images = (last_msg.get("images") or [])[:PREPASS_MAX_IMAGES]
         content_images: list[dict] = []
         if isinstance(last_msg.get("content"), list):
             for item in last_msg["content"]:
                 if item.get("type") == "image_url":
                     content_images.append(item)
+            content_images = content_images[:PREPASS_MAX_IMAGES]
         if not images and not content_images:
             vr_meta["skipped_reason"] = "no_images"
             end = time.monotonic()
@@ -71,31 +259,9 @@ async def vision_router_inlet(request: Request, body: dict, user: Any, metadata:
             return body
 
         current_model_id = body.get("model")
-        model_info = request.app.state.MODELS.get(current_model_id, {})
-        if model_info.get("capabilities", {}).get("vision"):
-            vr_meta["skipped_reason"] = "model_has_vision"
-            end = time.monotonic()
-            vr_meta["latency_ms"] = int((end - start) * 1000)
-            last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
-            return body
-
-        if current_model_id in getattr(cfg, "VISION_ROUTER_SKIP_MODELS", []):
-            vr_meta["skipped_reason"] = "skip_list"
-            end = time.monotonic()
-            vr_meta["latency_ms"] = int((end - start) * 1000)
-            last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
-            return body
-
-        if user.role == "admin" and not getattr(
-            cfg, "VISION_ROUTER_ENABLE_ADMINS", True
-        ):
-            vr_meta["skipped_reason"] = "admins_disabled"
-            end = time.monotonic()
-            vr_meta["latency_ms"] = int((end - start) * 1000)
-            last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
-            return body
-        if user.role == "user" and not getattr(cfg, "VISION_ROUTER_ENABLE_USERS", True):
-            vr_meta["skipped_reason"] = "users_disabled"
+        skip_reason = get_skip_reason(request, user, current_model_id)
+        if skip_reason:
+            vr_meta["skipped_reason"] = skip_reason
             end = time.monotonic()
             vr_meta["latency_ms"] = int((end - start) * 1000)
             last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
@@ -135,53 +301,26 @@ async def vision_router_inlet(request: Request, body: dict, user: Any, metadata:
             last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
             return body
 
-        prepass_user_msg = {"role": "user"}
-        if images:
-            prepass_user_msg["content"] = "Describe precisely; no speculation."
-            prepass_user_msg["images"] = images
-        else:
-            prepass_user_msg["content"] = [
-                {"type": "text", "text": "Describe precisely; no speculation."},
-                *content_images,
-            ]
-
-        prepass_messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a vision model. Output a strict JSON object with keys: "
-                    "caption (<=60 words), ocr_text, objects (array of {name, confidence}), "
-                    "people (count), notable_details (3-8 strings), nsfw_likelihood (0-1). "
-                    "No prose outside the JSON."
-                ),
-            },
-            prepass_user_msg,
-        ]
-
-        prepass_body = {
-            "model": vision_model_id,
-            "messages": prepass_messages,
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "max_tokens": 400,
-            "seed": 0,
-            "stream": False,
-        }
-
         prev_direct = getattr(request.state, "direct", False)
         prev_model = getattr(request.state, "model", None)
         request.state.direct = True
         request.state.model = request.app.state.MODELS.get(vision_model_id)
 
+        # One prepass per image, run concurrently and cached by content hash
         try:
-            res = await asyncio.wait_for(
-                generate_direct_chat_completion(
-                    request, prepass_body, user, request.app.state.MODELS
-                ),
-                timeout=15,
+            results = await asyncio.gather(
+                *[
+                    get_vision_prepass(request, user, vision_model_id, image)
+                    for image in (images or content_images)
+                ]
             )
-        except Exception as e:  # Timeout or call failure
-            log.exception(f"vision prepass error: {e}")
+        except Exception as e:  # Timeout, call failure or unparsable output
+            if isinstance(e, PrepassParseError):
+                log.exception(f"prepass json parse error: {e}")
+                vr_meta["skipped_reason"] = "json_parse_failed"
+            else:
+                log.exception(f"vision prepass error: {e}")
+                vr_meta["skipped_reason"] = "prepass_failed"
             if event_emitter:
                 await event_emitter(
                     {
@@ -192,47 +331,17 @@ async def vision_router_inlet(request: Request, body: dict, user: Any, metadata:
                         },
                     }
                 )
-            vr_meta["skipped_reason"] = "prepass_failed"
             end = time.monotonic()
             vr_meta["latency_ms"] = int((end - start) * 1000)
             last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
-            request.state.direct = prev_direct
-            request.state.model = prev_model
             return body
         finally:
             request.state.direct = prev_direct
             request.state.model = prev_model
 
-        content = (
-            (res or {}).get("choices", [{}])[0].get("message", {}).get("content", "")
-        )
-        try:
-            prepass_json = json.loads(content)
-        except Exception:
-            try:
-                start_idx = content.find("{")
-                end_idx = content.rfind("}")
-                if start_idx != -1 and end_idx != -1:
-                    prepass_json = json.loads(content[start_idx : end_idx + 1])
-                else:
-                    raise ValueError("no json object found")
-            except Exception as e:
-                log.exception(f"prepass json parse error: {e}")
-                if event_emitter:
-                    await event_emitter(
-                        {
-                            "type": "status",
-                            "data": {
-                                "description": "Vision prepass failed",
-                                "done": True,
-                            },
-                        }
-                    )
-                vr_meta["skipped_reason"] = "json_parse_failed"
-                end = time.monotonic()
-                vr_meta["latency_ms"] = int((end - start) * 1000)
-                last_msg.setdefault("metadata", {})["vision_router"] = vr_meta
-                return body
+        prepasses = [prepass for prepass, _ in results]
+        prepass_json = prepasses[0] if len(prepasses) == 1 else {"images": prepasses}
+        vr_meta["cache_hits"] = sum(1 for _, hit in results if hit)
 
         # Prepass succeeded
         vr_meta["used_model"] = vision_model_id
@@ -249,7 +358,7 @@ async def vision_router_inlet(request: Request, body: dict, user: Any, metadata:
                 c for c in last_msg["content"] if c.get("type") != "image_url"
             ]
             if not last_msg["content"]:
-                last_msg["content"] = "Describe precisely; no speculation."
+                last_msg["content"] = PREPASS_USER_PROMPT
 
         # Inject system message with JSON
         messages.insert(
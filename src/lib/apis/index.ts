@@ -548,6 +548,35 @@ export const getTaskConfig = async (token: string = '') => {
 	return res;
 };
 
+export const prefetchVisionPrepass = async (token: string, model: string, images: string[]) => {
+	let error = null;
+
+	const res = await fetch(`${WEBUI_BASE_URL}/api/v1/tasks/vision_router/prepass`, {
+		method: 'POST',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/json',
+			...(token && { authorization: `Bearer ${token}` })
+		},
+		body: JSON.stringify({ model, images })
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			console.error(err);
+			error = err;
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
 export const updateTaskConfig = async (token: string, config: object) => {
 	let error = null;
 
@@ -1,31 +1,94 @@
 #!/usr/bin/env python3
-"""Sync active Supabase billing users to OpenWebUI.
-
-Reads `public.billing_users` (status=active), maps `tier`→OWUI group,
-and calls OWUI `/api/internal/upsert-users` with `X-API-KEY`.
-On any HTTP error, exits non-zero so systemd can alert/retry.
+"""Sync Supabase billing users to OpenWebUI.
+
+Reads `public.billing_users` rows changed since the last run (persisted
+high-watermark on `updated_at`, ties broken by `id`), maps `tier`→OWUI group,
+and calls OWUI `/api/internal/upsert-users` with `X-API-KEY`. Rows that are
+no longer active go to `/api/internal/deactivate-users`, which only demotes
+accounts that already exist (role `pending`) and never creates one.
+On any HTTP error, exits non-zero so systemd can alert/retry; the watermark
+only advances once every batch of a run has been accepted.
 """
 
 from __future__ import annotations
 
 import argparse
+import json
 import logging
 import os
 import sys
 import time
-from typing import Dict, Iterable, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Map billing_users.tier -> OWUI group_id
 TIER_GROUP_MAP: Dict[str, str] = {"free": "1", "standard": "2", "pro": "3"}
 MAX_BATCH = 100
+PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "4"))
+RETRIES = int(os.getenv("SYNC_RETRIES", "3"))
+DEFAULT_STATE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".supabase_sync_state.json"
+)
+
+
+def _chunked(
+    items: Iterable[Dict[str, str]], size: int
+) -> Iterator[List[Dict[str, str]]]:
+    batch: List[Dict[str, str]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _session(pool_size: int = CONCURRENCY) -> requests.Session:
+    """Session with connection pooling and retries on transient failures."""
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
-def _chunked(items: List[Dict[str, str]], size: int) -> Iterable[List[Dict[str, str]]]:
-    for i in range(0, len(items), size):
-        yield items[i : i + size]
+def load_watermark(path: str) -> Optional[Dict[str, str]]:
+    """Return the persisted {"updated_at", "id"} watermark, if any."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logging.warning("Ignoring unreadable sync state %s: %s", path, exc)
+        return None
+    if not state.get("updated_at"):
+        return None
+    return {"updated_at": state["updated_at"], "id": str(state.get("id") or "")}
+
+
+def save_watermark(path: str, watermark: Dict[str, str]) -> None:
+    """Atomically persist the watermark."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(watermark, f)
+    os.replace(tmp, path)
 
 
 def health_checks(supabase_url: str, supabase_key: str, owui_url: str) -> None:
@@ -54,101 +117,256 @@ def health_checks(supabase_url: str, supabase_key: str, owui_url: str) -> None:
         logging.error("OWUI health check failed: %s", exc)
         sys.exit(1)
 
-    if r2.status_code != 200 or "/api/internal/upsert-users" not in r2.text:
+    if r2.status_code != 200 or not all(
+        path in r2.text
+        for path in ("/api/internal/upsert-users", "/api/internal/deactivate-users")
+    ):
         logging.error(
             "OWUI health check failed: status=%s body=%s", r2.status_code, r2.text
         )
         sys.exit(1)
 
 
-def fetch_active_users(supabase_url: str, supabase_key: str) -> List[Dict[str, str]]:
-    """Fetch active billing users from Supabase."""
+def fetch_changed_users(
+    supabase_url: str,
+    supabase_key: str,
+    watermark: Optional[Dict[str, str]] = None,
+    page_size: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[List[Dict[str, str]]]:
+    """Yield pages of billing users changed after `watermark`.
+
+    Uses keyset pagination on (updated_at, id) so each page is an index range
+    scan and rows updated mid-run are neither skipped nor repeated.
+    """
+    page_size = page_size or PAGE_SIZE
+    session = session or _session()
     headers = {
         "apikey": supabase_key,
         "Authorization": f"Bearer {supabase_key}",
         "Accept": "application/json",
     }
-    params = {
-        "select": "email,tier,status,updated_at",
-        "status": "eq.active",
-        "order": "updated_at.asc",
-    }
     url = f"{supabase_url}/rest/v1/billing_users"
-    try:
-        r = requests.get(url, headers=headers, params=params, timeout=30)
-    except requests.RequestException as exc:  # pragma: no cover - network
-        logging.error("Supabase request error: %s", exc)
-        sys.exit(1)
-
-    if r.status_code != 200:
-        redacted = url.replace(supabase_url, "{SUPABASE_URL}")
-        logging.error(
-            "Supabase request failed URL=%s status=%s body=%s",
-            redacted,
-            r.status_code,
-            r.text,
-        )
-        sys.exit(1)
 
-    try:
-        return r.json()
-    except ValueError as exc:
-        logging.error("Invalid JSON from Supabase: %s", exc)
-        sys.exit(1)
-
-
-def upsert_batches(users: List[Dict[str, str]], owui_url: str, token: str) -> None:
-    """Send users to OWUI in batches and log summary."""
-    total_received = total_created = total_updated = total_failed = 0
-    endpoint = f"{owui_url}/api/internal/upsert-users"
-    headers = {"X-API-KEY": token, "Content-Type": "application/json"}
+    while True:
+        params = {
+            "select": "id,email,tier,status,updated_at",
+            "order": "updated_at.asc,id.asc",
+            "limit": str(page_size),
+        }
+        if watermark:
+            ts = watermark["updated_at"]
+            params["or"] = (
+                f'(updated_at.gt."{ts}",'
+                f'and(updated_at.eq."{ts}",id.gt."{watermark["id"]}"))'
+            )
 
-    for batch in _chunked(users, MAX_BATCH):
         try:
-            r = requests.post(endpoint, headers=headers, json={"users": batch}, timeout=30)
+            r = session.get(url, headers=headers, params=params, timeout=30)
         except requests.RequestException as exc:  # pragma: no cover - network
-            logging.error("OWUI request error: %s", exc)
-            logging.error("First emails: %s", ", ".join(u["email"] for u in batch[:20]))
+            logging.error("Supabase request error: %s", exc)
             sys.exit(1)
 
-        if not (200 <= r.status_code < 300):
+        if r.status_code != 200:
+            redacted = url.replace(supabase_url, "{SUPABASE_URL}")
             logging.error(
-                "OWUI upsert failed path=/api/internal/upsert-users status=%s body=%s",
+                "Supabase request failed URL=%s status=%s body=%s",
+                redacted,
                 r.status_code,
                 r.text,
             )
-            logging.error("First emails: %s", ", ".join(u["email"] for u in batch[:20]))
-            if r.status_code == 401:
-                logging.error(
-                    "OWUI auth rejected. Regenerate an Admin API key and retry."
-                )
             sys.exit(1)
 
         try:
-            res = r.json()
-        except ValueError:
-            res = {}
-        total_received += res.get("received", 0)
-        total_created += res.get("created", 0)
-        total_updated += res.get("updated", 0)
-        total_failed += res.get("failed", 0)
+            rows = r.json()
+        except ValueError as exc:
+            logging.error("Invalid JSON from Supabase: %s", exc)
+            sys.exit(1)
+
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+
+        last = rows[-1]
+        watermark = {"updated_at": last["updated_at"], "id": str(last["id"])}
+
+
+def is_active(row: Dict[str, str]) -> bool:
+    return (row.get("status") or "").lower() == "active"
+
+
+def to_owui_user(row: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """Map an active billing row to an upsert-users entry (None if unusable)."""
+    email = row.get("email")
+    if not email:
+        return None
+    tier = (row.get("tier") or "free").lower()
+    group_id = TIER_GROUP_MAP.get(tier, TIER_GROUP_MAP["free"])
+    return {"email": email, "group_id": group_id}
+
+
+def _post_batch(
+    session: requests.Session,
+    endpoint: str,
+    headers: Dict[str, str],
+    payload: Dict[str, list],
+    emails: List[str],
+) -> Dict[str, int]:
+    path = endpoint[endpoint.index("/api/") :]
+    try:
+        r = session.post(endpoint, headers=headers, json=payload, timeout=30)
+    except requests.RequestException as exc:  # pragma: no cover - network
+        logging.error("OWUI request error: %s", exc)
+        logging.error("First emails: %s", ", ".join(emails[:20]))
+        raise
+
+    if not (200 <= r.status_code < 300):
+        logging.error(
+            "OWUI request failed path=%s status=%s body=%s",
+            path,
+            r.status_code,
+            r.text,
+        )
+        logging.error("First emails: %s", ", ".join(emails[:20]))
+        if r.status_code == 401:
+            logging.error("OWUI auth rejected. Regenerate an Admin API key and retry.")
+        raise RuntimeError(f"OWUI request to {path} failed with status {r.status_code}")
+
+    try:
+        return r.json()
+    except ValueError:
+        return {}
+
+
+def _post_batches(
+    path: str,
+    batches: Iterable[tuple],
+    owui_url: str,
+    token: str,
+    totals: Dict[str, int],
+    concurrency: int,
+    session: Optional[requests.Session],
+) -> Dict[str, int]:
+    """Post (payload, emails) batches, `concurrency` requests in flight.
+
+    Sums the response counters named in `totals`; exits non-zero if any batch
+    fails.
+    """
+    session = session or _session(concurrency)
+    endpoint = f"{owui_url}{path}"
+    bearer = token if token.lower().startswith("bearer ") else f"Bearer {token}"
+    headers = {
+        "X-API-KEY": token,
+        "Authorization": bearer,
+        "Content-Type": "application/json",
+    }
+
+    ok = True
+
+    def collect(done) -> None:
+        nonlocal ok
+        for future in done:
+            try:
+                res = future.result()
+            except Exception:
+                ok = False
+                continue
+            for key in totals:
+                totals[key] += res.get(key, 0)
+
+    concurrency = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for payload, emails in batches:
+            # Only pull the next batch once a slot frees up, so pages stream
+            # through instead of being read into memory all at once
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(
+                executor.submit(
+                    _post_batch, session, endpoint, headers, payload, emails
+                )
+            )
+        collect(wait(pending).done)
+
+    if not ok:
+        sys.exit(1)
+    return totals
+
+
+def upsert_batches(
+    users: Iterable[Dict[str, str]],
+    owui_url: str,
+    token: str,
+    concurrency: int = CONCURRENCY,
+    session: Optional[requests.Session] = None,
+) -> Dict[str, int]:
+    """Send users to OWUI in batches, `concurrency` requests in flight.
+
+    `users` may be a lazy iterable, so batches are posted while later pages
+    are still being fetched. Exits non-zero if any batch fails.
+    """
+    totals = _post_batches(
+        "/api/internal/upsert-users",
+        (
+            ({"users": batch}, [u["email"] for u in batch])
+            for batch in _chunked(users, MAX_BATCH)
+        ),
+        owui_url,
+        token,
+        {"received": 0, "created": 0, "updated": 0, "failed": 0},
+        concurrency,
+        session,
+    )
 
     logging.info(
         "OWUI summary: received=%d created=%d updated=%d failed=%d",
-        total_received,
-        total_created,
-        total_updated,
-        total_failed,
+        totals["received"],
+        totals["created"],
+        totals["updated"],
+        totals["failed"],
+    )
+    return totals
+
+
+def deactivate_batches(
+    emails: Iterable[str],
+    owui_url: str,
+    token: str,
+    concurrency: int = CONCURRENCY,
+    session: Optional[requests.Session] = None,
+) -> Dict[str, int]:
+    """Demote the OWUI accounts of `emails`; unknown emails are skipped."""
+    totals = _post_batches(
+        "/api/internal/deactivate-users",
+        (({"emails": batch}, batch) for batch in _chunked(emails, MAX_BATCH)),
+        owui_url,
+        token,
+        {"received": 0, "deactivated": 0, "missing": 0},
+        concurrency,
+        session,
+    )
+
+    logging.info(
+        "OWUI deactivations: received=%d deactivated=%d missing=%d",
+        totals["received"],
+        totals["deactivated"],
+        totals["missing"],
     )
+    return totals
 
 
-def sync_once() -> None:
+def sync_once(full: bool = False) -> None:
     """Perform a single sync run."""
     load_dotenv()
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_API_KEY")
     owui_url = os.getenv("OWUI_URL")
     owui_token = os.getenv("OWUI_AUTH_TOKEN")
+    state_file = os.getenv("SYNC_STATE_FILE", DEFAULT_STATE_FILE)
 
     if not all([supabase_url, supabase_key, owui_url, owui_token]):
         logging.error("Missing required environment variables")
@@ -156,28 +374,58 @@ def sync_once() -> None:
 
     health_checks(supabase_url, supabase_key, owui_url)
 
-    users = fetch_active_users(supabase_url, supabase_key)
-    if not users:
-        logging.info("no actives")
-        return
+    watermark = None if full else load_watermark(state_file)
+    stats = {"fetched": 0, "active": 0, "deactivated": 0}
+    last_row: Dict[str, Optional[Dict[str, str]]] = {"row": None}
+    deactivations: List[str] = []
+
+    def changed_users() -> Iterator[Dict[str, str]]:
+        for page in fetch_changed_users(supabase_url, supabase_key, watermark):
+            stats["fetched"] += len(page)
+            last_row["row"] = page[-1]
+            for row in page:
+                if not is_active(row):
+                    if row.get("email"):
+                        stats["deactivated"] += 1
+                        deactivations.append(row["email"])
+                    continue
+                user = to_owui_user(row)
+                if user is None:
+                    continue
+                stats["active"] += 1
+                yield user
+
+    upsert_batches(changed_users(), owui_url, owui_token)
+    if deactivations:
+        deactivate_batches(deactivations, owui_url, owui_token)
 
-    payload = []
-    for user in users:
-        email = user.get("email")
-        if not email:
-            continue
-        tier = (user.get("tier") or "free").lower()
-        group_id = TIER_GROUP_MAP.get(tier, TIER_GROUP_MAP["free"])
-        payload.append({"email": email, "group_id": group_id})
+    logging.info(
+        "fetched=%d active=%d deactivated=%d since=%s",
+        stats["fetched"],
+        stats["active"],
+        stats["deactivated"],
+        watermark["updated_at"] if watermark else "-",
+    )
 
-    logging.info("fetched=%d sending=%d", len(users), len(payload))
+    if last_row["row"] is None:
+        logging.info("no changes")
+        return
 
-    upsert_batches(payload, owui_url, owui_token)
+    save_watermark(
+        state_file,
+        {
+            "updated_at": last_row["row"]["updated_at"],
+            "id": str(last_row["row"]["id"]),
+        },
+    )
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--loop", action="store_true", help="Run every 60 seconds")
+    parser.add_argument(
+        "--full", action="store_true", help="Ignore the watermark and resync all rows"
+    )
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -186,10 +434,10 @@ def main() -> None:
 
     if args.loop:
         while True:
-            sync_once()
+            sync_once(full=args.full)
             time.sleep(60)
     else:
-        sync_once()
+        sync_once(full=args.full)
 
 
 if __name__ == "__main__":
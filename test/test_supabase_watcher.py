@@ -0,0 +1,242 @@
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import supabase_watcher  # noqa: E402
+
+WATERMARK_RE = re.compile(
+    r'^\(updated_at\.gt\."(?P<ts>[^"]+)",and\(updated_at\.eq\."[^"]+",id\.gt\."(?P<id>[^"]+)"\)\)$'
+)
+
+
+class FakeSupabase:
+    """Minimal PostgREST stand-in serving `billing_users`."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def handle(self, handler):
+        query = {k: v[0] for k, v in parse_qs(urlparse(handler.path).query).items()}
+        self.requests.append(query)
+        if query.get("select") == "count":
+            return 200, [{"count": len(self.rows)}]
+
+        rows = sorted(self.rows, key=lambda r: (r["updated_at"], r["id"]))
+        if "or" in query:
+            m = WATERMARK_RE.match(query["or"])
+            key = (m.group("ts"), m.group("id"))
+            rows = [r for r in rows if (r["updated_at"], r["id"]) > key]
+        return 200, rows[: int(query.get("limit", len(rows)))]
+
+
+class FakeOWUI:
+    """Stand-in for the internal user endpoints, failing the first N posts."""
+
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.batches = []
+        self.deactivations = []
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        if handler.command == "GET":
+            return 200, {
+                "paths": {
+                    "/api/internal/upsert-users": {},
+                    "/api/internal/deactivate-users": {},
+                }
+            }
+
+        body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+        with self.lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return 503, {"detail": "unavailable"}
+            if handler.path.endswith("/deactivate-users"):
+                self.deactivations.extend(body["emails"])
+                return 200, {
+                    "received": len(body["emails"]),
+                    "deactivated": len(body["emails"]),
+                    "missing": 0,
+                }
+            self.batches.append(body["users"])
+        users = body["users"]
+        return 200, {
+            "received": len(users),
+            "created": 0,
+            "updated": len(users),
+            "failed": 0,
+        }
+
+
+def _serve(app):
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self):
+            status, payload = app.handle(self)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+@pytest.fixture
+def servers(monkeypatch, tmp_path):
+    rows = [
+        {
+            "id": f"{i:04d}",
+            "email": f"user{i}@example.com",
+            "tier": "pro" if i % 2 else "free",
+            "status": "active",
+            # several rows share a timestamp to exercise the id tie-breaker
+            "updated_at": f"2025-01-01T00:00:{i // 3:02d}",
+        }
+        for i in range(25)
+    ]
+    supabase = FakeSupabase(rows)
+    owui = FakeOWUI()
+    supabase_server, supabase_url = _serve(supabase)
+    owui_server, owui_url = _serve(owui)
+
+    monkeypatch.setenv("SUPABASE_URL", supabase_url)
+    monkeypatch.setenv("SUPABASE_API_KEY", "key")
+    monkeypatch.setenv("OWUI_URL", owui_url)
+    monkeypatch.setenv("OWUI_AUTH_TOKEN", "token")
+    monkeypatch.setenv("SYNC_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(supabase_watcher, "PAGE_SIZE", 4)
+    monkeypatch.setattr(supabase_watcher, "MAX_BATCH", 3)
+
+    yield supabase, owui, tmp_path / "state.json"
+
+    supabase_server.shutdown()
+    owui_server.shutdown()
+
+
+def _sent_emails(owui):
+    return sorted(u["email"] for batch in owui.batches for u in batch)
+
+
+def test_fetch_changed_users_keyset_pagination(servers):
+    supabase, _, _ = servers
+    pages = list(
+        supabase_watcher.fetch_changed_users(
+            supabase_watcher.os.environ["SUPABASE_URL"], "key", page_size=4
+        )
+    )
+    ids = [row["id"] for page in pages for row in page]
+    assert ids == [f"{i:04d}" for i in range(25)]
+    assert len(pages) == 7
+
+
+def test_sync_once_sends_only_changes(servers):
+    supabase, owui, state_file = servers
+
+    supabase_watcher.sync_once()
+    assert _sent_emails(owui) == sorted(r["email"] for r in supabase.rows)
+    assert json.loads(state_file.read_text()) == {
+        "updated_at": "2025-01-01T00:00:08",
+        "id": "0024",
+    }
+
+    # Nothing changed: no upserts
+    owui.batches.clear()
+    supabase_watcher.sync_once()
+    assert owui.batches == []
+
+    # One row deactivated, one upgraded
+    supabase.rows[3].update(status="cancelled", updated_at="2025-01-02T00:00:00")
+    supabase.rows[4].update(tier="pro", updated_at="2025-01-02T00:00:00")
+    supabase_watcher.sync_once()
+    sent = [u for batch in owui.batches for u in batch]
+    assert sent == [{"email": "user4@example.com", "group_id": "3"}]
+    assert owui.deactivations == ["user3@example.com"]
+
+
+def test_sync_once_reads_page_size_at_call_time(servers):
+    supabase, _, _ = servers
+
+    supabase_watcher.sync_once()
+    limits = {query["limit"] for query in supabase.requests if "limit" in query}
+    assert limits == {"4"}
+
+
+def test_first_run_never_upserts_inactive_users(servers):
+    supabase, owui, _ = servers
+    for row in supabase.rows[:5]:
+        row["status"] = "cancelled"
+
+    supabase_watcher.sync_once()
+    sent = _sent_emails(owui)
+    assert len(sent) == 20
+    assert not any("role" in u for batch in owui.batches for u in batch)
+    assert sorted(owui.deactivations) == sorted(r["email"] for r in supabase.rows[:5])
+
+
+def test_sync_once_retries_and_keeps_watermark_on_failure(servers, monkeypatch):
+    supabase, owui, state_file = servers
+
+    owui.fail_first = 2
+    supabase_watcher.sync_once()
+    assert _sent_emails(owui) == sorted(r["email"] for r in supabase.rows)
+
+    monkeypatch.setattr(supabase_watcher, "RETRIES", 0)
+    monkeypatch.setattr(
+        supabase_watcher,
+        "_session",
+        lambda pool_size=1: supabase_watcher.requests.Session(),
+    )
+    supabase.rows[0].update(updated_at="2025-01-03T00:00:00")
+    owui.fail_first = 1
+    with pytest.raises(SystemExit):
+        supabase_watcher.sync_once()
+    assert json.loads(state_file.read_text())["id"] == "0024"
+
+
+def test_post_batches_keeps_at_most_concurrency_in_flight(monkeypatch):
+    pulled = []
+    release = threading.Event()
+
+    def batches():
+        for i in range(10):
+            pulled.append(i)
+            yield {"users": []}, [f"user{i}@example.com"]
+
+    def post_batch(session, endpoint, headers, payload, emails):
+        release.wait(5)
+        return {"updated": 1}
+
+    monkeypatch.setattr(supabase_watcher, "_post_batch", post_batch)
+    totals = {"updated": 0}
+    thread = threading.Thread(
+        target=supabase_watcher._post_batches,
+        args=("/path", batches(), "http://owui", "token", totals, 2, object()),
+    )
+    thread.start()
+    time.sleep(0.1)
+    # two batches in flight, the third waits for a free slot
+    assert pulled == [0, 1, 2]
+
+    release.set()
+    thread.join(5)
+    assert totals == {"updated": 10}